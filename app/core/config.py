@@ -19,7 +19,103 @@ class Settings(BaseSettings):
     SENTRY_DSN: Optional[str] = os.getenv("SENTRY_DSN")
     # Log level for structured logging
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
-    
+
+    # SQLite connection pool (see app/db/pool.py)
+    DB_READER_POOL_SIZE: int = int(os.getenv("DB_READER_POOL_SIZE", "4"))
+    DB_BUSY_TIMEOUT_MS: int = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+    DB_STATEMENT_CACHE_SIZE: int = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "256"))
+    # Write-behind queue: flush after this many rows or this many ms
+    WRITE_BEHIND_MAX_BATCH: int = int(os.getenv("WRITE_BEHIND_MAX_BATCH", "64"))
+    WRITE_BEHIND_FLUSH_MS: int = int(os.getenv("WRITE_BEHIND_FLUSH_MS", "50"))
+    # Resident syndicate graph: how often to pick up links written by other workers
+    SYNDICATE_GRAPH_REFRESH_S: float = float(os.getenv("SYNDICATE_GRAPH_REFRESH_S", "5"))
+    # Skip the LLM extractor when the regex pre-extractor finds nothing or is confident
+    LOCAL_EXTRACTION_GATE: bool = os.getenv("LOCAL_EXTRACTION_GATE", "true").lower() == "true"
+    # Opt-in: one structured Gemini call per turn for detection + extraction
+    COMBINED_LLM_MODE: bool = os.getenv("COMBINED_LLM_MODE", "false").lower() == "true"
+    # Scam detector response cache (exact + near-duplicate lookup)
+    DETECTOR_CACHE_ENABLED: bool = os.getenv("DETECTOR_CACHE_ENABLED", "true").lower() == "true"
+    DETECTOR_CACHE_SIZE: int = int(os.getenv("DETECTOR_CACHE_SIZE", "2048"))
+    DETECTOR_CACHE_TTL_S: float = float(os.getenv("DETECTOR_CACHE_TTL_S", "3600"))
+    DETECTOR_CACHE_NEAR_JACCARD: float = float(os.getenv("DETECTOR_CACHE_NEAR_JACCARD", "0.75"))
+    # Reply-first webhook: forensics run from the durable job queue after the reply
+    REPLY_FIRST_MODE: bool = os.getenv("REPLY_FIRST_MODE", "false").lower() == "true"
+    JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", "2"))
+    JOB_MAX_ATTEMPTS: int = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+    JOB_LEASE_S: float = float(os.getenv("JOB_LEASE_S", "120"))
+    JOB_POLL_INTERVAL_S: float = float(os.getenv("JOB_POLL_INTERVAL_S", "0.5"))
+    JOB_POLL_MAX_INTERVAL_S: float = float(os.getenv("JOB_POLL_MAX_INTERVAL_S", "5"))
+    # Shared outbound HTTP client (see app/core/http.py)
+    HTTP2_ENABLED: bool = os.getenv("HTTP2_ENABLED", "false").lower() == "true"
+    HTTP_MAX_CONNECTIONS: int = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+    HTTP_MAX_KEEPALIVE: int = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+    HTTP_KEEPALIVE_EXPIRY_S: float = float(os.getenv("HTTP_KEEPALIVE_EXPIRY_S", "30"))
+    HTTP_PER_HOST_LIMIT: int = int(os.getenv("HTTP_PER_HOST_LIMIT", "8"))
+    HTTP_DEFAULT_TIMEOUT_S: float = float(os.getenv("HTTP_DEFAULT_TIMEOUT_S", "10"))
+    HTTP_CONNECT_TIMEOUT_S: float = float(os.getenv("HTTP_CONNECT_TIMEOUT_S", "3"))
+    # Whole-pass deadlines shared by every call in enrichment / blacklist fan-out
+    ENRICHMENT_BUDGET_S: float = float(os.getenv("ENRICHMENT_BUDGET_S", "4"))
+    BLACKLIST_BUDGET_S: float = float(os.getenv("BLACKLIST_BUDGET_S", "4"))
+    # Enrichment verdict cache: per-source TTLs, short TTL for failed lookups
+    ENRICHMENT_CACHE_SIZE: int = int(os.getenv("ENRICHMENT_CACHE_SIZE", "10000"))
+    ENRICHMENT_TTL_UPI_S: float = float(os.getenv("ENRICHMENT_TTL_UPI_S", "86400"))
+    ENRICHMENT_TTL_LINK_S: float = float(os.getenv("ENRICHMENT_TTL_LINK_S", "21600"))
+    ENRICHMENT_NEGATIVE_TTL_S: float = float(os.getenv("ENRICHMENT_NEGATIVE_TTL_S", "300"))
+    # Blacklist submission ledger: identifiers per batched POST, retry backoff for failures
+    BLACKLIST_BATCH_SIZE: int = int(os.getenv("BLACKLIST_BATCH_SIZE", "50"))
+    BLACKLIST_LEASE_S: float = float(os.getenv("BLACKLIST_LEASE_S", "60"))
+    BLACKLIST_RETRY_S: float = float(os.getenv("BLACKLIST_RETRY_S", "300"))
+    # GUVI callback outbox: coalescing window, re-send every N turns, delivery retries
+    GUVI_CALLBACK_DEBOUNCE_S: float = float(os.getenv("GUVI_CALLBACK_DEBOUNCE_S", "3"))
+    GUVI_TURN_MILESTONE: int = int(os.getenv("GUVI_TURN_MILESTONE", "5"))
+    GUVI_CALLBACK_WORKERS: int = int(os.getenv("GUVI_CALLBACK_WORKERS", "1"))
+    GUVI_CALLBACK_MAX_ATTEMPTS: int = int(os.getenv("GUVI_CALLBACK_MAX_ATTEMPTS", "8"))
+    # PDF reports: render processes and retention of the reports/ directory
+    REPORT_WORKERS: int = int(os.getenv("REPORT_WORKERS", "2"))
+    REPORT_RETENTION_DAYS: float = float(os.getenv("REPORT_RETENTION_DAYS", "30"))
+    REPORT_MAX_FILES: int = int(os.getenv("REPORT_MAX_FILES", "5000"))
+    REPORT_PRUNE_INTERVAL_S: float = float(os.getenv("REPORT_PRUNE_INTERVAL_S", "600"))
+    # Bulk evidence exports
+    EXPORT_MAX_SESSIONS: int = int(os.getenv("EXPORT_MAX_SESSIONS", "2000"))
+    EXPORT_RETENTION_DAYS: float = float(os.getenv("EXPORT_RETENTION_DAYS", "7"))
+    # "node": checkpoint after every graph step (LangGraph default); "turn": once per turn,
+    # without the transient history and with sparse intel (app/engine/checkpointing.py)
+    CHECKPOINT_MODE: str = os.getenv("CHECKPOINT_MODE", "node").lower()
+    # Hot session cache (context, scam flag, intervention, turn count); messages kept per session >= get_context's 10
+    SESSION_CACHE_SIZE: int = int(os.getenv("SESSION_CACHE_SIZE", "5000"))
+    SESSION_CACHE_IDLE_S: float = float(os.getenv("SESSION_CACHE_IDLE_S", "1800"))
+    SESSION_CACHE_MESSAGES: int = int(os.getenv("SESSION_CACHE_MESSAGES", "20"))
+    SESSION_VERSION_SLOTS: int = int(os.getenv("SESSION_VERSION_SLOTS", "65536"))
+    # Per-session turn serialization: in-process lock + cross-worker byte-range lock on <db>.locks
+    SESSION_LOCK_SLOTS: int = int(os.getenv("SESSION_LOCK_SLOTS", "65536"))
+    SESSION_LOCK_TIMEOUT_S: float = float(os.getenv("SESSION_LOCK_TIMEOUT_S", "60"))
+    SESSION_LEASE_POLL_S: float = float(os.getenv("SESSION_LEASE_POLL_S", "0.05"))
+    # /webhook burst coalescing: messages of a session within the window share one turn (0 = off)
+    COALESCE_WINDOW_MS: int = int(os.getenv("COALESCE_WINDOW_MS", "0"))
+    COALESCE_MAX_WINDOW_MS: int = int(os.getenv("COALESCE_MAX_WINDOW_MS", "2500"))
+    COALESCE_MAX_MESSAGES: int = int(os.getenv("COALESCE_MAX_MESSAGES", "5"))
+    # LangGraph checkpoint retention: newest N checkpoints per thread, idle threads archived/dropped
+    CHECKPOINT_KEEP_LAST: int = int(os.getenv("CHECKPOINT_KEEP_LAST", "10"))
+    CHECKPOINT_IDLE_TTL_S: float = float(os.getenv("CHECKPOINT_IDLE_TTL_S", str(7 * 86400)))
+    CHECKPOINT_ARCHIVE: bool = os.getenv("CHECKPOINT_ARCHIVE", "true").lower() == "true"
+    CHECKPOINT_RETENTION_INTERVAL_S: float = float(os.getenv("CHECKPOINT_RETENTION_INTERVAL_S", "900"))
+    CHECKPOINT_RETENTION_BATCH: int = int(os.getenv("CHECKPOINT_RETENTION_BATCH", "200"))
+    CHECKPOINT_VACUUM_PAGES: int = int(os.getenv("CHECKPOINT_VACUUM_PAGES", "1000"))
+    CHECKPOINT_VACUUM_CONVERT_MAX_MB: int = int(os.getenv("CHECKPOINT_VACUUM_CONVERT_MAX_MB", "256"))
+    # Vector fingerprint store: off-loop threads and batched upserts
+    VECTOR_WORKERS: int = int(os.getenv("VECTOR_WORKERS", "2"))
+    VECTOR_MAX_BATCH: int = int(os.getenv("VECTOR_MAX_BATCH", "32"))
+    VECTOR_FLUSH_MS: int = int(os.getenv("VECTOR_FLUSH_MS", "200"))
+    # "chroma" or "numpy" (memory-mapped matrix shared across workers; IVF index past VECTOR_ANN_MIN_ROWS, 0 = always exact)
+    VECTOR_BACKEND: str = os.getenv("VECTOR_BACKEND", "chroma").lower()
+    VECTOR_ANN_MIN_ROWS: int = int(os.getenv("VECTOR_ANN_MIN_ROWS", "50000"))
+    VECTOR_ANN_NPROBE: int = int(os.getenv("VECTOR_ANN_NPROBE", "8"))
+    # Fingerprint embedder: directory holding Chroma's all-MiniLM-L6-v2 "onnx/" folder
+    # (unset = Chroma's default cache path). Downloads are off for locked-down networks.
+    EMBEDDING_MODEL_DIR: Optional[str] = os.getenv("EMBEDDING_MODEL_DIR")
+    EMBEDDING_ALLOW_DOWNLOAD: bool = os.getenv("EMBEDDING_ALLOW_DOWNLOAD", "false").lower() == "true"
+    EMBEDDING_CACHE_SIZE: int = int(os.getenv("EMBEDDING_CACHE_SIZE", "4096"))
+
     # Hugging Face compatibility: Use /tmp if SPACE_ID is set (HF Spaces)
     IS_HF: bool = os.getenv("SPACE_ID") is not None
     BASE_DATA_DIR: str = "/tmp/helware_data" if os.getenv("SPACE_ID") else os.getcwd()
@@ -36,6 +132,12 @@ class Settings(BaseSettings):
         os.makedirs(os.path.dirname(path), exist_ok=True)
         return path
 
+    @property
+    def CHECKPOINT_ARCHIVE_PATH(self) -> str:
+        path = os.path.join(self.BASE_DATA_DIR, "db", "checkpoints_archive.sqlite")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path
+
     @property
     def VECTOR_DB_DIR(self) -> str:
         path = os.path.join(self.BASE_DATA_DIR, "db", "vector_store")
@@ -48,6 +150,12 @@ class Settings(BaseSettings):
         os.makedirs(path, exist_ok=True)
         return path
 
+    @property
+    def EXPORTS_DIR(self) -> str:
+        path = os.path.join(self.BASE_DATA_DIR, "exports")
+        os.makedirs(path, exist_ok=True)
+        return path
+
     def validate_keys(self):
         if not self.GOOGLE_API_KEY:
             print("WARNING: GOOGLE_API_KEY not found. LLM features will fail.")
@@ -0,0 +1,143 @@
+import time
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class TimeoutBudget:
+    """
+    A shared deadline for a group of outbound calls (e.g. one enrichment pass):
+    each call gets at most the time left, never its full per-call timeout.
+    """
+
+    def __init__(self, seconds: float):
+        self.deadline = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.deadline - time.monotonic())
+
+
+class BudgetExceeded(httpx.TimeoutException):
+    pass
+
+
+class OutboundHTTP:
+    """
+    App-scoped outbound HTTP layer: one pooled httpx.AsyncClient (keep-alive,
+    optional HTTP/2) plus per-host concurrency limits, so a session with dozens
+    of identifiers cannot open dozens of sockets to the same API at once.
+    """
+
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    async def start(self):
+        if self._client is not None:
+            return
+        http2 = settings.HTTP2_ENABLED
+        if http2:
+            try:
+                import h2  # noqa: F401  (httpx[http2] extra)
+            except ImportError:
+                logger.warning("HTTP2_ENABLED set but the 'h2' package is missing; using HTTP/1.1")
+                http2 = False
+        self._client = httpx.AsyncClient(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY_S,
+            ),
+            timeout=httpx.Timeout(settings.HTTP_DEFAULT_TIMEOUT_S, connect=settings.HTTP_CONNECT_TIMEOUT_S),
+        )
+        logger.info(f"Outbound HTTP client ready (http2={http2})")
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return self._client
+
+    def budget(self, seconds: float) -> TimeoutBudget:
+        return TimeoutBudget(seconds)
+
+    def _host_state(self, host: str):
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(settings.HTTP_PER_HOST_LIMIT)
+            self._stats[host] = {"requests": 0, "errors": 0, "in_flight": 0, "queued": 0}
+        return self._host_limits[host], self._stats[host]
+
+    @asynccontextmanager
+    async def _slot(self, host: str):
+        limit, stats = self._host_state(host)
+        stats["queued"] += 1
+        try:
+            await limit.acquire()
+        finally:
+            stats["queued"] -= 1
+        stats["in_flight"] += 1
+        try:
+            yield stats
+        finally:
+            stats["in_flight"] -= 1
+            limit.release()
+
+    async def request(self, method: str, url: str, timeout: float = None,
+                      budget: TimeoutBudget = None, **kwargs) -> httpx.Response:
+        if self._client is None:
+            # Scripts and tests that bypass the FastAPI lifespan
+            await self.start()
+        host = urlsplit(url).netloc
+        timeout = timeout or settings.HTTP_DEFAULT_TIMEOUT_S
+        async with self._slot(host) as stats:
+            if budget is not None:
+                # Time spent queued for the host slot counts against the budget
+                remaining = budget.remaining()
+                if remaining <= 0:
+                    stats["errors"] += 1
+                    raise BudgetExceeded(f"Timeout budget exhausted before request to {host}")
+                timeout = min(timeout, remaining)
+            stats["requests"] += 1
+            try:
+                return await self._client.request(method, url, timeout=timeout, **kwargs)
+            except Exception:
+                stats["errors"] += 1
+                raise
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    def stats(self) -> Dict:
+        pool = {}
+        # httpx does not expose pool state publicly; best effort via the transport
+        connections = getattr(getattr(getattr(self._client, "_transport", None), "_pool", None), "connections", None)
+        if connections is not None:
+            pool = {
+                "open_connections": len(connections),
+                "idle_connections": len([c for c in connections if c.is_idle()]),
+            }
+        return {
+            "started": self._client is not None,
+            "pool": pool,
+            "per_host_limit": settings.HTTP_PER_HOST_LIMIT,
+            "hosts": {host: dict(s) for host, s in self._stats.items()},
+        }
+
+
+http_client = OutboundHTTP()
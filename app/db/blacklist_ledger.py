@@ -0,0 +1,146 @@
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+from app.core.config import settings
+from app.db.repository import db, HoneyDB
+
+# Identifiers this process knows are submitted (with their fingerprint)
+KNOWN_CACHE_SIZE = 50000
+
+# Atomic per-identifier claim. A row is (re)claimed only if it was never
+# submitted to this destination, its submitted fingerprint changed, or a
+# previous attempt failed / its lease lapsed and the retry time has passed.
+# Other sessions and workers see 'inflight' and skip it.
+CLAIM_SQL = """
+    INSERT INTO blacklist_submissions
+        (destination, type, canonical_value, display_value, fingerprint, status,
+         first_session_id, last_session_id, retry_at)
+    VALUES (?, ?, ?, ?, ?, 'inflight', ?, ?, ?)
+    ON CONFLICT(destination, type, canonical_value) DO UPDATE SET
+        display_value = excluded.display_value,
+        fingerprint = excluded.fingerprint,
+        status = 'inflight',
+        last_session_id = excluded.last_session_id,
+        retry_at = excluded.retry_at
+    WHERE (status = 'submitted' AND fingerprint != excluded.fingerprint)
+       OR (status != 'submitted' AND retry_at <= ?)
+    RETURNING type, canonical_value
+"""
+
+
+@dataclass(frozen=True)
+class LedgerItem:
+    type: str
+    canonical_value: str
+    display_value: str
+    fingerprint: str
+
+
+class BlacklistLedger:
+    """
+    Idempotency ledger for takedown submissions, keyed by (destination, type,
+    canonical value) in the `blacklist_submissions` table (schema v5).
+
+    `claim` returns only the items that still need sending; `mark_submitted`
+    and `mark_failed` record the outcome. Failed items are retried with
+    exponential backoff the next time any session sees them.
+    """
+
+    def __init__(self, honey_db: HoneyDB):
+        self.db = honey_db
+        self._known: "OrderedDict[Tuple[str, str, str], str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def _run(self, fn, *args):
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self.db.executor, fn, *args)
+
+    def _remember(self, destination: str, items: List[LedgerItem]):
+        with self._lock:
+            for item in items:
+                key = (destination, item.type, item.canonical_value)
+                self._known[key] = item.fingerprint
+                self._known.move_to_end(key)
+            while len(self._known) > KNOWN_CACHE_SIZE:
+                self._known.popitem(last=False)
+
+    async def claim(self, destination: str, session_id: str, items: List[LedgerItem]) -> List[LedgerItem]:
+        with self._lock:
+            # Known-submitted identifiers never cost a write transaction
+            items = [
+                i for i in items
+                if self._known.get((destination, i.type, i.canonical_value)) != i.fingerprint
+            ]
+        if not items:
+            return []
+        return await self._run(self._claim_sync, destination, session_id, items)
+
+    def _claim_sync(self, destination: str, session_id: str, items: List[LedgerItem]) -> List[LedgerItem]:
+        now = time.time()
+        claimed, settled = [], []
+        with self.db.pool.write() as conn:
+            for item in items:
+                row = conn.execute(CLAIM_SQL, (
+                    destination, item.type, item.canonical_value, item.display_value, item.fingerprint,
+                    session_id, session_id, now + settings.BLACKLIST_LEASE_S, now
+                )).fetchone()
+                if row is not None:
+                    claimed.append(item)
+                    continue
+                existing = conn.execute(
+                    "SELECT status, fingerprint FROM blacklist_submissions "
+                    "WHERE destination = ? AND type = ? AND canonical_value = ?",
+                    (destination, item.type, item.canonical_value)
+                ).fetchone()
+                if existing["status"] == "submitted" and existing["fingerprint"] == item.fingerprint:
+                    settled.append(item)
+        self._remember(destination, settled)
+        return claimed
+
+    async def mark_submitted(self, destination: str, items: List[LedgerItem], result: str):
+        await self._run(self._mark_sync, destination, items, "submitted", result)
+        self._remember(destination, items)
+
+    async def mark_failed(self, destination: str, items: List[LedgerItem], error: str):
+        await self._run(self._mark_sync, destination, items, "failed", error)
+
+    def _mark_sync(self, destination: str, items: List[LedgerItem], status: str, result: str):
+        now = time.time()
+        with self.db.pool.write() as conn:
+            conn.executemany(
+                """
+                UPDATE blacklist_submissions
+                SET status = ?, attempts = attempts + 1, result = ?,
+                    submitted_at = CASE WHEN ? = 'submitted' THEN ? ELSE submitted_at END,
+                    retry_at = ? + MIN(? * (1 << attempts), 86400)
+                WHERE destination = ? AND type = ? AND canonical_value = ?
+                """,
+                [
+                    (status, result[:500], status, now, now, settings.BLACKLIST_RETRY_S,
+                     destination, i.type, i.canonical_value)
+                    for i in items
+                ]
+            )
+
+    async def stats(self) -> Dict:
+        return await self._run(self._stats_sync)
+
+    def _stats_sync(self) -> Dict:
+        with self.db.pool.read() as conn:
+            rows = conn.execute(
+                "SELECT destination, status, COUNT(*) AS n, SUM(attempts) AS attempts "
+                "FROM blacklist_submissions GROUP BY destination, status"
+            ).fetchall()
+        out: Dict[str, Dict] = {}
+        for r in rows:
+            dest = out.setdefault(r["destination"], {"attempts": 0})
+            dest[r["status"]] = r["n"]
+            dest["attempts"] += r["attempts"]
+        return out
+
+
+blacklist_ledger = BlacklistLedger(db)
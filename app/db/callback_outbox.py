@@ -0,0 +1,187 @@
+import json
+import time
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List
+
+from app.core.config import settings
+from app.db.job_queue import Job
+from app.db.repository import db, HoneyDB
+
+logger = logging.getLogger(__name__)
+
+# Sessions whose latest change_key this process has already staged
+STAGED_CACHE_SIZE = 10000
+
+# Same lease semantics as the jobs table: a due row, or one whose sender died
+CLAIM_SQL = """
+    UPDATE guvi_outbox
+    SET status = 'running', attempts = attempts + 1, locked_until = ?
+    WHERE id = (
+        SELECT id FROM guvi_outbox
+        WHERE (status = 'pending' AND due_at <= ?)
+           OR (status = 'running' AND locked_until < ?)
+        ORDER BY due_at
+        LIMIT 1
+    )
+    RETURNING id, session_id, payload, version, attempts
+"""
+
+PROBE_SQL = """
+    SELECT 1 FROM guvi_outbox
+    WHERE (status = 'pending' AND due_at <= ?)
+       OR (status = 'running' AND locked_until < ?)
+    LIMIT 1
+"""
+
+
+class CallbackOutbox:
+    """
+    Transactional outbox for the GUVI result callback: at most one row per
+    session holding the latest payload.
+
+    `stage` is called every turn but only marks the row pending when the
+    change key (intel + turn milestone) differs from what was last staged.
+    The first change opens a GUVI_CALLBACK_DEBOUNCE_S window; later changes
+    inside it only replace the payload, so a burst costs one send. Exposes
+    the JobQueue claim/complete/fail interface so a JobWorkerPool delivers it.
+    """
+
+    kind = "guvi_callback"
+
+    def __init__(self, honey_db: HoneyDB, max_attempts: int = None, lease_seconds: float = None):
+        self.db = honey_db
+        self.max_attempts = max_attempts or settings.GUVI_CALLBACK_MAX_ATTEMPTS
+        self.lease_seconds = lease_seconds or settings.JOB_LEASE_S
+        self._staged: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[], None]] = []
+
+    def add_listener(self, callback: Callable[[], None]):
+        self._listeners.append(callback)
+
+    async def _run(self, fn, *args):
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self.db.executor, fn, *args)
+
+    async def stage(self, session_id: str, change_key: str, payload: Dict[str, Any]) -> bool:
+        """Record the session's latest callback. Returns True if a (re)send was scheduled."""
+        with self._lock:
+            if self._staged.get(session_id) == change_key:
+                return False
+        changed = await self._run(self._stage_sync, session_id, change_key, payload)
+        with self._lock:
+            self._staged[session_id] = change_key
+            self._staged.move_to_end(session_id)
+            while len(self._staged) > STAGED_CACHE_SIZE:
+                self._staged.popitem(last=False)
+        return changed
+
+    def _stage_sync(self, session_id: str, change_key: str, payload: Dict[str, Any]) -> bool:
+        now = time.time()
+        body = json.dumps(payload, default=str)
+        due = now + settings.GUVI_CALLBACK_DEBOUNCE_S
+        with self.db.pool.write() as conn:
+            row = conn.execute(
+                "SELECT status, change_key FROM guvi_outbox WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            if row is None:
+                conn.execute(
+                    "INSERT INTO guvi_outbox (session_id, payload, change_key, status, due_at, updated_at) "
+                    "VALUES (?, ?, ?, 'pending', ?, ?)",
+                    (session_id, body, change_key, due, now)
+                )
+                return True
+            if row["change_key"] == change_key:
+                return False
+            if row["status"] in ("pending", "running"):
+                # Inside the open window (or mid-send): newest payload wins, timer unchanged
+                conn.execute(
+                    "UPDATE guvi_outbox SET payload = ?, change_key = ?, version = version + 1, updated_at = ? "
+                    "WHERE session_id = ?",
+                    (body, change_key, now, session_id)
+                )
+            else:
+                conn.execute(
+                    "UPDATE guvi_outbox SET payload = ?, change_key = ?, version = version + 1, status = 'pending', "
+                    "attempts = 0, due_at = ?, last_error = NULL, updated_at = ? WHERE session_id = ?",
+                    (body, change_key, due, now, session_id)
+                )
+            return True
+
+    async def claim(self, worker_id: str):
+        return await self._run(self._claim_sync)
+
+    def _claim_sync(self):
+        now = time.time()
+        # Read-only probe first, as in JobQueue: an idle outbox never takes the writer
+        with self.db.pool.read() as conn:
+            if conn.execute(PROBE_SQL, (now, now)).fetchone() is None:
+                return None
+        with self.db.pool.write() as conn:
+            row = conn.execute(CLAIM_SQL, (now + self.lease_seconds, now, now)).fetchone()
+        if row is None:
+            return None
+        return Job(
+            row["id"], self.kind, row["session_id"],
+            {"callback": json.loads(row["payload"]), "version": row["version"]}, row["attempts"]
+        )
+
+    # As in JobQueue, complete/fail return False once the lease was lost. A row has
+    # no owner column; `attempts` (bumped by every claim) identifies the claim.
+
+    async def complete(self, job: Job) -> bool:
+        return await self._run(self._complete_sync, job)
+
+    def _complete_sync(self, job: Job) -> bool:
+        now = time.time()
+        with self.db.pool.write() as conn:
+            # A newer turn staged while we were sending: leave it pending for the next round
+            cursor = conn.execute(
+                """
+                UPDATE guvi_outbox
+                SET status = CASE WHEN version = ? THEN 'sent' ELSE 'pending' END,
+                    attempts = CASE WHEN version = ? THEN attempts ELSE 0 END,
+                    due_at = CASE WHEN version = ? THEN due_at ELSE ? END,
+                    sent_at = ?, locked_until = NULL, last_error = NULL
+                WHERE id = ? AND status = 'running' AND attempts = ?
+                """,
+                (job.payload["version"], job.payload["version"], job.payload["version"],
+                 now + settings.GUVI_CALLBACK_DEBOUNCE_S, now, job.id, job.attempts)
+            )
+            return cursor.rowcount > 0
+
+    async def fail(self, job: Job, error: str) -> bool:
+        return await self._run(self._fail_sync, job, error)
+
+    def _fail_sync(self, job: Job, error: str) -> bool:
+        with self.db.pool.write() as conn:
+            if job.attempts >= self.max_attempts:
+                cursor = conn.execute(
+                    "UPDATE guvi_outbox SET status = 'failed', locked_until = NULL, last_error = ? "
+                    "WHERE id = ? AND status = 'running' AND attempts = ?",
+                    (error[:2000], job.id, job.attempts)
+                )
+                if cursor.rowcount:
+                    logger.error(f"GUVI callback for {job.session_id} failed permanently after {job.attempts} attempts: {error}")
+                return cursor.rowcount > 0
+            backoff = min(2 ** job.attempts, 300)
+            cursor = conn.execute(
+                "UPDATE guvi_outbox SET status = 'pending', locked_until = NULL, due_at = ?, last_error = ? "
+                "WHERE id = ? AND status = 'running' AND attempts = ?",
+                (time.time() + backoff, error[:2000], job.id, job.attempts)
+            )
+            return cursor.rowcount > 0
+
+    async def stats(self) -> Dict[str, int]:
+        return await self._run(self._stats_sync)
+
+    def _stats_sync(self) -> Dict[str, int]:
+        with self.db.pool.read() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) AS n FROM guvi_outbox GROUP BY status").fetchall()
+        return {r["status"]: r["n"] for r in rows}
+
+
+guvi_outbox = CallbackOutbox(db)
@@ -0,0 +1,320 @@
+import os
+import time
+import fcntl
+import sqlite3
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# RFC 4122 epoch (1582-10-15) to Unix epoch, in 100ns ticks
+_UUID_EPOCH_OFFSET = 0x01B21DD213814000
+AUTO_VACUUM_MODES = {0: "none", 1: "full", 2: "incremental"}
+
+
+def checkpoint_time(checkpoint_id: str) -> Optional[float]:
+    """Unix time embedded in a LangGraph checkpoint id (a UUIDv6); None if it is not one."""
+    try:
+        value = int(checkpoint_id.replace("-", ""), 16)
+    except (AttributeError, ValueError):
+        return None
+    if (value >> 76) & 0xF != 6:
+        return None
+    ticks = ((value >> 96) << 28) | (((value >> 80) & 0xFFFF) << 12) | ((value >> 64) & 0x0FFF)
+    return (ticks - _UUID_EPOCH_OFFSET) / 1e7
+
+
+class CheckpointRetention:
+    """
+    Retention for the AsyncSqliteSaver database. Every node writes a full state
+    snapshot, so per (thread_id, checkpoint_ns) only the newest `keep_last`
+    checkpoints (and their pending writes) are kept, and threads idle past
+    `idle_ttl_s` are dropped, after copying their latest checkpoint into the
+    archive DB when one is configured. Freed pages are returned to the OS with
+    incremental VACUUM.
+
+    Work runs on its own connection in short batches so the saver's writes for
+    live turns interleave, and a file lock keeps gunicorn workers from running
+    passes concurrently.
+    """
+
+    def __init__(self, path: str, keep_last: int, idle_ttl_s: float, archive_path: Optional[str] = None,
+                 interval_s: float = 900, batch_threads: int = 200, vacuum_pages: int = 1000,
+                 convert_max_bytes: int = 256 * 2**20):
+        self.path = path
+        self.keep_last = max(1, keep_last)
+        self.idle_ttl_s = idle_ttl_s
+        self.archive_path = archive_path
+        self.interval_s = interval_s
+        self.batch_threads = batch_threads
+        self.vacuum_pages = vacuum_pages
+        self.convert_max_bytes = convert_max_bytes
+        self._conn: Optional[sqlite3.Connection] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+        self.last_run: Optional[Dict] = None
+        self.totals = defaultdict(int)
+
+    async def _run(self, fn, *args):
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, fn, *args)
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            # Autocommit: every statement/batch below is its own short transaction
+            self._conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            self._conn.execute("PRAGMA busy_timeout = 10000")
+        return self._conn
+
+    def _disk_bytes(self) -> int:
+        return sum(os.path.getsize(p) for p in (self.path, self.path + "-wal") if os.path.exists(p))
+
+    # --- background loop ----------------------------------------------------
+
+    def start(self):
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        self._stopping.set()
+        if self._task:
+            await asyncio.gather(self._task, return_exceptions=True)
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    async def _loop(self):
+        while not self._stopping.is_set():
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"Checkpoint retention pass failed: {e}")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.interval_s)
+            except asyncio.TimeoutError:
+                pass
+
+    # --- one pass -------------------------------------------------------------
+
+    async def run_once(self) -> Optional[Dict]:
+        """Trim, expire and compact once. None if another worker holds the pass lock."""
+        if not os.path.exists(self.path):
+            return None
+        lock = open(self.path + ".retention.lock", "w")
+        try:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return None
+            return await self._pass()
+        finally:
+            lock.close()
+
+    async def _pass(self) -> Dict:
+        started = time.monotonic()
+        bytes_before = await self._run(self._disk_bytes)
+        report = defaultdict(int)
+
+        threads = await self._run(self._thread_summary)
+        cutoff = time.time() - self.idle_ttl_s
+        idle = [t for t, (last, _) in threads.items() if last is not None and last < cutoff]
+        idle_set = set(idle)
+        trim = [(t, ns) for t, (_, over) in threads.items() if t not in idle_set for ns in over]
+
+        for i in range(0, len(idle), self.batch_threads):
+            counts = await self._run(self._expire_batch, idle[i:i + self.batch_threads])
+            for key, value in counts.items():
+                report[key] += value
+        for i in range(0, len(trim), self.batch_threads):
+            counts = await self._run(self._trim_batch, trim[i:i + self.batch_threads])
+            for key, value in counts.items():
+                report[key] += value
+
+        report["pages_vacuumed"] = await self._vacuum()
+        await self._run(self._wal_truncate)
+        bytes_after = await self._run(self._disk_bytes)
+        report.update(
+            threads_seen=len(threads),
+            bytes_before=bytes_before,
+            bytes_after=bytes_after,
+            bytes_reclaimed=max(0, bytes_before - bytes_after),
+            duration_s=round(time.monotonic() - started, 3),
+            finished_at=time.time(),
+        )
+        for key in ("checkpoints_deleted", "writes_deleted", "threads_trimmed", "threads_archived",
+                    "threads_dropped", "pages_vacuumed", "bytes_reclaimed"):
+            self.totals[key] += report[key]
+        self.totals["passes"] += 1
+        self.last_run = dict(report)
+        if report["checkpoints_deleted"] or report["bytes_reclaimed"]:
+            logger.info(
+                f"Checkpoint retention: -{report['checkpoints_deleted']} checkpoints, "
+                f"{report['threads_dropped']} idle threads dropped, {report['bytes_reclaimed']} bytes reclaimed"
+            )
+        return self.last_run
+
+    def _thread_summary(self) -> Dict[str, Tuple[Optional[float], List[str]]]:
+        """thread_id -> (last checkpoint time, namespaces holding more than keep_last checkpoints)."""
+        conn = self._connect()
+        rows = conn.execute(
+            "SELECT thread_id, checkpoint_ns, COUNT(*), MAX(checkpoint_id) FROM checkpoints "
+            "GROUP BY thread_id, checkpoint_ns"
+        ).fetchall()
+        threads: Dict[str, Tuple[Optional[float], List[str]]] = {}
+        for thread_id, ns, count, newest in rows:
+            last, over = threads.get(thread_id, (None, []))
+            ts = checkpoint_time(newest)
+            if ts is not None:
+                last = ts if last is None else max(last, ts)
+            if count > self.keep_last:
+                over = over + [ns]
+            threads[thread_id] = (last, over)
+        return threads
+
+    def _trim_batch(self, targets: List[Tuple[str, str]]) -> Dict[str, int]:
+        conn = self._connect()
+        counts = defaultdict(int)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for thread_id, ns in targets:
+                oldest_kept = conn.execute(
+                    "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                    "ORDER BY checkpoint_id DESC LIMIT 1 OFFSET ?",
+                    (thread_id, ns, self.keep_last - 1)
+                ).fetchone()
+                if oldest_kept is None:
+                    continue
+                args = (thread_id, ns, oldest_kept[0])
+                counts["writes_deleted"] += conn.execute(
+                    "DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id < ?", args
+                ).rowcount
+                counts["checkpoints_deleted"] += conn.execute(
+                    "DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id < ?", args
+                ).rowcount
+                counts["threads_trimmed"] += 1
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return counts
+
+    def _ensure_archive(self, conn: sqlite3.Connection):
+        if conn.execute("SELECT 1 FROM pragma_database_list WHERE name = 'archive'").fetchone():
+            return
+        conn.execute("ATTACH DATABASE ? AS archive", (self.archive_path,))
+        for table in ("checkpoints", "writes"):
+            # sqlite_master keeps the saver's DDL as "CREATE TABLE <name> (...)"
+            ddl = conn.execute("SELECT sql FROM main.sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone()
+            conn.execute(ddl[0].replace("CREATE TABLE ", "CREATE TABLE IF NOT EXISTS archive.", 1))
+
+    def _expire_batch(self, thread_ids: List[str]) -> Dict[str, int]:
+        conn = self._connect()
+        counts = defaultdict(int)
+        if self.archive_path:
+            self._ensure_archive(conn)
+        marks = ",".join("?" * len(thread_ids))
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if self.archive_path:
+                # Latest checkpoint per namespace (and its pending writes) is enough to resume or audit
+                latest = f"""
+                    SELECT thread_id, checkpoint_ns, MAX(checkpoint_id) FROM main.checkpoints
+                    WHERE thread_id IN ({marks}) GROUP BY thread_id, checkpoint_ns
+                """
+                conn.execute(
+                    f"INSERT OR REPLACE INTO archive.checkpoints SELECT * FROM main.checkpoints "
+                    f"WHERE (thread_id, checkpoint_ns, checkpoint_id) IN ({latest})", thread_ids
+                )
+                conn.execute(
+                    f"INSERT OR REPLACE INTO archive.writes SELECT * FROM main.writes "
+                    f"WHERE (thread_id, checkpoint_ns, checkpoint_id) IN ({latest})", thread_ids
+                )
+                counts["threads_archived"] += len(thread_ids)
+            counts["writes_deleted"] += conn.execute(
+                f"DELETE FROM main.writes WHERE thread_id IN ({marks})", thread_ids
+            ).rowcount
+            counts["checkpoints_deleted"] += conn.execute(
+                f"DELETE FROM main.checkpoints WHERE thread_id IN ({marks})", thread_ids
+            ).rowcount
+            counts["threads_dropped"] += len(thread_ids)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return counts
+
+    # --- compaction -------------------------------------------------------------
+
+    def _vacuum_mode(self) -> int:
+        conn = self._connect()
+        mode = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+        if mode != 0:
+            # "full" already truncates on every commit
+            return mode
+        if os.path.getsize(self.path) > self.convert_max_bytes:
+            # Converting needs one full VACUUM, which holds the write lock for its whole run
+            logger.warning(
+                f"{self.path} is not in incremental auto_vacuum mode and too large to convert online; "
+                "freed pages are reused but not returned to the OS"
+            )
+            return mode
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+        logger.info(f"Converted {self.path} to incremental auto_vacuum")
+        return conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+
+    def _vacuum_step(self) -> int:
+        conn = self._connect()
+        free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if not free:
+            return 0
+        # executescript steps the pragma to completion; execute() frees a single page
+        conn.executescript(f"PRAGMA incremental_vacuum({min(free, self.vacuum_pages)});")
+        return free - conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+    async def _vacuum(self) -> int:
+        if await self._run(self._vacuum_mode) != 2:
+            return 0
+        total = 0
+        while not self._stopping.is_set():
+            freed = await self._run(self._vacuum_step)
+            if not freed:
+                break
+            total += freed
+            await asyncio.sleep(0.05)
+        return total
+
+    def _auto_vacuum(self) -> Optional[int]:
+        if not os.path.exists(self.path):
+            return None
+        return self._connect().execute("PRAGMA auto_vacuum").fetchone()[0]
+
+    def _wal_truncate(self):
+        self._connect().execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+
+    async def stats(self) -> Dict:
+        return {
+            "path": self.path,
+            "keep_last": self.keep_last,
+            "idle_ttl_s": self.idle_ttl_s,
+            "archive": self.archive_path,
+            "disk_bytes": await self._run(self._disk_bytes),
+            "auto_vacuum": AUTO_VACUUM_MODES.get(await self._run(self._auto_vacuum)),
+            "last_run": self.last_run,
+            "totals": dict(self.totals),
+        }
+
+
+checkpoint_retention = CheckpointRetention(
+    settings.CHECKPOINT_DB_PATH,
+    keep_last=settings.CHECKPOINT_KEEP_LAST,
+    idle_ttl_s=settings.CHECKPOINT_IDLE_TTL_S,
+    archive_path=settings.CHECKPOINT_ARCHIVE_PATH if settings.CHECKPOINT_ARCHIVE else None,
+    interval_s=settings.CHECKPOINT_RETENTION_INTERVAL_S,
+    batch_threads=settings.CHECKPOINT_RETENTION_BATCH,
+    vacuum_pages=settings.CHECKPOINT_VACUUM_PAGES,
+    convert_max_bytes=settings.CHECKPOINT_VACUUM_CONVERT_MAX_MB * 2**20,
+)
@@ -0,0 +1,92 @@
+import os
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, List, Optional
+
+from chromadb import Documents, EmbeddingFunction, Embeddings
+from chromadb.utils.embedding_functions import ONNXMiniLM_L6_V2
+
+logger = logging.getLogger(__name__)
+
+# Files Chroma's ONNX MiniLM expects under <model dir>/onnx/
+ONNX_FILES = ("config.json", "model.onnx", "special_tokens_map.json", "tokenizer_config.json", "tokenizer.json", "vocab.txt")
+
+
+class FingerprintEmbedder(EmbeddingFunction[Documents]):
+    """
+    Explicit embedding function for scammer fingerprints: Chroma's ONNX
+    all-MiniLM-L6-v2, loaded from `model_dir` instead of being fetched lazily
+    on the first query, behind a content-hash LRU so a repeated
+    behavioral_profile is never embedded twice.
+    """
+
+    def __init__(self, model_dir: Optional[str], cache_size: int, allow_download: bool = False):
+        self.model_dir = model_dir
+        self.cache_size = cache_size
+        self.allow_download = allow_download
+        self._model: Optional[ONNXMiniLM_L6_V2] = None
+        self._cache: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def load(self):
+        """Load the model and run one embedding. Called from the lifespan warmup."""
+        with self._lock:
+            if self._model is not None:
+                return
+            model = ONNXMiniLM_L6_V2()
+            if self.model_dir:
+                model.DOWNLOAD_PATH = Path(self.model_dir)
+            onnx_dir = os.path.join(model.DOWNLOAD_PATH, model.EXTRACTED_FOLDER_NAME)
+            missing = [f for f in ONNX_FILES if not os.path.exists(os.path.join(onnx_dir, f))]
+            if missing and not self.allow_download:
+                raise RuntimeError(
+                    f"Embedding model not found in {onnx_dir} (missing {', '.join(missing)}); "
+                    "set EMBEDDING_MODEL_DIR or EMBEDDING_ALLOW_DOWNLOAD=true"
+                )
+            model(["warmup"])
+            self._model = model
+        logger.info(f"Fingerprint embedder ready ({onnx_dir})")
+
+    def __call__(self, input: Documents) -> Embeddings:
+        if self._model is None:
+            self.load()
+        keys = [hashlib.sha256(text.encode()).hexdigest() for text in input]
+        out: List[Any] = [None] * len(input)
+        todo = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self._cache.get(key)
+                if vector is not None:
+                    self._cache.move_to_end(key)
+                    out[i] = vector
+                    self.hits += 1
+                else:
+                    todo.append(i)
+                    self.misses += 1
+        if todo:
+            # Duplicates inside one batch are embedded once
+            unique = list(OrderedDict.fromkeys(input[i] for i in todo))
+            vectors = dict(zip(unique, self._model(unique)))
+            with self._lock:
+                for i in todo:
+                    vector = vectors[input[i]]
+                    out[i] = vector
+                    self._cache[keys[i]] = vector
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return out
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "loaded": self._model is not None,
+            "entries": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
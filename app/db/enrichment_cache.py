@@ -0,0 +1,137 @@
+import json
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+from app.db.repository import db, HoneyDB
+
+# (type, canonical_value, source)
+CacheKey = Tuple[str, str, str]
+
+ENRICHMENT_UPSERT = """
+    INSERT INTO enrichments (type, canonical_value, source, status, verdict, fetched_at, expires_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(type, canonical_value, source) DO UPDATE SET
+        status = excluded.status,
+        verdict = excluded.verdict,
+        fetched_at = excluded.fetched_at,
+        expires_at = excluded.expires_at
+"""
+
+
+class EnrichmentCache:
+    """
+    Two-level cache of enrichment verdicts: a per-process LRU in front of the
+    shared `enrichments` table (schema v4), so an identifier is looked up once
+    across turns, sessions and workers until its TTL runs out.
+
+    Verdicts are plain dicts with at least `status`: 'ok' (lookup succeeded),
+    'rejected' (the source answered with a 4xx) or 'error' (network failure or
+    5xx). Errors are cached too, for ENRICHMENT_NEGATIVE_TTL_S only, so a dead
+    upstream is not hammered every turn but is retried soon.
+    """
+
+    def __init__(self, honey_db: HoneyDB, max_entries: int):
+        self.db = honey_db
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[CacheKey, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def ttl_for(source_ttl: float, status: str) -> float:
+        return settings.ENRICHMENT_NEGATIVE_TTL_S if status == "error" else source_ttl
+
+    async def _run(self, fn, *args):
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self.db.executor, fn, *args)
+
+    # --- MEMORY LEVEL ---
+
+    def _remember(self, key: CacheKey, expires_at: float, verdict: Dict[str, Any]):
+        with self._lock:
+            self._entries[key] = (expires_at, verdict)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _recall(self, key: CacheKey, now: float) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    # --- LOOKUP / STORE ---
+
+    async def get_many(self, keys: Iterable[CacheKey]) -> Dict[CacheKey, Dict[str, Any]]:
+        """Unexpired verdicts for whichever of `keys` are cached; one SQLite read for memory misses."""
+        now = time.time()
+        found, missing = {}, []
+        for key in dict.fromkeys(keys):
+            verdict = self._recall(key, now)
+            if verdict is not None:
+                found[key] = verdict
+                self.memory_hits += 1
+            else:
+                missing.append(key)
+        if missing:
+            rows = await self._run(self._get_many_sync, missing, now)
+            for key, (expires_at, verdict) in rows.items():
+                self._remember(key, expires_at, verdict)
+                found[key] = verdict
+            self.db_hits += len(rows)
+            self.misses += len(missing) - len(rows)
+        return found
+
+    def _get_many_sync(self, keys: List[CacheKey], now: float) -> Dict[CacheKey, Tuple[float, Dict]]:
+        rows = {}
+        with self.db.pool.read() as conn:
+            for intel_type, canonical, source in keys:
+                row = conn.execute(
+                    "SELECT verdict, expires_at FROM enrichments "
+                    "WHERE type = ? AND canonical_value = ? AND source = ? AND expires_at > ?",
+                    (intel_type, canonical, source, now)
+                ).fetchone()
+                if row:
+                    rows[(intel_type, canonical, source)] = (row["expires_at"], json.loads(row["verdict"]))
+        return rows
+
+    async def put_many(self, items: List[Tuple[CacheKey, Dict[str, Any], float]]):
+        """Store (key, verdict, ttl) triples in both levels and tag the graph nodes."""
+        if not items:
+            return
+        now = time.time()
+        rows = []
+        for key, verdict, ttl in items:
+            self._remember(key, now + ttl, verdict)
+            rows.append((*key, verdict["status"], json.dumps(verdict, default=str), now, now + ttl))
+        await self._run(self._put_many_sync, rows)
+
+    def _put_many_sync(self, rows: List[Tuple]):
+        with self.db.pool.write() as conn:
+            conn.executemany(ENRICHMENT_UPSERT, rows)
+        for intel_type, canonical, source, status, *_ in rows:
+            self.db.graph.set_enrichment(intel_type, canonical, source, status)
+
+    def stats(self) -> Dict:
+        lookups = self.memory_hits + self.db_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "memory_hits": self.memory_hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.memory_hits + self.db_hits) / lookups, 4) if lookups else 0.0,
+        }
+
+
+enrichment_cache = EnrichmentCache(db, max_entries=settings.ENRICHMENT_CACHE_SIZE)
@@ -0,0 +1,82 @@
+import json
+import time
+import asyncio
+from typing import Any, Dict, List, Optional
+
+from app.db.job_queue import JobQueue
+from app.db.repository import db, HoneyDB
+
+
+class ExportStore:
+    """Rows of the `evidence_exports` table (schema v7): one per bulk export run."""
+
+    def __init__(self, honey_db: HoneyDB):
+        self.db = honey_db
+
+    async def _run(self, fn, *args):
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self.db.executor, fn, *args)
+
+    def _write(self, sql: str, params: tuple) -> int:
+        with self.db.pool.write() as conn:
+            return conn.execute(sql, params).lastrowid
+
+    async def create(self, filters: Dict[str, Any]) -> int:
+        return await self._run(
+            self._write,
+            "INSERT INTO evidence_exports (filters, status, created_at) VALUES (?, 'queued', ?)",
+            (json.dumps(filters, default=str), time.time())
+        )
+
+    async def start(self, export_id: int, total: int):
+        await self._run(
+            self._write, "UPDATE evidence_exports SET status = 'running', total = ?, done = 0 WHERE id = ?",
+            (total, export_id)
+        )
+
+    async def progress(self, export_id: int, done: int):
+        await self._run(self._write, "UPDATE evidence_exports SET done = ? WHERE id = ?", (done, export_id))
+
+    async def finish(self, export_id: int, archive: str, archive_bytes: int):
+        await self._run(
+            self._write,
+            "UPDATE evidence_exports SET status = 'done', done = total, archive = ?, archive_bytes = ?, "
+            "error = NULL, finished_at = ? WHERE id = ?",
+            (archive, archive_bytes, time.time(), export_id)
+        )
+
+    async def fail(self, export_id: int, error: str):
+        await self._run(
+            self._write,
+            "UPDATE evidence_exports SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+            (error[:2000], time.time(), export_id)
+        )
+
+    async def expire(self, archives: List[str]):
+        """Marks finished exports whose archive was pruned as 'expired' (no longer downloadable)."""
+        if archives:
+            await self._run(self._expire_sync, archives)
+
+    def _expire_sync(self, archives: List[str]):
+        with self.db.pool.write() as conn:
+            conn.executemany(
+                "UPDATE evidence_exports SET status = 'expired' WHERE status = 'done' AND archive = ?",
+                [(name,) for name in archives]
+            )
+
+    async def get(self, export_id: int) -> Optional[Dict[str, Any]]:
+        return await self._run(self._get_sync, export_id)
+
+    def _get_sync(self, export_id: int) -> Optional[Dict[str, Any]]:
+        with self.db.pool.read() as conn:
+            row = conn.execute("SELECT * FROM evidence_exports WHERE id = ?", (export_id,)).fetchone()
+        if row is None:
+            return None
+        out = dict(row)
+        out["filters"] = json.loads(out["filters"])
+        return out
+
+
+export_store = ExportStore(db)
+# Long lease: a large export must not be re-claimed by another worker mid-run
+export_queue = JobQueue(db, "evidence_export", max_attempts=2, lease_seconds=3600)
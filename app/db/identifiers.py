@@ -0,0 +1,38 @@
+import re
+
+# Intel types stored in the `identifiers` table
+INTEL_TYPES = ("upi", "bank", "link", "phone")
+
+_NON_DIGIT = re.compile(r"\D")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def canonicalize(intel_type: str, value: str) -> str:
+    """
+    Canonical form used for uniqueness: the same UPI / phone / link written
+    differently by the scammer (case, spacing, +91 prefix) maps to one row.
+    """
+    value = (value or "").strip()
+    if intel_type == "upi":
+        return _WHITESPACE.sub("", value).lower()
+    if intel_type == "phone":
+        digits = _NON_DIGIT.sub("", value)
+        # Indian mobile numbers: drop the 91 / 0 trunk prefix
+        if len(digits) == 12 and digits.startswith("91"):
+            digits = digits[2:]
+        elif len(digits) == 11 and digits.startswith("0"):
+            digits = digits[1:]
+        return digits or value
+    if intel_type == "bank":
+        return _WHITESPACE.sub("", value).replace("-", "").upper()
+    if intel_type == "link":
+        value = _WHITESPACE.sub("", value)
+        scheme, sep, rest = value.partition("://")
+        if sep:
+            host, slash, path = rest.partition("/")
+            value = f"{scheme.lower()}://{host.lower()}{slash}{path}"
+        else:
+            host, slash, path = value.partition("/")
+            value = f"{host.lower()}{slash}{path}"
+        return value.rstrip("/")
+    return value
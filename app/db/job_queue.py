@@ -0,0 +1,212 @@
+import json
+import time
+import uuid
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.core.config import settings
+from app.db.repository import db, HoneyDB
+
+logger = logging.getLogger(__name__)
+
+# Atomic claim: a single UPDATE ... RETURNING holds SQLite's write lock, so two
+# gunicorn workers can never claim the same job. Expired leases (a worker that
+# died mid-job) are claimable again, which gives at-least-once delivery.
+CLAIM_SQL = """
+    UPDATE jobs
+    SET status = 'running', attempts = attempts + 1, locked_by = ?, locked_until = ?
+    WHERE id = (
+        SELECT id FROM jobs
+        WHERE kind = ?
+          AND ((status = 'pending' AND available_at <= ?)
+               OR (status = 'running' AND locked_until < ?))
+        ORDER BY available_at, id
+        LIMIT 1
+    )
+    RETURNING id, session_id, payload, attempts
+"""
+
+# Same predicate, read-only: idle workers probe a reader connection, not the writer
+PROBE_SQL = """
+    SELECT 1 FROM jobs
+    WHERE kind = ?
+      AND ((status = 'pending' AND available_at <= ?)
+           OR (status = 'running' AND locked_until < ?))
+    LIMIT 1
+"""
+
+
+@dataclass
+class Job:
+    id: int
+    kind: str
+    session_id: Optional[str]
+    payload: Dict[str, Any]
+    attempts: int
+    locked_by: Optional[str] = None
+
+
+class JobQueue:
+    """SQLite-backed durable job queue for one job `kind`, sharing HoneyDB's pool."""
+
+    def __init__(self, honey_db: HoneyDB, kind: str, max_attempts: int = None, lease_seconds: float = None):
+        self.db = honey_db
+        self.kind = kind
+        self.max_attempts = max_attempts or settings.JOB_MAX_ATTEMPTS
+        self.lease_seconds = lease_seconds or settings.JOB_LEASE_S
+        self._listeners: List[Callable[[], None]] = []
+
+    def add_listener(self, callback: Callable[[], None]):
+        """Called after every enqueue from this process (lets idle workers skip the poll wait)."""
+        self._listeners.append(callback)
+
+    async def _run(self, fn, *args):
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self.db.executor, fn, *args)
+
+    async def enqueue(self, session_id: Optional[str], payload: Dict[str, Any], delay: float = 0.0) -> int:
+        job_id = await self._run(self._enqueue_sync, session_id, payload, delay)
+        if not delay:
+            for callback in self._listeners:
+                callback()
+        return job_id
+
+    def _enqueue_sync(self, session_id: Optional[str], payload: Dict[str, Any], delay: float) -> int:
+        now = time.time()
+        with self.db.pool.write() as conn:
+            cursor = conn.execute(
+                "INSERT INTO jobs (kind, session_id, payload, available_at, created_at) VALUES (?, ?, ?, ?, ?)",
+                (self.kind, session_id, json.dumps(payload, default=str), now + delay, now)
+            )
+            return cursor.lastrowid
+
+    async def claim(self, worker_id: str) -> Optional[Job]:
+        return await self._run(self._claim_sync, worker_id)
+
+    def _claim_sync(self, worker_id: str) -> Optional[Job]:
+        now = time.time()
+        with self.db.pool.read() as conn:
+            if conn.execute(PROBE_SQL, (self.kind, now, now)).fetchone() is None:
+                return None
+        with self.db.pool.write() as conn:
+            row = conn.execute(
+                CLAIM_SQL, (worker_id, now + self.lease_seconds, self.kind, now, now)
+            ).fetchone()
+        if row is None:
+            return None
+        return Job(row["id"], self.kind, row["session_id"], json.loads(row["payload"]), row["attempts"], worker_id)
+
+    # complete/fail only touch a job this claim still owns: once the lease lapsed
+    # and another worker re-claimed it, they return False (lease lost)
+
+    async def complete(self, job: Job) -> bool:
+        return await self._run(self._complete_sync, job)
+
+    def _complete_sync(self, job: Job) -> bool:
+        with self.db.pool.write() as conn:
+            cursor = conn.execute(
+                "DELETE FROM jobs WHERE id = ? AND status = 'running' AND locked_by = ?", (job.id, job.locked_by)
+            )
+            return cursor.rowcount > 0
+
+    async def fail(self, job: Job, error: str) -> bool:
+        return await self._run(self._fail_sync, job, error)
+
+    def _fail_sync(self, job: Job, error: str) -> bool:
+        with self.db.pool.write() as conn:
+            if job.attempts >= self.max_attempts:
+                cursor = conn.execute(
+                    "UPDATE jobs SET status = 'failed', locked_by = NULL, last_error = ? "
+                    "WHERE id = ? AND status = 'running' AND locked_by = ?",
+                    (error[:2000], job.id, job.locked_by)
+                )
+                if cursor.rowcount:
+                    logger.error(f"Job {self.kind}#{job.id} failed permanently after {job.attempts} attempts: {error}")
+                return cursor.rowcount > 0
+            # Exponential backoff: 2, 4, 8 ... seconds, capped at 5 minutes
+            backoff = min(2 ** job.attempts, 300)
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'pending', locked_by = NULL, available_at = ?, last_error = ? "
+                "WHERE id = ? AND status = 'running' AND locked_by = ?",
+                (time.time() + backoff, error[:2000], job.id, job.locked_by)
+            )
+            return cursor.rowcount > 0
+
+    async def stats(self) -> Dict[str, int]:
+        return await self._run(self._stats_sync)
+
+    def _stats_sync(self) -> Dict[str, int]:
+        with self.db.pool.read() as conn:
+            rows = conn.execute(
+                "SELECT status, COUNT(*) AS n FROM jobs WHERE kind = ? GROUP BY status", (self.kind,)
+            ).fetchall()
+        return {r["status"]: r["n"] for r in rows}
+
+
+class JobWorkerPool:
+    """
+    In-app asyncio workers draining a JobQueue. Started and stopped from the
+    FastAPI lifespan; a job interrupted by shutdown is re-claimed once its lease expires.
+    An idle worker doubles its poll interval up to `max_poll_interval` until a
+    claim succeeds or a local enqueue wakes it.
+    """
+
+    def __init__(self, queue: JobQueue, handler: Callable[[Job], Awaitable[None]], concurrency: int = None,
+                 poll_interval: float = None, max_poll_interval: float = None):
+        self.queue = queue
+        self.handler = handler
+        self.concurrency = concurrency or settings.JOB_WORKERS
+        self.poll_interval = poll_interval or settings.JOB_POLL_INTERVAL_S
+        self.max_poll_interval = max(max_poll_interval or settings.JOB_POLL_MAX_INTERVAL_S, self.poll_interval)
+        self._tasks: List[asyncio.Task] = []
+        self._stopping = asyncio.Event()
+        self._wakeup = asyncio.Event()
+        self._id = uuid.uuid4().hex[:8]
+
+    def start(self):
+        self.queue.add_listener(self.notify)
+        for i in range(self.concurrency):
+            self._tasks.append(asyncio.create_task(self._work(f"{self.queue.kind}-{self._id}-{i}")))
+        logger.info(f"Started {self.concurrency} '{self.queue.kind}' job workers")
+
+    def notify(self):
+        """Wake idle workers right away (e.g. just after an enqueue in this process)."""
+        self._wakeup.set()
+
+    async def stop(self):
+        self._stopping.set()
+        self._wakeup.set()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    async def _work(self, worker_id: str):
+        idle_wait = self.poll_interval
+        while not self._stopping.is_set():
+            try:
+                job = await self.queue.claim(worker_id)
+            except Exception as e:
+                logger.error(f"Job claim failed ({worker_id}): {e}")
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=idle_wait)
+                    idle_wait = self.poll_interval
+                except asyncio.TimeoutError:
+                    idle_wait = min(idle_wait * 2, self.max_poll_interval)
+                self._wakeup.clear()
+                continue
+            idle_wait = self.poll_interval
+            try:
+                await self.handler(job)
+                owned = await self.queue.complete(job)
+            except Exception as e:
+                logger.warning(f"Job {job.kind}#{job.id} attempt {job.attempts} failed: {e}")
+                owned = await self.queue.fail(job, str(e))
+            if not owned:
+                logger.warning(f"Job {job.kind}#{job.id} attempt {job.attempts}: lease lost, "
+                               f"another worker re-claimed it; outcome not recorded")
+
+
+forensics_queue = JobQueue(db, "forensics")
@@ -0,0 +1,308 @@
+import sqlite3
+import logging
+from typing import Callable, List, Tuple
+
+from app.db.identifiers import canonicalize
+
+logger = logging.getLogger(__name__)
+
+# Schema versions are tracked in `PRAGMA user_version`. Databases created before
+# versioning report 0 and run every step; v1 is idempotent for that reason.
+
+
+def _v1_baseline(conn: sqlite3.Connection):
+    """The original tables, including the old ALTER TABLE column migrations."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT,
+            role TEXT,
+            content TEXT,
+            timestamp DATETIME
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS sessions (
+            session_id TEXT PRIMARY KEY,
+            is_scam INTEGER DEFAULT 0,
+            human_intervention INTEGER DEFAULT 0,
+            manual_response TEXT,
+            created_at DATETIME
+        )
+    """)
+    columns = [info[1] for info in conn.execute("PRAGMA table_info(sessions)").fetchall()]
+    if "human_intervention" not in columns:
+        conn.execute("ALTER TABLE sessions ADD COLUMN human_intervention INTEGER DEFAULT 0")
+    if "manual_response" not in columns:
+        conn.execute("ALTER TABLE sessions ADD COLUMN manual_response TEXT")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS extracted_intel (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT,
+            type TEXT, -- 'upi', 'bank', 'link', 'phone'
+            value TEXT,
+            timestamp DATETIME
+        )
+    """)
+
+
+def _v2_normalized_identifiers(conn: sqlite3.Connection):
+    """
+    One row per unique (type, canonical_value) plus a session link table, so a
+    repeat sighting is an upsert instead of a new row. `extracted_intel` is
+    backfilled and replaced by a view with the same columns.
+    """
+    conn.execute("""
+        CREATE TABLE identifiers (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            type TEXT NOT NULL,
+            canonical_value TEXT NOT NULL,
+            display_value TEXT NOT NULL,
+            first_seen DATETIME,
+            last_seen DATETIME,
+            sighting_count INTEGER NOT NULL DEFAULT 0,
+            UNIQUE (type, canonical_value)
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE session_identifiers (
+            session_id TEXT NOT NULL,
+            identifier_id INTEGER NOT NULL REFERENCES identifiers(id),
+            first_seen DATETIME,
+            last_seen DATETIME,
+            sighting_count INTEGER NOT NULL DEFAULT 1,
+            PRIMARY KEY (session_id, identifier_id)
+        ) WITHOUT ROWID
+    """)
+    # Reverse lookup: which sessions share an identifier (syndicate links)
+    conn.execute("CREATE INDEX idx_session_identifiers_identifier ON session_identifiers (identifier_id, session_id)")
+    conn.execute("CREATE INDEX idx_session_identifiers_last_seen ON session_identifiers (last_seen)")
+    # Top-N per type for get_stats without a scan
+    conn.execute("CREATE INDEX idx_identifiers_type_sightings ON identifiers (type, sighting_count DESC)")
+    # Covers COUNT(*) per session and the ordered range scan in get_context
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_messages_session_ts ON messages (session_id, timestamp)")
+
+    rows = conn.execute(
+        "SELECT session_id, type, value, timestamp FROM extracted_intel ORDER BY id"
+    ).fetchall()
+    for session_id, intel_type, value, ts in rows:
+        if not value:
+            continue
+        upsert_sighting(conn, session_id, intel_type, value, ts)
+    logger.info(f"Migrated {len(rows)} extracted_intel rows into identifiers")
+
+    conn.execute("DROP TABLE extracted_intel")
+    conn.execute("""
+        CREATE VIEW extracted_intel AS
+        SELECT i.id AS id, si.session_id, i.type, i.display_value AS value, si.last_seen AS timestamp
+        FROM session_identifiers si JOIN identifiers i ON i.id = si.identifier_id
+    """)
+
+
+def _v3_job_queue(conn: sqlite3.Connection):
+    """Durable background jobs (see app/db/job_queue.py). Times are unix epoch seconds."""
+    conn.execute("""
+        CREATE TABLE jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            session_id TEXT,
+            payload TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending', -- 'pending', 'running', 'failed'
+            attempts INTEGER NOT NULL DEFAULT 0,
+            available_at REAL NOT NULL,
+            locked_by TEXT,
+            locked_until REAL,
+            last_error TEXT,
+            created_at REAL NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX idx_jobs_claim ON jobs (kind, status, available_at)")
+
+
+def _v4_enrichment_cache(conn: sqlite3.Connection):
+    """
+    Enrichment verdicts per (identifier, source), shared by every worker. Failed
+    lookups are stored too (status 'error') with a short expiry. Epoch seconds.
+    """
+    conn.execute("""
+        CREATE TABLE enrichments (
+            type TEXT NOT NULL,
+            canonical_value TEXT NOT NULL,
+            source TEXT NOT NULL,
+            status TEXT NOT NULL, -- 'ok', 'rejected', 'error'
+            verdict TEXT NOT NULL,
+            fetched_at REAL NOT NULL,
+            expires_at REAL NOT NULL,
+            PRIMARY KEY (type, canonical_value, source)
+        ) WITHOUT ROWID
+    """)
+    # Incremental pickup of other workers' verdicts by the syndicate graph
+    conn.execute("CREATE INDEX idx_enrichments_fetched_at ON enrichments (fetched_at)")
+
+
+def _v5_blacklist_ledger(conn: sqlite3.Connection):
+    """
+    What has been reported to which takedown destination, once per identifier
+    across all sessions (see app/db/blacklist_ledger.py). Epoch seconds.
+    """
+    conn.execute("""
+        CREATE TABLE blacklist_submissions (
+            destination TEXT NOT NULL,
+            type TEXT NOT NULL,
+            canonical_value TEXT NOT NULL,
+            display_value TEXT NOT NULL,
+            fingerprint TEXT NOT NULL, -- hash of the submitted item; a change triggers a resubmission
+            status TEXT NOT NULL, -- 'inflight', 'submitted', 'failed'
+            attempts INTEGER NOT NULL DEFAULT 0,
+            first_session_id TEXT,
+            last_session_id TEXT,
+            retry_at REAL NOT NULL DEFAULT 0, -- lease expiry while inflight, backoff when failed
+            submitted_at REAL,
+            result TEXT,
+            PRIMARY KEY (destination, type, canonical_value)
+        ) WITHOUT ROWID
+    """)
+
+
+def _v6_callback_outbox(conn: sqlite3.Connection):
+    """
+    One pending GUVI result callback per session (see app/db/callback_outbox.py).
+    `version` bumps on every staged change so a send that raced a newer turn
+    is followed by another. Epoch seconds.
+    """
+    conn.execute("""
+        CREATE TABLE guvi_outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT NOT NULL UNIQUE,
+            payload TEXT NOT NULL,
+            change_key TEXT NOT NULL, -- hash of intel + turn milestone
+            version INTEGER NOT NULL DEFAULT 1,
+            status TEXT NOT NULL, -- 'pending', 'running', 'sent', 'failed'
+            attempts INTEGER NOT NULL DEFAULT 0,
+            due_at REAL NOT NULL,
+            locked_until REAL,
+            last_error TEXT,
+            updated_at REAL NOT NULL,
+            sent_at REAL
+        )
+    """)
+    conn.execute("CREATE INDEX idx_guvi_outbox_due ON guvi_outbox (status, due_at)")
+
+
+def _v7_evidence_exports(conn: sqlite3.Connection):
+    """Bulk evidence export runs and their progress (see app/engine/evidence_export.py)."""
+    conn.execute("""
+        CREATE TABLE evidence_exports (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            filters TEXT NOT NULL,
+            status TEXT NOT NULL, -- 'queued', 'running', 'done', 'failed'
+            total INTEGER NOT NULL DEFAULT 0,
+            done INTEGER NOT NULL DEFAULT 0,
+            archive TEXT,
+            archive_bytes INTEGER,
+            error TEXT,
+            created_at REAL NOT NULL,
+            finished_at REAL
+        )
+    """)
+    # Time-range filter of the export session query
+    conn.execute("CREATE INDEX idx_sessions_scam_created ON sessions (is_scam, created_at)")
+
+
+
+def _v8_session_leases(conn: sqlite3.Connection):
+    """Cross-worker per-session turn leases (see app/db/session_lock.py)."""
+    conn.execute("""
+        CREATE TABLE session_leases (
+            session_id TEXT PRIMARY KEY,
+            owner TEXT NOT NULL,
+            expires_at REAL NOT NULL
+        )
+    """)
+
+
+def _v9_intel_page_first_seen(conn: sqlite3.Connection):
+    """Keyset order of the forensics pages: first_seen never moves on a repeat sighting, last_seen does."""
+    conn.execute("CREATE INDEX idx_session_identifiers_first_seen ON session_identifiers (first_seen)")
+
+
+def _v10_drop_session_leases(conn: sqlite3.Connection):
+    """Cross-worker turn locking moved to byte-range file locks; no per-turn writes."""
+    conn.execute("DROP TABLE IF EXISTS session_leases")
+
+
+MIGRATIONS: List[Tuple[int, Callable[[sqlite3.Connection], None]]] = [
+    (1, _v1_baseline),
+    (2, _v2_normalized_identifiers),
+    (3, _v3_job_queue),
+    (4, _v4_enrichment_cache),
+    (5, _v5_blacklist_ledger),
+    (6, _v6_callback_outbox),
+    (7, _v7_evidence_exports),
+    (8, _v8_session_leases),
+    (9, _v9_intel_page_first_seen),
+    (10, _v10_drop_session_leases),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+IDENTIFIER_UPSERT = """
+    INSERT INTO identifiers (type, canonical_value, display_value, first_seen, last_seen, sighting_count)
+    VALUES (?, ?, ?, ?, ?, 1)
+    ON CONFLICT(type, canonical_value) DO UPDATE SET
+        first_seen = MIN(first_seen, excluded.first_seen),
+        last_seen = MAX(last_seen, excluded.last_seen),
+        sighting_count = sighting_count + 1
+"""
+
+SESSION_IDENTIFIER_UPSERT = """
+    INSERT INTO session_identifiers (session_id, identifier_id, first_seen, last_seen)
+    SELECT ?, id, ?, ? FROM identifiers WHERE type = ? AND canonical_value = ?
+    ON CONFLICT(session_id, identifier_id) DO UPDATE SET
+        first_seen = MIN(first_seen, excluded.first_seen),
+        last_seen = MAX(last_seen, excluded.last_seen),
+        sighting_count = sighting_count + 1
+"""
+
+
+def sighting_rows(session_id: str, intel_type: str, value: str, ts) -> Tuple[Tuple, Tuple]:
+    """Parameter tuples for IDENTIFIER_UPSERT and SESSION_IDENTIFIER_UPSERT."""
+    canonical = canonicalize(intel_type, value)
+    return (
+        (intel_type, canonical, value.strip(), ts, ts),
+        (session_id, ts, ts, intel_type, canonical),
+    )
+
+
+def upsert_sighting(conn: sqlite3.Connection, session_id: str, intel_type: str, value: str, ts):
+    ident_row, link_row = sighting_rows(session_id, intel_type, value, ts)
+    conn.execute(IDENTIFIER_UPSERT, ident_row)
+    conn.execute(SESSION_IDENTIFIER_UPSERT, link_row)
+
+
+def migrate(conn: sqlite3.Connection):
+    """
+    Apply every migration newer than the database's user_version, in order.
+    Each step (DDL included) runs in its own transaction with its version bump.
+    user_version is re-read once the write lock is held, so workers booting
+    together skip steps another worker has just applied.
+    """
+    if conn.in_transaction:
+        conn.commit()
+    current = conn.execute("PRAGMA user_version").fetchone()[0]
+    for version, step in MIGRATIONS:
+        if version <= current:
+            continue
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            current = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version <= current:
+                conn.rollback()
+                continue
+            logger.info(f"Applying schema migration v{version}: {step.__name__}")
+            step(conn)
+            conn.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
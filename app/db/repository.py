@@ -1,98 +1,203 @@
-import sqlite3
 import json
+import time
+import base64
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
-from datetime import datetime
-from typing import List, Dict
+from datetime import datetime, timedelta
+from typing import List, Dict, Tuple
 from app.core.config import settings
+from app.db.pool import ConnectionPool
+from app.db.write_buffer import WriteBehindBuffer
+from app.db.session_cache import SessionCache, SessionEntry, SessionVersions
+from app.db.syndicate_graph import SyndicateGraph, identifier_node_id
+from app.db.identifiers import canonicalize
+from app.db.migrations import (
+    migrate, sighting_rows, upsert_sighting,
+    IDENTIFIER_UPSERT, SESSION_IDENTIFIER_UPSERT
+)
+
+# Upsert so a scam flag never wipes the intervention columns of an existing row
+SCAM_FLAG_UPSERT = """
+    INSERT INTO sessions (session_id, is_scam, created_at) VALUES (?, ?, ?)
+    ON CONFLICT(session_id) DO UPDATE SET is_scam = excluded.is_scam
+"""
+
+SYNDICATE_LINKS_QUERY = """
+    SELECT si.session_id, i.type, i.canonical_value, i.display_value, si.last_seen
+    FROM session_identifiers si
+    JOIN identifiers i ON i.id = si.identifier_id
+"""
+
+# CROSS JOIN pins si as the outer loop: idx_session_identifiers_first_seen (which
+# carries the (session_id, identifier_id) key) then yields rows in ORDER BY order
+# and `i.type` is a residual filter, instead of sorting every row of that type.
+# Keyed on first_seen, not last_seen: a repeat sighting bumps last_seen, which
+# would move the row across a cursor mid-walk (skipped or returned twice)
+INTEL_PAGE_QUERY = """
+    SELECT si.identifier_id AS id, si.session_id, i.type, i.display_value AS value,
+           si.last_seen AS timestamp, si.first_seen, si.sighting_count
+    FROM session_identifiers si
+    CROSS JOIN identifiers i ON i.id = si.identifier_id
+    WHERE 1 = 1
+"""
+
+def encode_cursor(key: list) -> str:
+    return base64.urlsafe_b64encode(json.dumps(key, default=str).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> list:
+    """The (first_seen, session_id, identifier_id) key of a page; ValueError if malformed."""
+    key = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    if (not isinstance(key, list) or len(key) != 3
+            or not all(isinstance(v, (str, int, float)) and not isinstance(v, bool) for v in key)):
+        raise ValueError("malformed cursor")
+    return key
+
+ENRICHMENT_STATUS_QUERY = "SELECT type, canonical_value, source, status FROM enrichments"
 
 class HoneyDB:
     def __init__(self):
         self.db_path = settings.DATABASE_PATH
-        self.executor = ThreadPoolExecutor(max_workers=5)
+        # One thread per pooled connection (readers + the writer)
+        self.executor = ThreadPoolExecutor(max_workers=settings.DB_READER_POOL_SIZE + 1)
+        self.pool = ConnectionPool(self.db_path)
         self._init_db()
+        self.graph = SyndicateGraph()
+        self._graph_checked_at = 0.0
+        self._graph_synced_at = datetime.now()
+        self.writes = WriteBehindBuffer(
+            self._write_batch_sync,
+            self.executor,
+            max_batch=settings.WRITE_BEHIND_MAX_BATCH,
+            flush_interval=settings.WRITE_BEHIND_FLUSH_MS / 1000,
+        )
+        # Hot sessions: per-turn reads served from memory, invalidated across workers
+        self.sessions = SessionCache(
+            SessionVersions(self.db_path + ".versions", settings.SESSION_VERSION_SLOTS),
+            max_entries=settings.SESSION_CACHE_SIZE,
+            idle_s=settings.SESSION_CACHE_IDLE_S,
+            capacity=settings.SESSION_CACHE_MESSAGES,
+        )
 
-    def _init_db(self):
-        import os
-        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
-        
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS messages (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    session_id TEXT,
-                    role TEXT,
-                    content TEXT,
-                    timestamp DATETIME
-                )
-            """)
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS sessions (
-                    session_id TEXT PRIMARY KEY,
-                    is_scam INTEGER DEFAULT 0,
-                    human_intervention INTEGER DEFAULT 0,
-                    manual_response TEXT,
-                    created_at DATETIME
-                )
-            """)
-            
-            # Migration: Add columns if they don't exist
-            cursor = conn.execute("PRAGMA table_info(sessions)")
-            columns = [info[1] for info in cursor.fetchall()]
-            if "human_intervention" not in columns:
-                conn.execute("ALTER TABLE sessions ADD COLUMN human_intervention INTEGER DEFAULT 0")
-            if "manual_response" not in columns:
-                conn.execute("ALTER TABLE sessions ADD COLUMN manual_response TEXT")
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS extracted_intel (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    session_id TEXT,
-                    type TEXT, -- 'upi', 'bank', 'link', 'phone'
-                    value TEXT,
-                    timestamp DATETIME
+    async def drain(self):
+        """Flush queued writes. Called from the FastAPI lifespan on shutdown."""
+        await self.writes.drain()
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self.pool.close()
+        self.sessions.versions.close()
+
+    # --- WRITE-BEHIND QUEUE ---
+    # Fire-and-forget variants of add_message / save_intel / set_scam_flag.
+    # Rows are timestamped at enqueue time so ordering survives batching.
+
+    def queue_message(self, session_id: str, role: str, content: str):
+        self.writes.put("messages", session_id, (session_id, role, content, datetime.now()))
+        self.sessions.append_message(session_id, role, content)
+
+    def queue_intel(self, session_id: str, intel_type: str, value: str):
+        self.writes.put("intel", session_id, (session_id, intel_type, value, datetime.now()))
+
+    def queue_scam_flag(self, session_id: str, is_scam: bool):
+        self.writes.put("scam_flags", session_id, (session_id, 1 if is_scam else 0, datetime.now()))
+        self.sessions.set_scam(session_id, is_scam)
+
+    def _write_batch_sync(self, batch: Dict[str, List[Tuple]]):
+        with self.pool.write() as conn:
+            if batch["messages"]:
+                conn.executemany(
+                    "INSERT INTO messages (session_id, role, content, timestamp) VALUES (?, ?, ?, ?)",
+                    batch["messages"]
                 )
-            """)
+            if batch["intel"]:
+                rows = [sighting_rows(*row) for row in batch["intel"]]
+                conn.executemany(IDENTIFIER_UPSERT, [r[0] for r in rows])
+                conn.executemany(SESSION_IDENTIFIER_UPSERT, [r[1] for r in rows])
+            if batch["scam_flags"]:
+                conn.executemany(SCAM_FLAG_UPSERT, batch["scam_flags"])
+        self.sessions.committed([row[0] for row in batch["messages"]] + [row[0] for row in batch["scam_flags"]])
+        # Committed: mirror new links into the resident graph
+        for session_id, intel_type, value, ts in batch["intel"]:
+            self.graph.add_link(session_id, intel_type, value, ts)
+
+    def _init_db(self):
+        with self.pool.write() as conn:
+            migrate(conn)
 
     async def add_message(self, session_id: str, role: str, content: str):
         loop = asyncio.get_event_loop()
         await loop.run_in_executor(self.executor, self._add_message_sync, session_id, role, content)
 
     def _add_message_sync(self, session_id: str, role: str, content: str):
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.write() as conn:
             conn.execute(
                 "INSERT INTO messages (session_id, role, content, timestamp) VALUES (?, ?, ?, ?)",
                 (session_id, role, content, datetime.now())
             )
+        self.sessions.append_message(session_id, role, content)
+        self.sessions.committed([session_id])
 
     async def set_scam_flag(self, session_id: str, is_scam: bool):
         loop = asyncio.get_event_loop()
         await loop.run_in_executor(self.executor, self._set_scam_flag_sync, session_id, is_scam)
 
     def _set_scam_flag_sync(self, session_id: str, is_scam: bool):
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute(
-                "INSERT OR REPLACE INTO sessions (session_id, is_scam, created_at) VALUES (?, ?, ?)",
-                (session_id, 1 if is_scam else 0, datetime.now())
-            )
+        with self.pool.write() as conn:
+            conn.execute(SCAM_FLAG_UPSERT, (session_id, 1 if is_scam else 0, datetime.now()))
+        self.sessions.set_scam(session_id, is_scam)
+        self.sessions.committed([session_id])
 
     async def save_intel(self, session_id: str, intel_type: str, value: str):
         loop = asyncio.get_event_loop()
         await loop.run_in_executor(self.executor, self._save_intel_sync, session_id, intel_type, value)
 
     def _save_intel_sync(self, session_id: str, intel_type: str, value: str):
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute(
-                "INSERT INTO extracted_intel (session_id, type, value, timestamp) VALUES (?, ?, ?, ?)",
-                (session_id, intel_type, value, datetime.now())
-            )
+        ts = datetime.now()
+        with self.pool.write() as conn:
+            upsert_sighting(conn, session_id, intel_type, value, ts)
+        self.graph.add_link(session_id, intel_type, value, ts)
+
+    # --- HOT SESSION READS ---
+    # Served from self.sessions; a miss loads everything a turn needs in one executor hop.
+
+    async def _session(self, session_id: str) -> SessionEntry:
+        entry = self.sessions.get(session_id)
+        if entry is None:
+            await self.writes.barrier(session_id)
+            loop = asyncio.get_event_loop()
+            entry = await loop.run_in_executor(self.executor, self._load_session_sync, session_id)
+            self.sessions.put(session_id, entry)
+        return entry
+
+    def _load_session_sync(self, session_id: str) -> SessionEntry:
+        # Version first: a commit landing during the reads below leaves the entry stale, not wrong
+        version = self.sessions.versions.read(session_id)
+        with self.pool.read() as conn:
+            count = conn.execute("SELECT COUNT(*) FROM messages WHERE session_id = ?", (session_id,)).fetchone()[0]
+            session = conn.execute(
+                "SELECT is_scam, human_intervention, manual_response FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        return SessionEntry(
+            messages=self._get_context_sync(session_id, self.sessions.capacity),
+            message_count=count,
+            is_scam=bool(session["is_scam"]) if session else False,
+            intervention={
+                "human_intervention": session["human_intervention"] if session else 0,
+                "manual_response": session["manual_response"] if session else None,
+            },
+            version=version,
+        )
 
     async def get_context(self, session_id: str, limit: int = 10) -> List[Dict]:
+        if limit <= self.sessions.capacity:
+            entry = await self._session(session_id)
+            return [dict(m) for m in entry.messages[-limit:]]
+        await self.writes.barrier(session_id)
         loop = asyncio.get_event_loop()
         return await loop.run_in_executor(self.executor, self._get_context_sync, session_id, limit)
 
     def _get_context_sync(self, session_id: str, limit: int = 10) -> List[Dict]:
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        with self.pool.read() as conn:
             cursor = conn.execute(
                 "SELECT role, content FROM messages WHERE session_id = ? ORDER BY timestamp DESC LIMIT ?",
                 (session_id, limit)
@@ -102,155 +207,251 @@ class HoneyDB:
 
     async def get_syndicate_links(self):
         """
-        Retrieves intelligence links and performs basic graph clustering
-        to identify potential scam syndicates.
+        Serves the resident syndicate graph (union-find clustering).
+        Only rows written by other workers since the last sync are read.
         """
         loop = asyncio.get_event_loop()
         return await loop.run_in_executor(self.executor, self._get_syndicate_links_sync)
 
     def _get_syndicate_links_sync(self):
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            # 1. Fetch all intelligence records
-            cursor = conn.execute("""
-                SELECT session_id, type, value 
-                FROM extracted_intel
-            """)
-            records = cursor.fetchall()
-            
-            nodes = []
-            edges = []
-            seen_nodes = {}
-            node_degrees = {}
-            
-            # 2. Perform Link Analysis
-            for rec in records:
-                session_id = rec["session_id"]
-                intel_type = rec["type"]
-                value = rec["value"]
-                ident_id = f"{intel_type}_{value}"
-                
-                # Track degree for visualization
-                node_degrees[session_id] = node_degrees.get(session_id, 0) + 1
-                node_degrees[ident_id] = node_degrees.get(ident_id, 0) + 1
-                
-                # Add Session Node
-                if session_id not in seen_nodes:
-                    seen_nodes[session_id] = True
-                    nodes.append({
-                        "id": session_id,
-                        "type": "session",
-                        "label": f"Session {session_id[:8]}"
-                    })
-                
-                # Link Identifiers
-                if ident_id not in seen_nodes:
-                    seen_nodes[ident_id] = True
-                    nodes.append({
-                        "id": ident_id, 
-                        "type": intel_type, 
-                        "label": value,
-                        "metadata": {
-                            "risk_score": 0.85 if intel_type in ['upi', 'bank'] else 0.6,
-                            "last_seen": datetime.now().isoformat()
-                        }
-                    })
-                
-                edges.append({
-                    "source": session_id, 
-                    "target": ident_id, 
-                    "label": f"uses_{intel_type}",
-                    "weight": 2.0 if intel_type == 'upi' else 1.0 
-                })
-
-            # Add degrees to nodes
-            for node in nodes:
-                node["degree"] = node_degrees.get(node["id"], 0)
+        return self._fresh_graph().snapshot()
 
-            return {
-                "nodes": nodes,
-                "links": edges,
-                "metadata": {
-                    "total_records": len(records),
-                    "analysis_engine": "Forensic Link Analysis v2.1",
-                    "clustering_algorithm": "Adjacency-Based Syndicate Detection",
-                    "hubs_detected": len([d for d in node_degrees.values() if d > 2])
-                }
-            }
+    def _fresh_graph(self) -> SyndicateGraph:
+        if not self.graph.loaded:
+            self._load_syndicate_graph_sync()
+        elif time.monotonic() - self._graph_checked_at > settings.SYNDICATE_GRAPH_REFRESH_S:
+            self._sync_syndicate_graph()
+        return self.graph
 
-    async def get_all_intel(self) -> List[Dict]:
+    async def get_syndicate_neighborhood(self, node_id: str, hops: int = 2, max_nodes: int = 500):
         loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(self.executor, self._get_all_intel_sync)
+        return await loop.run_in_executor(
+            self.executor, lambda: self._fresh_graph().neighborhood(node_id, hops, max_nodes)
+        )
 
-    def _get_all_intel_sync(self) -> List[Dict]:
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.execute("SELECT * FROM extracted_intel ORDER BY timestamp DESC")
-            return [dict(r) for r in cursor.fetchall()]
+    async def get_syndicate_components(self, limit: int = 10, max_members: int = 50):
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            self.executor, lambda: self._fresh_graph().top_components(limit, max_members)
+        )
+
+    async def list_syndicate_nodes(self, cursor: int = 0, limit: int = 100):
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self.executor, lambda: self._fresh_graph().list_nodes(cursor, limit))
+
+    async def list_syndicate_edges(self, cursor: int = 0, limit: int = 100):
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self.executor, lambda: self._fresh_graph().list_edges(cursor, limit))
+
+    async def load_syndicate_graph(self):
+        """Builds the in-memory syndicate graph once. Called from the FastAPI lifespan."""
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(self.executor, self._load_syndicate_graph_sync)
+
+    def _load_syndicate_graph_sync(self):
+        self._graph_checked_at = time.monotonic()
+        self._graph_synced_at = datetime.now()
+        with self.pool.read() as conn:
+            self.graph.load(
+                conn.execute(SYNDICATE_LINKS_QUERY).fetchall(),
+                conn.execute(ENRICHMENT_STATUS_QUERY).fetchall(),
+            )
+
+    def _sync_syndicate_graph(self):
+        # Re-read a small overlap window: rows are timestamped at enqueue time,
+        # so another worker may commit a row slightly older than our last sync.
+        since = self._graph_synced_at - timedelta(seconds=settings.SYNDICATE_GRAPH_REFRESH_S)
+        self._graph_checked_at = time.monotonic()
+        self._graph_synced_at = datetime.now()
+        with self.pool.read() as conn:
+            for row in conn.execute(SYNDICATE_LINKS_QUERY + " WHERE si.last_seen >= ?", (since,)):
+                self.graph.add_link(row[0], row[1], row[3], row[4], canonical=row[2])
+            for row in conn.execute(ENRICHMENT_STATUS_QUERY + " WHERE fetched_at >= ?", (since.timestamp(),)):
+                self.graph.set_enrichment(*row)
+
+    async def get_intel_page(self, cursor: str = None, limit: int = 500, intel_type: str = None,
+                             session_id: str = None, since=None, until=None) -> Dict:
+        """
+        One keyset page of session/identifier sightings, most recently first
+        seen first; `since`/`until` bound first_seen too. `cursor` is the
+        opaque `next_cursor` of the previous page, so every page is an index
+        range scan and never an OFFSET walk, and a walk sees each row once.
+        """
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            self.executor, self._get_intel_page_sync, cursor, limit, intel_type, session_id, since, until
+        )
+
+    def _get_intel_page_sync(self, cursor, limit, intel_type, session_id, since, until) -> Dict:
+        query = INTEL_PAGE_QUERY
+        params = []
+        if intel_type:
+            query += " AND i.type = ?"
+            params.append(intel_type)
+        if session_id:
+            query += " AND si.session_id = ?"
+            params.append(session_id)
+        if since is not None:
+            query += " AND si.first_seen >= ?"
+            params.append(since)
+        if until is not None:
+            query += " AND si.first_seen < ?"
+            params.append(until)
+        if cursor:
+            query += " AND (si.first_seen, si.session_id, si.identifier_id) < (?, ?, ?)"
+            params += decode_cursor(cursor)
+        query += " ORDER BY si.first_seen DESC, si.session_id DESC, si.identifier_id DESC LIMIT ?"
+        params.append(limit)
+        with self.pool.read() as conn:
+            items = [dict(r) for r in conn.execute(query, params)]
+        next_cursor = None
+        if len(items) == limit:
+            last = items[-1]
+            next_cursor = encode_cursor([last["first_seen"], last["session_id"], last["id"]])
+        return {"items": items, "next_cursor": next_cursor}
+
+    async def iter_intel(self, page_size: int = 1000, **filters):
+        """Every matching row, fetched page by page: memory stays at one page."""
+        cursor = None
+        while True:
+            page = await self.get_intel_page(cursor, page_size, **filters)
+            for item in page["items"]:
+                yield item
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return
+
+    async def find_export_sessions(self, since=None, until=None, intel_type: str = None, value: str = None,
+                                   component_node_id: str = None, limit: int = 1000) -> List[str]:
+        """Scam sessions matching every given filter, oldest first (bulk evidence export)."""
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            self.executor, self._find_export_sessions_sync, since, until, intel_type, value, component_node_id, limit
+        )
+
+    def _find_export_sessions_sync(self, since, until, intel_type, value, component_node_id, limit) -> List[str]:
+        query = "SELECT session_id FROM sessions WHERE is_scam = 1"
+        params = []
+        if since is not None:
+            query += " AND created_at >= ?"
+            params.append(since)
+        if until is not None:
+            query += " AND created_at < ?"
+            params.append(until)
+        if intel_type and value:
+            query += """ AND session_id IN (
+                SELECT si.session_id FROM session_identifiers si
+                JOIN identifiers i ON i.id = si.identifier_id
+                WHERE i.type = ? AND i.canonical_value = ?)"""
+            params += [intel_type, canonicalize(intel_type, value)]
+        query += " ORDER BY created_at"
+        members = None
+        if component_node_id:
+            members = set(self._fresh_graph().component_members(component_node_id, "session"))
+        with self.pool.read() as conn:
+            out = []
+            for row in conn.execute(query, params):
+                if members is None or row[0] in members:
+                    out.append(row[0])
+                    if len(out) >= limit:
+                        break
+            return out
+
+    async def get_session_evidence(self, session_ids: List[str]) -> Dict[str, Dict]:
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self.executor, self._get_session_evidence_sync, session_ids)
+
+    def _get_session_evidence_sync(self, session_ids: List[str]) -> Dict[str, Dict]:
+        """Per session: identifiers by type (with sighting stats), enrichment statuses and message count."""
+        evidence = {sid: {"intel": {}, "verdicts": {}, "messages": 0, "created_at": None} for sid in session_ids}
+        with self.pool.read() as conn:
+            for i in range(0, len(session_ids), 500):
+                chunk = session_ids[i:i + 500]
+                marks = ",".join("?" * len(chunk))
+                for r in conn.execute(f"""
+                    SELECT si.session_id, i.type, i.canonical_value, i.display_value,
+                           si.first_seen, si.last_seen, si.sighting_count,
+                           e.source, e.status
+                    FROM session_identifiers si
+                    JOIN identifiers i ON i.id = si.identifier_id
+                    LEFT JOIN enrichments e ON e.type = i.type AND e.canonical_value = i.canonical_value
+                    WHERE si.session_id IN ({marks})
+                    ORDER BY si.first_seen, i.id
+                """, chunk):
+                    ev = evidence[r["session_id"]]
+                    items = ev["intel"].setdefault(r["type"], [])
+                    if not items or items[-1]["canonical_value"] != r["canonical_value"]:
+                        items.append({
+                            "value": r["display_value"],
+                            "canonical_value": r["canonical_value"],
+                            "first_seen": r["first_seen"],
+                            "last_seen": r["last_seen"],
+                            "sighting_count": r["sighting_count"],
+                        })
+                    if r["source"]:
+                        node_id = identifier_node_id(r["type"], r["canonical_value"])
+                        ev["verdicts"].setdefault(node_id, {})[r["source"]] = {"status": r["status"]}
+                for r in conn.execute(f"""
+                    SELECT s.session_id, s.created_at,
+                           (SELECT COUNT(*) FROM messages m WHERE m.session_id = s.session_id) AS messages
+                    FROM sessions s WHERE s.session_id IN ({marks})
+                """, chunk):
+                    evidence[r["session_id"]]["created_at"] = r["created_at"]
+                    evidence[r["session_id"]]["messages"] = r["messages"]
+        return evidence
 
     async def set_human_intervention(self, session_id: str, enabled: bool, manual_response: str = None):
         loop = asyncio.get_event_loop()
         await loop.run_in_executor(self.executor, self._set_human_intervention_sync, session_id, enabled, manual_response)
 
     def _set_human_intervention_sync(self, session_id: str, enabled: bool, manual_response: str = None):
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.write() as conn:
             conn.execute(
                 "UPDATE sessions SET human_intervention = ?, manual_response = ? WHERE session_id = ?",
                 (1 if enabled else 0, manual_response, session_id)
             )
+        self.sessions.invalidate(session_id)
+        self.sessions.committed([session_id])
 
     async def get_intervention_state(self, session_id: str) -> Dict:
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(self.executor, self._get_intervention_state_sync, session_id)
-
-    def _get_intervention_state_sync(self, session_id: str) -> Dict:
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            res = conn.execute("SELECT human_intervention, manual_response FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
-            if res:
-                return dict(res)
-            return {"human_intervention": 0, "manual_response": None}
+        return dict((await self._session(session_id)).intervention)
 
     async def get_stats(self):
         loop = asyncio.get_event_loop()
         return await loop.run_in_executor(self.executor, self._get_stats_sync)
 
     def _get_stats_sync(self):
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        with self.pool.read() as conn:
             total_sessions = conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
             scams_detected = conn.execute("SELECT COUNT(*) FROM sessions WHERE is_scam = 1").fetchone()[0]
+            # Served from idx_identifiers_type_sightings, no table scan
             top_upi = conn.execute("""
-                SELECT value, COUNT(*) as count 
-                FROM extracted_intel 
-                WHERE type = 'upi' 
-                GROUP BY value 
-                ORDER BY count DESC 
+                SELECT display_value
+                FROM identifiers
+                WHERE type = 'upi'
+                ORDER BY sighting_count DESC
                 LIMIT 5
             """).fetchall()
             return {
                 "total_sessions": total_sessions,
                 "scams_detected": scams_detected,
-                "top_upi_ids": [r["value"] for r in top_upi]
+                "top_upi_ids": [r["display_value"] for r in top_upi]
             }
 
     async def get_turn_count(self, session_id: str) -> int:
+        if session_id != "all":
+            return (await self._session(session_id)).message_count
+        await self.writes.barrier(session_id)
         loop = asyncio.get_event_loop()
         return await loop.run_in_executor(self.executor, self._get_turn_count_sync, session_id)
 
     def _get_turn_count_sync(self, session_id: str) -> int:
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.read() as conn:
             if session_id == "all":
                 return conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
             return conn.execute("SELECT COUNT(*) FROM messages WHERE session_id = ?", (session_id,)).fetchone()[0]
 
     async def is_scam_session(self, session_id: str) -> bool:
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(self.executor, self._is_scam_session_sync, session_id)
-
-    def _is_scam_session_sync(self, session_id: str) -> bool:
-        with sqlite3.connect(self.db_path) as conn:
-            res = conn.execute("SELECT is_scam FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
-            return bool(res[0]) if res else False
+        return (await self._session(session_id)).is_scam
 
 db = HoneyDB()
\ No newline at end of file
@@ -0,0 +1,167 @@
+import os
+import mmap
+import time
+import fcntl
+import struct
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+_SLOT = struct.Struct("<Q")
+
+
+class SessionVersions:
+    """
+    Cross-worker change notification: a small memory-mapped file of 64-bit
+    counters, one slot per hash bucket of session ids. A writer bumps the slot
+    after its commit; a reader compares the slot with the value it cached.
+    Reads are plain memory loads on the shared page cache, never disk I/O.
+    """
+
+    def __init__(self, path: str, slots: int):
+        self.slots = slots
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        if os.fstat(self._fd).st_size < slots * _SLOT.size:
+            os.ftruncate(self._fd, slots * _SLOT.size)
+        self._map = mmap.mmap(self._fd, slots * _SLOT.size)
+
+    def _offset(self, session_id: str) -> int:
+        digest = hashlib.blake2b(session_id.encode(), digest_size=8).digest()
+        return (int.from_bytes(digest, "little") % self.slots) * _SLOT.size
+
+    def read(self, session_id: str) -> int:
+        return _SLOT.unpack_from(self._map, self._offset(session_id))[0]
+
+    def bump(self, session_ids: Iterable[str], on_bump=None):
+        """Increment each session's slot; `on_bump(session_id, old, new)` runs under the file lock."""
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            for session_id in session_ids:
+                offset = self._offset(session_id)
+                old = _SLOT.unpack_from(self._map, offset)[0]
+                new = (old + 1) & 0xFFFFFFFFFFFFFFFF
+                _SLOT.pack_into(self._map, offset, new)
+                if on_bump:
+                    on_bump(session_id, old, new)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def close(self):
+        self._map.close()
+        os.close(self._fd)
+
+
+@dataclass
+class SessionEntry:
+    messages: List[Dict[str, str]]      # newest `capacity` messages, oldest first
+    message_count: int                  # all messages of the session
+    is_scam: bool
+    intervention: Dict
+    version: int
+    touched_at: float = field(default_factory=time.monotonic)
+
+
+class SessionCache:
+    """
+    LRU of hot sessions for the per-turn reads (context, scam flag,
+    intervention state, turn count). HoneyDB updates entries write-through as
+    it queues or commits rows and bumps SessionVersions after each commit, so
+    another worker's entry goes stale as soon as the shared counter moves.
+    Entries idle longer than `idle_s` are evicted.
+    """
+
+    def __init__(self, versions: SessionVersions, max_entries: int, idle_s: float, capacity: int):
+        self.versions = versions
+        self.max_entries = max_entries
+        self.idle_s = idle_s
+        self.capacity = capacity
+        self._entries: "OrderedDict[str, SessionEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, session_id: str) -> Optional[SessionEntry]:
+        with self._lock:
+            entry = self._entries.get(session_id)
+            now = time.monotonic()
+            if entry is not None and now - entry.touched_at > self.idle_s:
+                del self._entries[session_id]
+                entry = None
+            elif entry is not None and entry.version != self.versions.read(session_id):
+                # Another worker (or a direct write) committed since this was cached
+                del self._entries[session_id]
+                self.invalidations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            entry.touched_at = now
+            self._entries.move_to_end(session_id)
+            self.hits += 1
+            return entry
+
+    def put(self, session_id: str, entry: SessionEntry):
+        entry.messages = entry.messages[-self.capacity:]
+        with self._lock:
+            self._entries[session_id] = entry
+            self._entries.move_to_end(session_id)
+            now = time.monotonic()
+            while self._entries:
+                oldest_id, oldest = next(iter(self._entries.items()))
+                if len(self._entries) <= self.max_entries and now - oldest.touched_at <= self.idle_s:
+                    break
+                del self._entries[oldest_id]
+
+    def append_message(self, session_id: str, role: str, content: str):
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is not None:
+                entry.messages.append({"role": role, "content": content})
+                del entry.messages[:-self.capacity]
+                entry.message_count += 1
+
+    def set_scam(self, session_id: str, is_scam: bool):
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is not None:
+                entry.is_scam = is_scam
+
+    def invalidate(self, session_id: str):
+        with self._lock:
+            self._entries.pop(session_id, None)
+
+    def committed(self, session_ids: Iterable[str]):
+        """
+        Called after rows for these sessions are committed: publish the change
+        to other workers. An entry that was current keeps up with its own write
+        (it was updated write-through); one that had already missed another
+        worker's change is dropped.
+        """
+        def follow(session_id: str, old: int, new: int):
+            entry = self._entries.get(session_id)
+            if entry is None:
+                return
+            if entry.version == old:
+                entry.version = new
+            else:
+                del self._entries[session_id]
+                self.invalidations += 1
+
+        session_ids = set(session_ids)
+        if not session_ids:
+            return
+        with self._lock:
+            self.versions.bump(session_ids, follow)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,146 @@
+import os
+import time
+import fcntl
+import asyncio
+import hashlib
+import logging
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Dict
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class SessionBusy(TimeoutError):
+    """Another turn of the session held it for longer than SESSION_LOCK_TIMEOUT_S."""
+
+
+@dataclass
+class _Slot:
+    lock: asyncio.Lock
+    users: int = 0
+
+
+@dataclass
+class _Range:
+    lock: asyncio.Lock      # one in-process acquisition attempt at a time
+    users: int = 0          # sessions of this process holding or acquiring the byte
+    held: bool = False
+
+
+class SessionLocks:
+    """
+    Runs the turns of one session strictly one at a time, across gunicorn
+    workers, while different sessions stay fully parallel.
+
+    Inside a worker, waiters queue on a per-session asyncio.Lock; the table
+    only holds sessions with a turn running or waiting, so it stays bounded.
+    The holder then takes an exclusive POSIX record lock on one byte of a
+    shared lock file, picked by hashing the session id into `slots`, which
+    the other worker polls for. This costs no SQLite write transaction, and
+    the kernel drops a crashed holder's locks.
+
+    Record locks belong to the process, so sessions of this worker that hash
+    to the same byte share it (refcounted); across workers such a collision
+    only serializes two unrelated sessions.
+    """
+
+    def __init__(self, path: str, slots: int, timeout: float, poll_interval: float):
+        self.slots = slots
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        # Opened once and never closed while running: closing any descriptor of
+        # the file would release every record lock this process holds on it
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        self._slots: Dict[str, _Slot] = {}
+        self._ranges: Dict[int, _Range] = {}
+        self.waits = 0
+        self.timeouts = 0
+
+    def _offset(self, session_id: str) -> int:
+        digest = hashlib.blake2b(session_id.encode(), digest_size=8).digest()
+        return int.from_bytes(digest, "little") % self.slots
+
+    async def _lock_range(self, offset: int, session_id: str, deadline: float):
+        rng = self._ranges.get(offset)
+        if rng is None:
+            rng = self._ranges[offset] = _Range(asyncio.Lock())
+        rng.users += 1
+        try:
+            async with rng.lock:
+                delay = self.poll_interval
+                while not rng.held:
+                    try:
+                        fcntl.lockf(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB, 1, offset)
+                        rng.held = True
+                    except (BlockingIOError, PermissionError):
+                        if time.monotonic() + delay > deadline:
+                            raise SessionBusy(f"Session {session_id} is busy in another worker")
+                        await asyncio.sleep(delay)
+                        delay = min(delay * 2, 0.5)
+        except BaseException:
+            self._unlock_range(offset)
+            raise
+
+    def _unlock_range(self, offset: int):
+        rng = self._ranges[offset]
+        rng.users -= 1
+        if rng.users == 0:
+            if rng.held:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, offset)
+            del self._ranges[offset]
+
+    @asynccontextmanager
+    async def hold(self, session_id: str):
+        slot = self._slots.get(session_id)
+        if slot is None:
+            slot = self._slots[session_id] = _Slot(asyncio.Lock())
+        slot.users += 1
+        if slot.users > 1:
+            self.waits += 1
+        deadline = time.monotonic() + self.timeout
+        try:
+            try:
+                await asyncio.wait_for(slot.lock.acquire(), timeout=self.timeout)
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                raise SessionBusy(f"Session {session_id} is busy")
+            try:
+                offset = self._offset(session_id)
+                try:
+                    await self._lock_range(offset, session_id, deadline)
+                except SessionBusy:
+                    self.timeouts += 1
+                    raise
+                try:
+                    yield
+                finally:
+                    self._unlock_range(offset)
+            finally:
+                slot.lock.release()
+        finally:
+            slot.users -= 1
+            if slot.users == 0:
+                del self._slots[session_id]
+
+    def close(self):
+        os.close(self._fd)
+
+    def stats(self):
+        return {
+            "active_sessions": len(self._slots),
+            "waiting": sum(s.users - 1 for s in self._slots.values() if s.users > 1),
+            "held_ranges": sum(1 for r in self._ranges.values() if r.held),
+            "waits": self.waits,
+            "timeouts": self.timeouts,
+        }
+
+
+session_locks = SessionLocks(
+    settings.DATABASE_PATH + ".locks",
+    slots=settings.SESSION_LOCK_SLOTS,
+    timeout=settings.SESSION_LOCK_TIMEOUT_S,
+    poll_interval=settings.SESSION_LEASE_POLL_S,
+)
@@ -0,0 +1,323 @@
+import heapq
+import threading
+from array import array
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from app.db.identifiers import canonicalize
+
+
+def identifier_node_id(intel_type: str, canonical_value: str) -> str:
+    return f"{intel_type}_{canonical_value}"
+
+
+class SyndicateGraph:
+    """
+    Resident session <-> identifier graph, updated incrementally as intel is saved.
+
+    Nodes are interned to integer indices. A union-find (path halving + union by
+    size) keeps connected components current on every new link, so component
+    lookup and size are O(α(n)); each component also tracks its highest-degree
+    node as the syndicate hub.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.loaded = False
+        self._reset()
+
+    def _reset(self):
+        self._index: Dict[str, int] = {}
+        self._node_id: List[str] = []
+        self._node_type: List[str] = []
+        self._label: List[str] = []
+        self._last_seen: List[str] = []
+        self._degree: List[int] = []
+        self._parent: List[int] = []
+        self._size: List[int] = []
+        self._hub: List[int] = []  # valid at component roots only
+        self._edges: Dict[Tuple[int, int], str] = {}
+        self._edge_list: List[Tuple[int, int]] = []  # append-only, backs edge cursors
+        self._csr_cache: Optional[Tuple[int, array, array]] = None
+        # node_id -> {source: status}; keyed by id so verdicts may precede the link
+        self._enrichment: Dict[str, Dict[str, str]] = {}
+        self.version = 0
+        self._snapshot_cache: Optional[Tuple[int, dict]] = None
+
+    # --- UNION-FIND ---
+
+    def _find(self, i: int) -> int:
+        parent = self._parent
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def _union(self, a: int, b: int):
+        ra, rb = self._find(a), self._find(b)
+        if ra == rb:
+            return
+        if self._size[ra] < self._size[rb]:
+            ra, rb = rb, ra
+        self._parent[rb] = ra
+        self._size[ra] += self._size[rb]
+        if self._degree[self._hub[rb]] > self._degree[self._hub[ra]]:
+            self._hub[ra] = self._hub[rb]
+
+    def _node(self, node_id: str, node_type: str, label: str) -> int:
+        idx = self._index.get(node_id)
+        if idx is not None:
+            return idx
+        idx = len(self._node_id)
+        self._index[node_id] = idx
+        self._node_id.append(node_id)
+        self._node_type.append(node_type)
+        self._label.append(label)
+        self._last_seen.append("")
+        self._degree.append(0)
+        self._parent.append(idx)
+        self._size.append(1)
+        self._hub.append(idx)
+        return idx
+
+    # --- UPDATES ---
+
+    def add_link(self, session_id: str, intel_type: str, value: str, last_seen=None, canonical: str = None):
+        """Record that `session_id` used an identifier. Repeat sightings only bump last_seen."""
+        canonical = canonical or canonicalize(intel_type, value)
+        with self._lock:
+            s = self._node(session_id, "session", f"Session {session_id[:8]}")
+            t = self._node(identifier_node_id(intel_type, canonical), intel_type, value.strip())
+            # Only real changes bump the version: sync re-reads an overlap window of known links
+            if last_seen is not None and str(last_seen) > self._last_seen[t]:
+                self._last_seen[t] = str(last_seen)
+                self.version += 1
+            if (s, t) in self._edges:
+                return
+            self.version += 1
+            self._edges[(s, t)] = intel_type
+            self._edge_list.append((s, t))
+            self._degree[s] += 1
+            self._degree[t] += 1
+            self._union(s, t)
+            root = self._find(s)
+            for n in (s, t):
+                if self._degree[n] > self._degree[self._hub[root]]:
+                    self._hub[root] = n
+
+    def set_enrichment(self, intel_type: str, canonical: str, source: str, status: str):
+        """Attach an enrichment verdict (see app/db/enrichment_cache.py) to an identifier node."""
+        with self._lock:
+            node_id = identifier_node_id(intel_type, canonical)
+            if self._enrichment.get(node_id, {}).get(source) == status:
+                return
+            self._enrichment.setdefault(node_id, {})[source] = status
+            self.version += 1
+
+    def load(self, rows, enrichments=()):
+        """
+        Bulk (re)load from (session_id, type, canonical_value, display_value, last_seen)
+        rows and optional (type, canonical_value, source, status) verdict rows.
+        """
+        with self._lock:
+            self._reset()
+            for session_id, intel_type, canonical, display, last_seen in rows:
+                self.add_link(session_id, intel_type, display, last_seen, canonical=canonical)
+            for intel_type, canonical, source, status in enrichments:
+                self.set_enrichment(intel_type, canonical, source, status)
+            self.loaded = True
+
+    # --- PAYLOADS ---
+
+    def _node_payload(self, i: int) -> Dict:
+        root = self._find(i)
+        node = {
+            "id": self._node_id[i],
+            "type": self._node_type[i],
+            "label": self._label[i],
+            "degree": self._degree[i],
+            "cluster_id": self._node_id[root],
+            "cluster_size": self._size[root],
+        }
+        if self._node_type[i] != "session":
+            node["metadata"] = {
+                "risk_score": 0.85 if self._node_type[i] in ["upi", "bank"] else 0.6,
+                "last_seen": self._last_seen[i],
+                "enrichment": self._enrichment.get(self._node_id[i], {}),
+            }
+        return node
+
+    def _edge_payload(self, s: int, t: int) -> Dict:
+        intel_type = self._edges[(s, t)]
+        return {
+            "source": self._node_id[s],
+            "target": self._node_id[t],
+            "label": f"uses_{intel_type}",
+            "weight": 2.0 if intel_type == "upi" else 1.0,
+        }
+
+    # --- QUERIES ---
+
+    def component_of(self, node_id: str) -> Optional[Dict]:
+        with self._lock:
+            idx = self._index.get(node_id)
+            if idx is None:
+                return None
+            root = self._find(idx)
+            return {
+                "cluster_id": self._node_id[root],
+                "size": self._size[root],
+                "hub": self._node_id[self._hub[root]],
+            }
+
+    def component_members(self, node_id: str, node_type: str = None) -> List[str]:
+        """Every node id in `node_id`'s component, optionally only of one type."""
+        with self._lock:
+            idx = self._index.get(node_id)
+            if idx is None:
+                return []
+            root = self._find(idx)
+            return [
+                self._node_id[i] for i in range(len(self._node_id))
+                if self._find(i) == root and (node_type is None or self._node_type[i] == node_type)
+            ]
+
+    def components(self, min_size: int = 2) -> List[Dict]:
+        """Connected syndicate components, largest first."""
+        with self._lock:
+            roots = {self._find(i) for i in range(len(self._node_id))}
+            comps = [
+                {
+                    "cluster_id": self._node_id[r],
+                    "size": self._size[r],
+                    "hub": self._node_id[self._hub[r]],
+                    "hub_degree": self._degree[self._hub[r]],
+                }
+                for r in roots if self._size[r] >= min_size
+            ]
+            comps.sort(key=lambda c: c["size"], reverse=True)
+            return comps
+
+    def hubs(self, top_n: int = 10) -> List[Dict]:
+        """Highest-degree identifier/session nodes across the whole graph."""
+        with self._lock:
+            top = heapq.nlargest(top_n, range(len(self._degree)), key=self._degree.__getitem__)
+            return [
+                {"id": self._node_id[i], "type": self._node_type[i], "degree": self._degree[i]}
+                for i in top if self._degree[i] > 0
+            ]
+
+    def snapshot(self) -> Dict:
+        """The /syndicate/graph payload; cached until the next update."""
+        with self._lock:
+            if self._snapshot_cache and self._snapshot_cache[0] == self.version:
+                return self._snapshot_cache[1]
+            nodes = [self._node_payload(i) for i in range(len(self._node_id))]
+            links = [self._edge_payload(s, t) for s, t in self._edge_list]
+            clusters = self.components()
+            result = {
+                "nodes": nodes,
+                "links": links,
+                "metadata": {
+                    "total_records": len(links),
+                    "analysis_engine": "Forensic Link Analysis v3.0",
+                    "clustering_algorithm": "Incremental Union-Find Syndicate Detection",
+                    "hubs_detected": len([d for d in self._degree if d > 2]),
+                    "syndicates_detected": len([c for c in clusters if c["size"] > 2]),
+                    "largest_syndicates": clusters[:5],
+                    "top_hubs": self.hubs(5),
+                },
+            }
+            self._snapshot_cache = (self.version, result)
+            return result
+
+    # --- COMPACT ADJACENCY (CSR) ---
+
+    def _csr(self) -> Tuple[array, array]:
+        """
+        Undirected adjacency as two flat integer arrays: the neighbours of node i
+        are indices[indptr[i]:indptr[i + 1]]. Rebuilt lazily after updates.
+        """
+        if self._csr_cache and self._csr_cache[0] == len(self._edge_list):
+            return self._csr_cache[1], self._csr_cache[2]
+        n = len(self._node_id)
+        indptr = array("l", [0]) * (n + 1)
+        for i, d in enumerate(self._degree):
+            indptr[i + 1] = indptr[i] + d
+        indices = array("l", [0]) * indptr[n]
+        fill = array("l", indptr[:n])
+        for s, t in self._edge_list:
+            indices[fill[s]] = t
+            fill[s] += 1
+            indices[fill[t]] = s
+            fill[t] += 1
+        self._csr_cache = (len(self._edge_list), indptr, indices)
+        return indptr, indices
+
+    def neighborhood(self, node_id: str, hops: int = 2, max_nodes: int = 500) -> Optional[Dict]:
+        """k-hop ego network around one session or identifier (BFS over the CSR arrays)."""
+        with self._lock:
+            start = self._index.get(node_id)
+            if start is None:
+                return None
+            indptr, indices = self._csr()
+            depth = {start: 0}
+            queue = deque([start])
+            truncated = False
+            while queue:
+                u = queue.popleft()
+                if depth[u] == hops:
+                    continue
+                for v in indices[indptr[u]:indptr[u + 1]]:
+                    if v in depth:
+                        continue
+                    if len(depth) >= max_nodes:
+                        truncated = True
+                        break
+                    depth[v] = depth[u] + 1
+                    queue.append(v)
+            links = []
+            for u in depth:
+                for v in indices[indptr[u]:indptr[u + 1]]:
+                    # Each undirected edge once, from its session endpoint
+                    if v in depth and self._node_type[u] == "session":
+                        links.append(self._edge_payload(u, v))
+            return {
+                "center": node_id,
+                "hops": hops,
+                "nodes": [dict(self._node_payload(i), hop=d) for i, d in depth.items()],
+                "links": links,
+                "truncated": truncated,
+            }
+
+    def top_components(self, limit: int = 10, max_members: int = 50) -> List[Dict]:
+        """Largest syndicate components with (a capped list of) their members."""
+        with self._lock:
+            comps = self.components()[:limit]
+            wanted = {self._index[c["cluster_id"]]: c for c in comps}
+            for c in comps:
+                c["members"] = []
+            for i in range(len(self._node_id)):
+                c = wanted.get(self._find(i))
+                if c is not None and len(c["members"]) < max_members:
+                    c["members"].append({"id": self._node_id[i], "type": self._node_type[i]})
+            return comps
+
+    def list_nodes(self, cursor: int = 0, limit: int = 100) -> Dict:
+        """Cursor-paginated node listing. Node indices are append-only, so cursors stay valid."""
+        with self._lock:
+            end = min(cursor + limit, len(self._node_id))
+            return {
+                "items": [self._node_payload(i) for i in range(cursor, end)],
+                "next_cursor": end if end < len(self._node_id) else None,
+                "total": len(self._node_id),
+            }
+
+    def list_edges(self, cursor: int = 0, limit: int = 100) -> Dict:
+        with self._lock:
+            end = min(cursor + limit, len(self._edge_list))
+            return {
+                "items": [self._edge_payload(s, t) for s, t in self._edge_list[cursor:end]],
+                "next_cursor": end if end < len(self._edge_list) else None,
+                "total": len(self._edge_list),
+            }
@@ -0,0 +1,240 @@
+import os
+import json
+import sqlite3
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class VectorBackend(ABC):
+    """
+    Storage/search backend behind VectorStore. `query` returns Chroma's result
+    shape (one inner list per query text) so callers never care which is in use.
+    Distances are squared L2 between unit vectors, i.e. Chroma's default space.
+    """
+
+    @abstractmethod
+    def upsert(self, ids: List[str], documents: List[str], metadatas: List[dict]):
+        ...
+
+    @abstractmethod
+    def query(self, text: str, n_results: int) -> Dict:
+        ...
+
+    @abstractmethod
+    def count(self) -> int:
+        ...
+
+
+class ChromaBackend(VectorBackend):
+    def __init__(self, directory: str, embedder):
+        import chromadb
+        self.client = chromadb.PersistentClient(path=directory)
+        self.collection = self.client.get_or_create_collection(
+            name="scammer_fingerprints", embedding_function=embedder
+        )
+
+    def upsert(self, ids, documents, metadatas):
+        self.collection.upsert(ids=ids, documents=documents, metadatas=metadatas)
+
+    def query(self, text, n_results):
+        return self.collection.query(query_texts=[text], n_results=n_results)
+
+    def count(self):
+        return self.collection.count()
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+class IVFIndex:
+    """
+    Inverted-file approximate index: spherical k-means centroids over the
+    rows, and a query only scores the rows in its `nprobe` closest lists.
+    """
+
+    def __init__(self, matrix: np.ndarray, nlist: int, iterations: int = 10, seed: int = 0):
+        rng = np.random.default_rng(seed)
+        n = matrix.shape[0]
+        sample = matrix[np.sort(rng.choice(n, size=min(n, nlist * 40), replace=False))]
+        # Tiny collections (a low VECTOR_ANN_MIN_ROWS) cannot seed more lists than rows
+        nlist = min(nlist, len(sample))
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(nlist):
+                members = sample[assign == c]
+                if len(members):
+                    centroids[c] = members.sum(axis=0)
+            centroids = _normalize(centroids)
+        self.centroids = centroids.astype(np.float32)
+        # Assign every row in chunks so the whole matrix is never copied
+        assign = np.empty(n, dtype=np.int32)
+        for start in range(0, n, 65536):
+            assign[start:start + 65536] = np.argmax(matrix[start:start + 65536] @ self.centroids.T, axis=1)
+        self.order = np.argsort(assign, kind="stable").astype(np.int64)
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=nlist))])
+        self.rows = n
+
+    def candidates(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        nprobe = min(nprobe, len(self.centroids))
+        lists = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        return np.concatenate([self.order[self.offsets[c]:self.offsets[c + 1]] for c in lists])
+
+
+class NumpyBackend(VectorBackend):
+    """
+    Fingerprints as rows of one float32 matrix in a memory-mapped file, so
+    every gunicorn worker shares the same physical pages instead of each
+    holding a Chroma client. Ids, documents and metadata live in a sidecar
+    SQLite file whose write lock also serializes appends across processes.
+
+    Search is exact (one vectorized matmul over unit rows) until the
+    collection reaches `ann_min_rows`; from then on an IVFIndex narrows the
+    candidates, and rows appended since the index was built are scanned exactly.
+    """
+
+    def __init__(self, directory: str, embedder, ann_min_rows: int = 0, nprobe: int = 8):
+        os.makedirs(directory, exist_ok=True)
+        self.embedder = embedder
+        self.matrix_path = os.path.join(directory, "fingerprints.f32")
+        self.ann_min_rows = ann_min_rows
+        self.nprobe = nprobe
+        self.conn = sqlite3.connect(os.path.join(directory, "fingerprints.sqlite"), check_same_thread=False, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS fingerprints (
+                row INTEGER PRIMARY KEY,
+                id TEXT NOT NULL UNIQUE,
+                document TEXT,
+                metadata TEXT
+            )
+        """)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.conn.commit()
+        self._lock = threading.Lock()
+        self._map: Optional[np.memmap] = None
+        self._ann: Optional[IVFIndex] = None
+        self.dim: Optional[int] = None
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'dim'").fetchone()
+        if row:
+            self.dim = int(row[0])
+
+    def count(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM fingerprints").fetchone()[0]
+
+    def _matrix(self, rows: int) -> np.ndarray:
+        """The first `rows` rows, re-mapping when another process grew the file."""
+        if self._map is None or self._map.shape[0] < rows:
+            capacity = os.path.getsize(self.matrix_path) // (4 * self.dim)
+            self._map = np.memmap(self.matrix_path, dtype=np.float32, mode="r", shape=(capacity, self.dim))
+        return self._map[:rows]
+
+    def upsert(self, ids, documents, metadatas):
+        vectors = _normalize(np.asarray(self.embedder(documents), dtype=np.float32))
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                if self.dim is None:
+                    self.dim = vectors.shape[1]
+                    self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('dim', ?)", (str(self.dim),))
+                next_row = self.conn.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM fingerprints").fetchone()[0]
+                placed = []
+                for id_, document, metadata in zip(ids, documents, metadatas):
+                    existing = self.conn.execute("SELECT row FROM fingerprints WHERE id = ?", (id_,)).fetchone()
+                    row = existing[0] if existing else next_row
+                    if not existing:
+                        next_row += 1
+                    self.conn.execute(
+                        "INSERT OR REPLACE INTO fingerprints (row, id, document, metadata) VALUES (?, ?, ?, ?)",
+                        (row, id_, document, json.dumps(metadata or {}))
+                    )
+                    placed.append(row)
+                undo = self._write_rows(placed, [v.tobytes() for v in vectors], next_row)
+                try:
+                    self.conn.commit()
+                except Exception:
+                    # Still under the write lock: put back the vectors of rows updated in place
+                    self._write_rows(placed, undo, 0)
+                    raise
+            except Exception:
+                self.conn.rollback()
+                raise
+
+    def _write_rows(self, rows: List[int], blobs: List[bytes], total_rows: int) -> List[bytes]:
+        """Write one vector per row; returns the bytes each row held before (the undo)."""
+        row_bytes = 4 * self.dim
+        mode = "r+b" if os.path.exists(self.matrix_path) else "w+b"
+        previous = []
+        with open(self.matrix_path, mode) as f:
+            f.seek(0, os.SEEK_END)
+            capacity = f.tell() // row_bytes
+            if total_rows > capacity:
+                # Grow geometrically; readers re-map when they see more rows than they hold
+                f.truncate(max(total_rows, capacity * 2, 1024) * row_bytes)
+            try:
+                for row, blob in zip(rows, blobs):
+                    f.seek(row * row_bytes)
+                    previous.append(f.read(row_bytes))
+                    f.seek(row * row_bytes)
+                    f.write(blob)
+                f.flush()
+            except Exception:
+                for row, blob in zip(rows, previous):
+                    f.seek(row * row_bytes)
+                    f.write(blob)
+                raise
+        return previous
+
+    def _index(self, matrix: np.ndarray) -> Optional[IVFIndex]:
+        n = matrix.shape[0]
+        if not self.ann_min_rows or n < self.ann_min_rows:
+            return None
+        # Rebuild after 25% growth. In-place upserts keep their old list; acceptable for an ANN.
+        if self._ann is None or n > self._ann.rows * 1.25:
+            self._ann = IVFIndex(matrix, nlist=max(16, int(np.sqrt(n))))
+            logger.info(f"Built IVF index over {n} fingerprints ({len(self._ann.centroids)} lists)")
+        return self._ann
+
+    def query(self, text, n_results):
+        empty = {"ids": [[]], "distances": [[]], "documents": [[]], "metadatas": [[]]}
+        query = _normalize(np.asarray(self.embedder([text])[0], dtype=np.float32))
+        with self._lock:
+            rows = self.conn.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM fingerprints").fetchone()[0]
+            if not rows or self.dim is None:
+                return empty
+            matrix = self._matrix(rows)
+            index = self._index(matrix)
+            if index is not None:
+                # Sorted row order keeps the memmap gather sequential
+                candidates = np.sort(np.concatenate([index.candidates(query, self.nprobe), np.arange(index.rows, rows)]))
+                scores = matrix[candidates] @ query
+            else:
+                candidates = None
+                scores = matrix @ query
+            k = min(n_results, len(scores))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            hits = [(int(candidates[i]) if candidates is not None else int(i), float(scores[i])) for i in top]
+            found = {
+                r[0]: r for r in self.conn.execute(
+                    f"SELECT row, id, document, metadata FROM fingerprints WHERE row IN ({','.join('?' * len(hits))})",
+                    [h[0] for h in hits]
+                )
+            }
+        hits = [h for h in hits if h[0] in found]
+        return {
+            "ids": [[found[r][1] for r, _ in hits]],
+            # Squared L2 between unit vectors, the same scale Chroma reports
+            "distances": [[max(0.0, 2.0 - 2.0 * s) for _, s in hits]],
+            "documents": [[found[r][2] for r, _ in hits]],
+            "metadatas": [[json.loads(found[r][3]) for r, _ in hits]],
+        }
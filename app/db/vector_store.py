@@ -1,27 +1,86 @@
-import chromadb
 import os
-from chromadb.config import Settings
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
 from app.core.config import settings
+from app.db.write_buffer import WriteBehindBuffer
+from app.db.embeddings import FingerprintEmbedder
+from app.db.vector_backends import ChromaBackend, NumpyBackend, VectorBackend
 
 class VectorStore:
     def __init__(self):
         self.persist_directory = settings.VECTOR_DB_DIR
-        
-        self.client = chromadb.PersistentClient(path=self.persist_directory)
-        self.collection = self.client.get_or_create_collection(name="scammer_fingerprints")
 
-    def add_fingerprint(self, session_id: str, text: str, metadata: dict):
-        self.collection.add(
-            documents=[text],
-            metadatas=[metadata],
-            ids=[session_id]
+        # Explicit, locally-loaded embedder (warmed in the lifespan) instead of Chroma's lazy default
+        self.embedder = FingerprintEmbedder(
+            settings.EMBEDDING_MODEL_DIR,
+            cache_size=settings.EMBEDDING_CACHE_SIZE,
+            allow_download=settings.EMBEDDING_ALLOW_DOWNLOAD,
+        )
+        self.backend = self._make_backend(settings.VECTOR_BACKEND)
+        # Backend calls (embedding + search) never run on the event loop
+        self.executor = ThreadPoolExecutor(max_workers=settings.VECTOR_WORKERS)
+        self.writes = WriteBehindBuffer(
+            self._upsert_batch_sync,
+            self.executor,
+            max_batch=settings.VECTOR_MAX_BATCH,
+            flush_interval=settings.VECTOR_FLUSH_MS / 1000,
+            kinds=("fingerprints",),
         )
 
-    def search_similar(self, text: str, limit: int = 3):
-        results = self.collection.query(
-            query_texts=[text],
-            n_results=limit
+    def _make_backend(self, name: str) -> VectorBackend:
+        if name == "numpy":
+            return NumpyBackend(
+                os.path.join(self.persist_directory, "numpy"),
+                self.embedder,
+                ann_min_rows=settings.VECTOR_ANN_MIN_ROWS,
+                nprobe=settings.VECTOR_ANN_NPROBE,
+            )
+        if name != "chroma":
+            raise ValueError(f"Unknown VECTOR_BACKEND {name!r} (expected 'chroma' or 'numpy')")
+        return ChromaBackend(self.persist_directory, self.embedder)
+
+    def add_fingerprint(self, session_id: str, text: str, metadata: dict):
+        # One fingerprint per session: later turns replace it instead of colliding on the id
+        self.backend.upsert([session_id], [text], [metadata])
+
+    def queue_fingerprint(self, session_id: str, text: str, metadata: dict):
+        """Non-blocking add_fingerprint: batched with other sessions into one upsert."""
+        self.writes.put("fingerprints", session_id, (session_id, text, metadata))
+
+    def _upsert_batch_sync(self, batch: Dict[str, List[Tuple]]):
+        # Last write per session wins; Chroma rejects duplicate ids within one call
+        latest = {session_id: (text, metadata) for session_id, text, metadata in batch["fingerprints"]}
+        if not latest:
+            return
+        self.backend.upsert(
+            list(latest),
+            [text for text, _ in latest.values()],
+            [metadata for _, metadata in latest.values()]
         )
+
+    def search_similar(self, text: str, limit: int = 3, exclude_session: str = None):
+        results = self.backend.query(text, limit + 1 if exclude_session else limit)
+        if exclude_session:
+            # A session's own fingerprint is not a "returning scammer" match
+            keep = [i for i, sid in enumerate(results["ids"][0]) if sid != exclude_session][:limit]
+            for key in ("ids", "distances", "documents", "metadatas"):
+                if results.get(key):
+                    results[key] = [[results[key][0][i] for i in keep]]
         return results
 
+    async def search_similar_async(self, text: str, limit: int = 3, exclude_session: str = None):
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self.executor, self.search_similar, text, limit, exclude_session)
+
+    async def warmup(self):
+        """Load the embedding model before the first scam turn needs it."""
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(self.executor, self.embedder.load)
+
+    async def drain(self):
+        """Flush queued fingerprints. Called from the FastAPI lifespan on shutdown."""
+        await self.writes.drain()
+        self.executor.shutdown(wait=True)
+
 vector_db = VectorStore()
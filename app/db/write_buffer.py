@@ -0,0 +1,133 @@
+import asyncio
+import logging
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Kinds of rows the repository's buffer groups; it maps each kind to one
+# `executemany` statement. Other stores pass their own `kinds`.
+BATCH_KINDS = ("messages", "intel", "scam_flags")
+
+
+class WriteBehindBuffer:
+    """
+    Non-blocking write queue in front of the SQLite writer.
+
+    Callers enqueue rows from the event loop and return immediately. Rows are
+    flushed as one grouped transaction when either `max_batch` rows are pending
+    or `flush_interval` seconds have passed, whichever comes first. A batch
+    whose write fails goes back to the front of the queue and is retried,
+    backing off up to `max_retry_delay` seconds while the failures last.
+    Reads that must see a session's own writes call `barrier(session_id)`.
+    """
+
+    def __init__(
+        self,
+        write_batch: Callable[[Dict[str, List[Tuple]]], None],
+        executor,
+        max_batch: int = 64,
+        flush_interval: float = 0.05,
+        kinds: Tuple[str, ...] = BATCH_KINDS,
+        max_retry_delay: float = 5.0,
+    ):
+        self._write_batch = write_batch
+        self._executor = executor
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.kinds = kinds
+        self.max_retry_delay = max_retry_delay
+        self._failures = 0
+        self._pending: Dict[str, List[Tuple]] = {kind: [] for kind in kinds}
+        self._pending_count = 0
+        self._pending_sessions: Set[str] = set()
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+
+    def _ensure_started(self):
+        if self._task is None or self._task.done():
+            self._flush_lock = self._flush_lock or asyncio.Lock()
+            self._wakeup = self._wakeup or asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def put(self, kind: str, session_id: str, row: Tuple):
+        """Queue one row. Must be called from the event loop."""
+        if self._closing:
+            raise RuntimeError("write-behind buffer is draining")
+        self._ensure_started()
+        self._pending[kind].append(row)
+        self._pending_count += 1
+        self._pending_sessions.add(session_id)
+        if self._pending_count >= self.max_batch:
+            self._wakeup.set()
+
+    async def _run(self):
+        while not self._closing:
+            timeout = self.flush_interval
+            if self._failures:
+                timeout = min(self.flush_interval * 2 ** self._failures, self.max_retry_delay)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                # The batch was requeued; keep the flusher alive and retry after a backoff
+                logger.error(f"Write-behind flush failed ({self._pending_count} rows requeued): {e}")
+
+    async def flush(self):
+        """
+        Write everything pending right now, in one transaction. If the write
+        fails the batch is put back ahead of anything queued meanwhile, and
+        the error is raised.
+        """
+        if self._flush_lock is None:
+            return
+        async with self._flush_lock:
+            if not self._pending_count:
+                return
+            batch, count, sessions = self._pending, self._pending_count, self._pending_sessions
+            self._pending = {kind: [] for kind in self.kinds}
+            self._pending_count = 0
+            self._pending_sessions = set()
+            loop = asyncio.get_running_loop()
+            try:
+                await loop.run_in_executor(self._executor, self._write_batch, batch)
+            except Exception:
+                for kind in self.kinds:
+                    self._pending[kind][:0] = batch[kind]
+                self._pending_count += count
+                self._pending_sessions |= sessions
+                self._failures += 1
+                raise
+            self._failures = 0
+
+    async def barrier(self, session_id: str):
+        """
+        Wait until this session's queued writes (if any) are durable. Raises
+        the write error if they could not be written.
+        """
+        if self._flush_lock is None:
+            return
+        if session_id in self._pending_sessions or self._flush_lock.locked():
+            # A concurrent flush that failed has requeued its rows by the time we hold the lock
+            await self.flush()
+
+    async def drain(self, attempts: int = 3):
+        """Stop the background flusher and write whatever is left, retrying a few times."""
+        self._closing = True
+        if self._task is not None:
+            self._wakeup.set()
+            await self._task
+        for attempt in range(1, attempts + 1):
+            try:
+                await self.flush()
+                return
+            except Exception as e:
+                if attempt == attempts:
+                    logger.error(f"Write-behind drain gave up; {self._pending_count} rows not written: {e}")
+                    return
+                await asyncio.sleep(min(self.flush_interval * 2 ** attempt, self.max_retry_delay))
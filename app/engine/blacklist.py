@@ -0,0 +1,98 @@
+import json
+import asyncio
+import hashlib
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+from app.core.config import settings
+from app.core.http import http_client
+from app.db.blacklist_ledger import blacklist_ledger, LedgerItem
+from app.db.identifiers import canonicalize
+from app.db.syndicate_graph import identifier_node_id
+from app.models.schemas import ExtractedIntel
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class BlacklistDestination:
+    name: str
+    url: str
+    # intel type -> threat type label the destination expects
+    types: Dict[str, str]
+
+
+BLACKLIST_DESTINATIONS = [
+    BlacklistDestination("takedown_api", "https://httpbin.org/post", {"upi": "UPI", "link": "URL", "phone": "PHONE"}),
+]
+
+_INTEL_FIELDS = [("upi", "upi_ids"), ("link", "phishing_links"), ("phone", "phone_numbers")]
+
+
+def _item(destination: BlacklistDestination, intel_type: str, value: str,
+          verdicts: Dict[str, Dict]) -> Tuple[LedgerItem, Dict]:
+    canonical = canonicalize(intel_type, value)
+    by_source = verdicts.get(identifier_node_id(intel_type, canonical)) or {}
+    threat = {
+        "threat": value.strip(),
+        "type": destination.types[intel_type],
+        "verdicts": {source: v.get("status") for source, v in sorted(by_source.items())},
+    }
+    # What the submission says, over the canonical value: a new verdict makes it a
+    # changed identifier worth resubmitting, a case/format variant does not
+    key = {**threat, "threat": canonical}
+    fingerprint = hashlib.sha1(json.dumps(key, sort_keys=True).encode()).hexdigest()
+    return LedgerItem(intel_type, canonical, value.strip(), fingerprint), threat
+
+
+async def _submit_batch(destination: BlacklistDestination, batch: List[Tuple[LedgerItem, Dict]], budget) -> int:
+    items = [item for item, _ in batch]
+    try:
+        res = await http_client.post(
+            destination.url, json={"threats": [threat for _, threat in batch]}, timeout=3.0, budget=budget
+        )
+    except Exception as e:
+        logger.warning(f"🛡️ Takedown batch to {destination.name} failed: {e}")
+        await blacklist_ledger.mark_failed(destination.name, items, f"{type(e).__name__}: {e}")
+        return 0
+    if res.status_code < 300:
+        logger.info(f"🛡️ Takedown batch of {len(items)} accepted by {destination.name}")
+        await blacklist_ledger.mark_submitted(destination.name, items, f"HTTP {res.status_code}")
+        return len(items)
+    logger.warning(f"🛡️ Takedown batch to {destination.name} rejected: HTTP {res.status_code}")
+    await blacklist_ledger.mark_failed(destination.name, items, f"HTTP {res.status_code}")
+    return 0
+
+
+async def submit(session_id: str, intel: ExtractedIntel) -> Dict[str, int]:
+    """
+    Report the session's identifiers to every destination, sending only the
+    ones the ledger has not seen (from any session), or whose verdicts changed
+    since they were submitted, in one POST per batch.
+    Returns the number of identifiers accepted per destination.
+    """
+    budget = http_client.budget(settings.BLACKLIST_BUDGET_S)
+    tasks, names = [], []
+    for destination in BLACKLIST_DESTINATIONS:
+        pending = {}
+        for intel_type, field in _INTEL_FIELDS:
+            if intel_type not in destination.types:
+                continue
+            for value in getattr(intel, field) or []:
+                item, threat = _item(destination, intel_type, value, intel.verdicts)
+                pending.setdefault((item.type, item.canonical_value), (item, threat))
+        if not pending:
+            continue
+
+        claimed = await blacklist_ledger.claim(destination.name, session_id, [item for item, _ in pending.values()])
+        batch = [pending[(item.type, item.canonical_value)] for item in claimed]
+        size = settings.BLACKLIST_BATCH_SIZE
+        for i in range(0, len(batch), size):
+            tasks.append(_submit_batch(destination, batch[i:i + size], budget))
+            names.append(destination.name)
+
+    accepted: Dict[str, int] = {}
+    for name, n in zip(names, await asyncio.gather(*tasks)):
+        accepted[name] = accepted.get(name, 0) + n
+    return accepted
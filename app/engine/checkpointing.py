@@ -0,0 +1,60 @@
+from typing import Any, Dict
+
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from app.core.config import settings
+from app.models.schemas import ExtractedIntel
+
+# Channels rebuilt every turn: load_history re-reads `history` from the messages
+# table and `combined_intel` is this turn's LLM output only
+TRANSIENT_CHANNELS = ("history", "combined_intel")
+INTEL_TAG = "__intel__"
+
+# "turn": one checkpoint when the run exits; "node": LangGraph's default, one per step
+GRAPH_DURABILITY = "exit" if settings.CHECKPOINT_MODE == "turn" else "async"
+
+
+def encode_intel(intel: ExtractedIntel) -> Dict[str, Any]:
+    """Only the fields that differ from an empty ExtractedIntel, as plain msgpack types."""
+    return {INTEL_TAG: 1, **intel.model_dump(exclude_defaults=True)}
+
+
+def decode_intel(data: Dict[str, Any]) -> ExtractedIntel:
+    return ExtractedIntel(**{k: v for k, v in data.items() if k != INTEL_TAG})
+
+
+class SlimStateSerializer(JsonPlusSerializer):
+    """
+    Checkpoint serializer for CHECKPOINT_MODE=turn: drops TRANSIENT_CHANNELS
+    from each snapshot and stores `intel` sparsely instead of as a pickled-by-
+    name pydantic model. Decoding is always on, so checkpoints written in
+    either mode stay readable after switching back.
+    """
+
+    def __init__(self, slim: bool = True):
+        super().__init__()
+        self.slim = slim
+
+    def dumps_typed(self, obj: Any):
+        values = obj.get("channel_values") if isinstance(obj, dict) else None
+        if self.slim and isinstance(values, dict):
+            values = {k: v for k, v in values.items() if k not in TRANSIENT_CHANNELS}
+            if isinstance(values.get("intel"), ExtractedIntel):
+                values["intel"] = encode_intel(values["intel"])
+            obj = {**obj, "channel_values": values}
+        return super().dumps_typed(obj)
+
+    def loads_typed(self, data):
+        obj = super().loads_typed(data)
+        values = obj.get("channel_values") if isinstance(obj, dict) else None
+        if isinstance(values, dict):
+            intel = values.get("intel")
+            if isinstance(intel, dict) and INTEL_TAG in intel:
+                values["intel"] = decode_intel(intel)
+        return obj
+
+
+def configure_checkpointer(saver):
+    """Installs the checkpoint serializer for the configured CHECKPOINT_MODE on `saver`."""
+    saver.serde = SlimStateSerializer(slim=settings.CHECKPOINT_MODE == "turn")
+    return saver
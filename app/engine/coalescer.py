@@ -0,0 +1,108 @@
+import time
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List
+
+from app.core.config import settings
+from app.db.session_lock import session_locks
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Burst:
+    items: List[Any]
+    future: asyncio.Future
+    closes_at: float
+    deadline: float
+    closed: bool = False
+
+
+class BurstCoalescer:
+    """
+    Merges a session's rapid-fire messages into one graph turn. The first
+    message opens a burst; each message arriving within `window_s` of the
+    previous one joins it (up to `max_window_s` after the first and
+    `max_messages` in total). The burst then takes the session lock, still
+    accepting messages while an earlier turn holds it, and runs once; every
+    request in it gets that turn's result. Bursts of a session run in arrival
+    order through the lock, so replies never overtake each other.
+
+    A window of 0 turns coalescing off: each message is its own turn.
+    """
+
+    def __init__(self, window_s: float, max_window_s: float, max_messages: int, hold=session_locks.hold):
+        self.window_s = window_s
+        self.max_window_s = max(max_window_s, window_s)
+        self.max_messages = max_messages
+        self.hold = hold
+        self._open: Dict[str, _Burst] = {}
+        self.turns = 0
+        self.messages = 0
+
+    async def submit(self, session_id: str, item: Any, run: Callable[[List[Any]], Awaitable[Any]]):
+        """
+        Adds `item` to the session's open burst, or opens one that will call
+        `run(items)` under the session lock. Returns the burst's result.
+        """
+        self.messages += 1
+        if self.window_s <= 0:
+            self.turns += 1
+            async with self.hold(session_id):
+                return await run([item])
+
+        now = time.monotonic()
+        burst = self._open.get(session_id)
+        if burst is not None and not burst.closed and len(burst.items) < self.max_messages:
+            burst.items.append(item)
+            burst.closes_at = min(now + self.window_s, burst.deadline)
+        else:
+            burst = _Burst([item], asyncio.get_event_loop().create_future(),
+                           closes_at=now + self.window_s, deadline=now + self.max_window_s)
+            self._open[session_id] = burst
+            # Driven by its own task: a disconnecting client must not cancel the others' turn
+            asyncio.create_task(self._drive(session_id, burst, run))
+        return await asyncio.shield(burst.future)
+
+    def _close(self, session_id: str, burst: _Burst):
+        burst.closed = True
+        if self._open.get(session_id) is burst:
+            del self._open[session_id]
+
+    async def _drive(self, session_id: str, burst: _Burst, run: Callable[[List[Any]], Awaitable[Any]]):
+        try:
+            while (remaining := burst.closes_at - time.monotonic()) > 0:
+                await asyncio.sleep(remaining)
+            try:
+                async with self.hold(session_id):
+                    self._close(session_id, burst)
+                    self.turns += 1
+                    if len(burst.items) > 1:
+                        logger.info(f"Coalesced {len(burst.items)} messages of session {session_id} into one turn")
+                    result = await run(burst.items)
+            finally:
+                self._close(session_id, burst)
+        except BaseException as e:
+            if not burst.future.done():
+                burst.future.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+            return
+        burst.future.set_result(result)
+
+    def stats(self):
+        return {
+            "window_ms": round(self.window_s * 1000),
+            "open_bursts": len(self._open),
+            "messages": self.messages,
+            "turns": self.turns,
+            "messages_per_turn": round(self.messages / self.turns, 3) if self.turns else 0.0,
+        }
+
+
+coalescer = BurstCoalescer(
+    settings.COALESCE_WINDOW_MS / 1000,
+    max_window_s=settings.COALESCE_MAX_WINDOW_MS / 1000,
+    max_messages=settings.COALESCE_MAX_MESSAGES,
+)
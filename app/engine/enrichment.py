@@ -0,0 +1,122 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Tuple
+
+import httpx
+
+from app.core.config import settings
+from app.core.http import http_client
+from app.db.enrichment_cache import enrichment_cache
+from app.db.identifiers import canonicalize
+from app.db.syndicate_graph import identifier_node_id
+from app.models.schemas import ExtractedIntel
+
+logger = logging.getLogger(__name__)
+
+# Response bodies larger than this are not stored in the `enrichments` row
+MAX_VERDICT_BODY = 4096
+# Length cap of the reason carried on ExtractedIntel.verdicts
+MAX_VERDICT_REASON = 120
+
+
+@dataclass(frozen=True)
+class EnrichmentSource:
+    name: str
+    intel_type: str
+    field: str                      # ExtractedIntel list it enriches
+    ttl: float                      # cache lifetime of a successful verdict
+    url: Callable[[str], str]
+
+
+ENRICHMENT_SOURCES = [
+    EnrichmentSource("upi_verify", "upi", "upi_ids", settings.ENRICHMENT_TTL_UPI_S,
+                     lambda upi: f"https://api.shrtm.nu/upi/verify?id={upi}"),
+    EnrichmentSource("link_reputation", "link", "phishing_links", settings.ENRICHMENT_TTL_LINK_S,
+                     lambda link: "https://ipapi.co/json/"),
+]
+
+
+def _verdict(result) -> Dict[str, Any]:
+    verdict = {"checked_at": datetime.now().isoformat(timespec="seconds")}
+    if isinstance(result, httpx.Response):
+        code = result.status_code
+        verdict["http_status"] = code
+        if code < 400:
+            verdict["status"] = "ok"
+            if len(result.content) <= MAX_VERDICT_BODY:
+                try:
+                    verdict["data"] = result.json()
+                except ValueError:
+                    pass
+        elif code < 500 and code != 429:
+            verdict["status"] = "rejected"
+        else:
+            verdict["status"] = "error"
+    else:
+        verdict["status"] = "error"
+        verdict["error"] = f"{type(result).__name__}: {result}"
+    return verdict
+
+
+def summarize_verdict(source: str, verdict: Dict[str, Any]) -> Dict[str, str]:
+    """
+    What travels on `ExtractedIntel.verdicts` (checkpoints, job payloads, GUVI
+    change keys, reports): status, source and a short reason. The full verdict,
+    response body included, stays in the `enrichments` table.
+    """
+    if "http_status" in verdict:
+        reason = f"HTTP {verdict['http_status']}"
+    else:
+        reason = verdict.get("error", "")
+    return {"status": verdict["status"], "source": source, "reason": reason[:MAX_VERDICT_REASON]}
+
+
+async def enrich(intel: ExtractedIntel) -> Dict[str, Dict[str, Dict]]:
+    """
+    Verdict summaries for every identifier in `intel`, keyed like `ExtractedIntel.verdicts`.
+    Cached verdicts (memory, then SQLite) are reused; only identifiers with no
+    live verdict reach the network, all sharing one ENRICHMENT_BUDGET_S deadline.
+    """
+    wanted: List[Tuple[EnrichmentSource, str, str]] = []
+    for source in ENRICHMENT_SOURCES:
+        for value in dict.fromkeys(getattr(intel, source.field) or []):
+            wanted.append((source, value, canonicalize(source.intel_type, value)))
+    if not wanted:
+        return {}
+
+    cached = await enrichment_cache.get_many(
+        (source.intel_type, canonical, source.name) for source, _, canonical in wanted
+    )
+    verdicts: Dict[str, Dict[str, Dict]] = {}
+    fetch = []
+    for source, value, canonical in wanted:
+        verdict = cached.get((source.intel_type, canonical, source.name))
+        if verdict is not None:
+            summary = summarize_verdict(source.name, verdict)
+            verdicts.setdefault(identifier_node_id(source.intel_type, canonical), {})[source.name] = summary
+        else:
+            fetch.append((source, value, canonical))
+
+    if fetch:
+        budget = http_client.budget(settings.ENRICHMENT_BUDGET_S)
+        results = await asyncio.gather(
+            *[http_client.get(source.url(value), timeout=3.0, budget=budget) for source, value, _ in fetch],
+            return_exceptions=True
+        )
+        fresh = []
+        for (source, value, canonical), res in zip(fetch, results):
+            verdict = _verdict(res)
+            if verdict["status"] == "error":
+                logger.warning(f"Enrichment failed for {source.name}: {verdict.get('error', verdict.get('http_status'))}")
+            else:
+                logger.info(f"Enrichment success: {source.name} ({verdict['http_status']})")
+            summary = summarize_verdict(source.name, verdict)
+            verdicts.setdefault(identifier_node_id(source.intel_type, canonical), {})[source.name] = summary
+            fresh.append(((source.intel_type, canonical, source.name), verdict,
+                          enrichment_cache.ttl_for(source.ttl, verdict["status"])))
+        await enrichment_cache.put_many(fresh)
+
+    logger.info("Enrichment pass", extra={"identifiers": len(wanted), "fetched": len(fetch)})
+    return verdicts
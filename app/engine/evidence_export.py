@@ -0,0 +1,150 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import zipfile
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.db.evidence_exports import export_store, export_queue
+from app.db.job_queue import Job, JobWorkerPool
+from app.db.repository import db
+from app.engine.reports import render_report
+from app.models.schemas import EvidenceExportRequest, ExtractedIntel
+
+logger = logging.getLogger(__name__)
+
+# The persona is per-turn graph state, not stored per session
+EXPORT_PERSONA = "N/A (bulk export)"
+PROGRESS_EVERY = 10
+
+_INTEL_FIELDS = {"upi": "upi_ids", "bank": "bank_details", "link": "phishing_links", "phone": "phone_numbers"}
+
+
+def _intel_from_evidence(evidence: Dict) -> ExtractedIntel:
+    fields = {
+        field: [item["value"] for item in evidence["intel"].get(intel_type, [])]
+        for intel_type, field in _INTEL_FIELDS.items()
+    }
+    return ExtractedIntel(**fields, verdicts=evidence["verdicts"])
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _write_archive(export_id: int, filters: Dict, evidence: Dict[str, Dict], reports: Dict[str, Optional[str]]) -> str:
+    """Zip every report plus manifest.json; published atomically into EXPORTS_DIR."""
+    name = f"evidence_export_{export_id}.zip"
+    path = os.path.join(settings.EXPORTS_DIR, name)
+    tmp_path = path + ".tmp"
+    manifest = {
+        "export_id": export_id,
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "filters": filters,
+        "session_count": len(evidence),
+        "sessions": [],
+    }
+    with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for session_id, ev in evidence.items():
+            filename = reports.get(session_id)
+            entry = {"session_id": session_id, **ev, "report": None}
+            if filename:
+                report_path = os.path.join(settings.REPORTS_DIR, filename)
+                archive.write(report_path, f"reports/{filename}")
+                entry["report"] = {"file": f"reports/{filename}", "sha256": _sha256(report_path)}
+            manifest["sessions"].append(entry)
+        archive.writestr("manifest.json", json.dumps(manifest, indent=2, default=str))
+    os.replace(tmp_path, path)
+    return name
+
+
+def _prune_archives() -> List[str]:
+    """Deletes archives (and leftover .tmp files) older than EXPORT_RETENTION_DAYS; returns archive names."""
+    cutoff = time.time() - settings.EXPORT_RETENTION_DAYS * 86400
+    removed = []
+    for entry in os.scandir(settings.EXPORTS_DIR):
+        if entry.is_file() and entry.name.endswith((".zip", ".tmp")) and entry.stat().st_mtime < cutoff:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                continue
+            if entry.name.endswith(".zip"):
+                removed.append(entry.name)
+    return removed
+
+
+async def prune_exports() -> Dict[str, int]:
+    """Retention policy for EXPORTS_DIR; pruned exports are marked 'expired'."""
+    loop = asyncio.get_event_loop()
+    try:
+        removed = await loop.run_in_executor(None, _prune_archives)
+        await export_store.expire(removed)
+    except Exception as e:
+        logger.error(f"Evidence export pruning failed: {e}")
+        return {"removed": 0}
+    if removed:
+        logger.info(f"Pruned {len(removed)} evidence export archives")
+    return {"removed": len(removed)}
+
+
+async def run_export(export_id: int, request: EvidenceExportRequest):
+    sessions = await db.find_export_sessions(
+        request.since, request.until, request.identifier_type, request.identifier_value,
+        request.component_node_id, limit=settings.EXPORT_MAX_SESSIONS
+    )
+    await export_store.start(export_id, len(sessions))
+    evidence = await db.get_session_evidence(sessions)
+
+    # Reports render in the report process pool; keep it busy, not flooded
+    limit = asyncio.Semaphore(settings.REPORT_WORKERS * 2)
+    reports: Dict[str, Optional[str]] = {}
+
+    async def render(session_id: str):
+        async with limit:
+            try:
+                reports[session_id] = await render_report(
+                    session_id, _intel_from_evidence(evidence[session_id]), EXPORT_PERSONA
+                )
+            except Exception as e:
+                logger.error(f"Export {export_id}: report for {session_id} failed: {e}")
+                reports[session_id] = None
+        if len(reports) % PROGRESS_EVERY == 0:
+            await export_store.progress(export_id, len(reports))
+
+    await asyncio.gather(*[render(sid) for sid in sessions])
+    loop = asyncio.get_event_loop()
+    archive = await loop.run_in_executor(
+        None, _write_archive, export_id, request.model_dump(mode="json"), evidence, reports
+    )
+    size = os.path.getsize(os.path.join(settings.EXPORTS_DIR, archive))
+    await export_store.finish(export_id, archive, size)
+    logger.info(f"Evidence export {export_id}: {len(sessions)} sessions, {size} bytes")
+    await prune_exports()
+
+
+async def create_export(request: EvidenceExportRequest) -> int:
+    export_id = await export_store.create(request.model_dump(mode="json"))
+    await export_queue.enqueue(None, {"export_id": export_id, "filters": request.model_dump(mode="json")})
+    return export_id
+
+
+def build_export_worker_pool() -> JobWorkerPool:
+    """One export at a time per worker process; each export fans out over the report pool."""
+
+    async def handle(job: Job):
+        export_id = job.payload["export_id"]
+        try:
+            await run_export(export_id, EvidenceExportRequest(**job.payload["filters"]))
+        except Exception as e:
+            await export_store.fail(export_id, str(e))
+            raise
+
+    return JobWorkerPool(export_queue, handle, concurrency=1)
@@ -0,0 +1,150 @@
+import re
+from typing import List, Optional, Tuple
+from pydantic import BaseModel
+
+from app.db.identifiers import canonicalize
+
+# --- DE-OBFUSCATION (the cases INTEL_EXTRACTOR_PROMPT lists) ---
+
+_BRACKET_DOT = re.compile(r"\s*[\[\(\{]\s*(?:dot|\.)\s*[\]\)\}]\s*", re.I)
+_WORD_DOT = re.compile(r"\s+dot\s+(?=[a-z0-9])", re.I)
+_BRACKET_AT = re.compile(r"\s*[\[\(\{]\s*(?:at|@)\s*[\]\)\}]\s*", re.I)
+_WORD_AT = re.compile(r"\s+at\s+the\s+rate(?:\s+of)?\s+", re.I)
+_SPACED_AT = re.compile(r"(?<=[A-Za-z0-9])\s+@\s*|\s*@\s+(?=[A-Za-z])")
+_SPACED_SCHEME = re.compile(r"\s*:\s*/\s*/\s*")
+# "o k a x i s", "u-s-e-r", "8-7-6-5": single characters joined by one space/dash
+_SPACED_CHARS = re.compile(r"(?<![A-Za-z0-9])[A-Za-z0-9](?:[ \-][A-Za-z0-9]){3,}(?![A-Za-z0-9])")
+# "98765 43210", "987-654-3210", "1234 5678 9012"
+_DIGIT_GROUPS = re.compile(r"(?<![\d\-])\d{2,}(?:[ \-]\d{2,})+(?![\d\-])")
+
+# --- IDENTIFIER PATTERNS ---
+
+_URL = re.compile(
+    r"(?:https?://|www\.)[^\s<>\"']+"
+    r"|(?<![@\w.])(?:[a-z0-9\-]+\.)+(?:com|in|net|org|xyz|top|info|io|co|online|site|live|app|link|click|me|ly|cc|tk)\b(?:/[^\s<>\"']*)?",
+    re.I,
+)
+_UPI = re.compile(r"(?<![\w.\-])[a-zA-Z0-9][a-zA-Z0-9.\-_]{1,63}@[a-zA-Z][a-zA-Z0-9]{1,31}(?![\w\-]|\.[a-zA-Z])")
+_PHONE = re.compile(r"(?<![\d+])(?:\+?91[\s\-]?|0)?([6-9]\d{9})(?!\d)")
+_IFSC = re.compile(r"\b[A-Za-z]{4}0[A-Za-z0-9]{6}\b")
+_ACCOUNT = re.compile(r"(?<!\d)\d{9,18}(?!\d)")
+_ACCOUNT_CONTEXT = re.compile(r"(?:account|a/c|acct|acc\.?\s*no)\W{0,20}$", re.I)
+
+# Fragments that suggest an identifier we might have failed to parse
+_RESIDUE_HINT = re.compile(r"\d{4,}|@|https?|www|://|\bdot\b", re.I)
+
+SUSPICIOUS_KEYWORDS = (
+    "urgent", "immediately", "blocked", "suspended", "verify", "kyc", "otp", "lottery",
+    "prize", "refund", "penalty", "arrest", "police", "expire", "expiring", "last chance",
+    "winner", "cashback", "pin", "cvv", "password", "link", "click",
+)
+_KEYWORDS = re.compile(r"\b(" + "|".join(re.escape(k) for k in SUSPICIOUS_KEYWORDS) + r")\b", re.I)
+
+
+class LocalExtraction(BaseModel):
+    upi_ids: List[str] = []
+    bank_details: List[str] = []
+    phishing_links: List[str] = []
+    phone_numbers: List[str] = []
+    suspicious_keywords: List[str] = []
+    agent_notes: Optional[str] = None
+    # Anything identifier-like in the message at all?
+    has_candidates: bool = False
+    # Every identifier-like fragment was resolved by the patterns
+    confident: bool = False
+
+
+def deobfuscate(text: str, spoken_dots: bool = True) -> str:
+    text = _BRACKET_DOT.sub(".", text)
+    if spoken_dots:
+        text = _WORD_DOT.sub(".", text)
+    text = _BRACKET_AT.sub("@", text)
+    text = _WORD_AT.sub("@", text)
+    text = _SPACED_AT.sub("@", text)
+    text = _SPACED_SCHEME.sub("://", text)
+    text = _SPACED_CHARS.sub(lambda m: re.sub(r"[ \-]", "", m.group(0)), text)
+    text = _DIGIT_GROUPS.sub(lambda m: re.sub(r"[ \-]", "", m.group(0)), text)
+    return text
+
+
+def _unique(intel_type: str, values: List[str]) -> List[str]:
+    seen, out = set(), []
+    for v in values:
+        key = canonicalize(intel_type, v)
+        if key not in seen:
+            seen.add(key)
+            out.append(v)
+    return out
+
+
+def pre_extract(message: str) -> LocalExtraction:
+    """
+    Deterministic first pass over one scammer message: compiled patterns for
+    UPI handles, Indian phone numbers, IFSC/account numbers and URLs, applied
+    after de-obfuscation. Cheap enough to run on every turn.
+
+    A link that only exists because a spoken " dot " was rewritten ("Visit
+    Mr. Sharma dot com") is not reported and leaves the pass unconfident,
+    so the LLM extractor decides whether it is one.
+    """
+    text = deobfuscate(message or "")
+    literal_links = {
+        canonicalize("link", m.group(0).rstrip(".,;)!?"))
+        for m in _URL.finditer(deobfuscate(message or "", spoken_dots=False))
+    }
+    spoken = False
+    spans: List[Tuple[int, int]] = []
+
+    def claim(m):
+        spans.append(m.span())
+
+    def free(m) -> bool:
+        a, b = m.span()
+        return all(b <= s or a >= e for s, e in spans)
+
+    links = []
+    for m in _URL.finditer(text):
+        link = m.group(0).rstrip(".,;)!?")
+        if canonicalize("link", link) in literal_links:
+            links.append(link)
+        else:
+            spoken = True
+        claim(m)
+    upis = []
+    for m in _UPI.finditer(text):
+        if free(m):
+            upis.append(m.group(0))
+            claim(m)
+    banks = []
+    for m in _IFSC.finditer(text):
+        if free(m):
+            banks.append(m.group(0).upper())
+            claim(m)
+    phones = []
+    for m in _ACCOUNT.finditer(text):
+        if not free(m):
+            continue
+        is_phone = _PHONE.fullmatch(m.group(0)) and not _ACCOUNT_CONTEXT.search(text[:m.start()])
+        if not is_phone:
+            banks.append(m.group(0))
+            claim(m)
+    for m in _PHONE.finditer(text):
+        if free(m):
+            phones.append(m.group(1))
+            claim(m)
+
+    residue = list(text)
+    for a, b in spans:
+        residue[a:b] = " " * (b - a)
+    leftover = _RESIDUE_HINT.search("".join(residue))
+
+    found = bool(links or upis or banks or phones)
+    return LocalExtraction(
+        upi_ids=_unique("upi", upis),
+        bank_details=_unique("bank", banks),
+        phishing_links=_unique("link", links),
+        phone_numbers=_unique("phone", phones),
+        suspicious_keywords=sorted({k.lower() for k in _KEYWORDS.findall(message or "")}),
+        has_candidates=found or spoken or leftover is not None,
+        confident=found and not spoken and leftover is None,
+    )
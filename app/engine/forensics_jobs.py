@@ -0,0 +1,39 @@
+import logging
+
+from app.db.job_queue import Job, JobWorkerPool, forensics_queue
+from app.db.session_lock import session_locks
+from app.engine.graph import build_forensics_workflow
+from app.models.schemas import ExtractedIntel
+
+logger = logging.getLogger(__name__)
+
+# Keys the forensics stages produce that the next turn should see
+FORENSICS_RESULT_KEYS = ["intel", "report_url", "syndicate_match_score", "is_returning_scammer", "forensics_timings"]
+
+
+def build_forensics_worker_pool(graph) -> JobWorkerPool:
+    """
+    Worker pool for REPLY_FIRST_MODE. Each job replays the post-detection
+    stages for one turn, then folds the results back into the session's
+    checkpoint (`intel` merges through its reducer, so a newer turn that
+    already ran is never clobbered).
+    """
+    forensics_graph = build_forensics_workflow().compile()
+
+    async def handle(job: Job):
+        state = dict(job.payload)
+        state["intel"] = ExtractedIntel(**(state.get("intel") or {}))
+        state.setdefault("history", [])
+        result = await forensics_graph.ainvoke(state)
+
+        config = {"configurable": {"thread_id": job.session_id}}
+        # Never fork the thread under a turn that is running right now
+        async with session_locks.hold(job.session_id):
+            await graph.aupdate_state(
+                config,
+                {key: result[key] for key in FORENSICS_RESULT_KEYS if key in result},
+                as_node="enqueue_forensics"
+            )
+        logger.info(f"Forensics job #{job.id} done for session {job.session_id}")
+
+    return JobWorkerPool(forensics_queue, handle)
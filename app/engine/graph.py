@@ -1,59 +1,111 @@
-from langgraph.graph import StateGraph, END
+from langgraph.graph import StateGraph, START, END
 from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+from app.core.config import settings
 from app.engine.nodes import (
-    AgentState, load_history, detect_scam, 
+    AgentState, load_history, detect_scam, detect_scam_combined,
     extract_intel, save_state, finalize_report,
     enrich_intel, fingerprint_scammer, submit_to_blacklist,
-    guvi_reporting
+    guvi_reporting, enqueue_forensics
 )
 
+# Independent post-detection branches; they run concurrently and join at persist_state
+FORENSICS_BRANCHES = [
+    "enrich_intelligence",
+    "fingerprint_scammer",
+    "submit_to_blacklist",
+    "generate_takedown_report",
+]
+
 def route_after_detection(state: AgentState):
     """
     Dynamic routing for True Agency:
-    - If High Priority Intel detected: Skip small talk, go straight to enrichment.
+    - If High Priority Intel detected: Skip small talk, fan out straight to the forensics branches.
     - If Scam detected: Go to forensics.
     - Otherwise: Persist state and wait for next message.
+
+    In combined mode the forensics are already in hand (`combined_intel`), so
+    high-priority turns still pass through extract_forensics: it only merges.
     """
+    if state.get("scam_detected") and state.get("combined_intel") is not None:
+        return "extract_forensics"
     if state.get("high_priority"):
-        return "enrich_intelligence"
+        return FORENSICS_BRANCHES
     if state.get("scam_detected"):
         return "extract_forensics"
     return "persist_state"
 
-def build_workflow():
+def build_workflow(combined: bool = None, reply_first: bool = None):
+    """
+    combined: one structured LLM call per turn for detection + extraction
+    (defaults to settings.COMBINED_LLM_MODE).
+    reply_first: stop after persisting the reply and enqueue the forensics
+    as a durable job (defaults to settings.REPLY_FIRST_MODE).
+
+    extract_forensics ─┬─ enrich_intelligence ──────┬─ persist_state ─ guvi_reporting
+                       ├─ fingerprint_scammer ──────┤
+                       ├─ submit_to_blacklist ──────┤
+                       └─ generate_takedown_report ─┘
+    Per-turn forensics time is the slowest branch, not the sum of all of them.
+    """
+    if combined is None:
+        combined = settings.COMBINED_LLM_MODE
+    if reply_first is None:
+        reply_first = settings.REPLY_FIRST_MODE
     workflow = StateGraph(AgentState)
 
     workflow.add_node("load_history", load_history)
-    workflow.add_node("process_interaction", detect_scam)
-    workflow.add_node("extract_forensics", extract_intel)
-    workflow.add_node("enrich_intelligence", enrich_intel)
-    workflow.add_node("fingerprint_scammer", fingerprint_scammer)
-    workflow.add_node("submit_to_blacklist", submit_to_blacklist)
-    workflow.add_node("generate_takedown_report", finalize_report)
+    workflow.add_node("process_interaction", detect_scam_combined if combined else detect_scam)
     workflow.add_node("persist_state", save_state)
-    workflow.add_node("guvi_reporting", guvi_reporting)
-
     workflow.set_entry_point("load_history")
-    
     workflow.add_edge("load_history", "process_interaction")
+
+    if reply_first:
+        # load_history -> process_interaction -> persist_state -> enqueue_forensics
+        workflow.add_node("enqueue_forensics", enqueue_forensics)
+        workflow.add_edge("process_interaction", "persist_state")
+        workflow.add_edge("persist_state", "enqueue_forensics")
+        workflow.add_edge("enqueue_forensics", END)
+        return workflow
+
+    _add_forensics_nodes(workflow)
     
     # Conditional Edge: Decide path based on detection
     workflow.add_conditional_edges(
         "process_interaction",
         route_after_detection,
-        {
-            "extract_forensics": "extract_forensics",
-            "enrich_intelligence": "enrich_intelligence",
-            "persist_state": "persist_state"
-        }
+        ["extract_forensics", "persist_state"] + FORENSICS_BRANCHES
     )
     
-    workflow.add_edge("extract_forensics", "enrich_intelligence")
-    workflow.add_edge("enrich_intelligence", "fingerprint_scammer")
-    workflow.add_edge("fingerprint_scammer", "submit_to_blacklist")
-    workflow.add_edge("submit_to_blacklist", "generate_takedown_report")
-    workflow.add_edge("generate_takedown_report", "persist_state")
+    # Fan-out ...
+    for branch in FORENSICS_BRANCHES:
+        workflow.add_edge("extract_forensics", branch)
+    # ... and join: persist_state waits for every branch
+    workflow.add_edge(FORENSICS_BRANCHES, "persist_state")
     workflow.add_edge("persist_state", "guvi_reporting")
     workflow.add_edge("guvi_reporting", END)
 
-    return workflow
\ No newline at end of file
+    return workflow
+
+def build_forensics_workflow():
+    """
+    The post-detection stages on their own, run by forensics jobs in reply-first
+    mode. Jobs are only enqueued for scam turns, so routing never picks persist_state.
+    """
+    workflow = StateGraph(AgentState)
+    _add_forensics_nodes(workflow)
+
+    workflow.add_conditional_edges(START, route_after_detection, ["extract_forensics"] + FORENSICS_BRANCHES)
+    for branch in FORENSICS_BRANCHES:
+        workflow.add_edge("extract_forensics", branch)
+    workflow.add_edge(FORENSICS_BRANCHES, "guvi_reporting")
+    workflow.add_edge("guvi_reporting", END)
+
+    return workflow
+
+def _add_forensics_nodes(workflow: StateGraph):
+    workflow.add_node("extract_forensics", extract_intel)
+    workflow.add_node("enrich_intelligence", enrich_intel)
+    workflow.add_node("fingerprint_scammer", fingerprint_scammer)
+    workflow.add_node("submit_to_blacklist", submit_to_blacklist)
+    workflow.add_node("generate_takedown_report", finalize_report)
+    workflow.add_node("guvi_reporting", guvi_reporting)
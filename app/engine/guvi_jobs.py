@@ -0,0 +1,39 @@
+import json
+import hashlib
+import logging
+
+from app.core.config import settings
+from app.db.callback_outbox import guvi_outbox
+from app.db.job_queue import Job, JobWorkerPool
+from app.engine.tools import build_guvi_payload, post_guvi_payload
+from app.models.schemas import ExtractedIntel
+
+logger = logging.getLogger(__name__)
+
+
+def callback_change_key(payload: dict) -> str:
+    """
+    What counts as a change worth re-sending: the extracted intelligence and
+    the turn milestone. agentNotes is LLM prose that differs every turn, and
+    the exact count only matters once it crosses a GUVI_TURN_MILESTONE step.
+    """
+    key = {
+        "scamDetected": payload["scamDetected"],
+        "extractedIntelligence": payload["extractedIntelligence"],
+        "milestone": payload["totalMessagesExchanged"] // max(1, settings.GUVI_TURN_MILESTONE),
+    }
+    return hashlib.sha1(json.dumps(key, sort_keys=True).encode()).hexdigest()
+
+
+async def stage_guvi_callback(session_id: str, turn_count: int, intel: ExtractedIntel) -> bool:
+    payload = build_guvi_payload(session_id, True, turn_count, intel)
+    return await guvi_outbox.stage(session_id, callback_change_key(payload), payload)
+
+
+def build_guvi_worker_pool() -> JobWorkerPool:
+    """Background delivery of staged GUVI callbacks, retried from the outbox table."""
+
+    async def handle(job: Job):
+        await post_guvi_payload(job.payload["callback"])
+
+    return JobWorkerPool(guvi_outbox, handle, concurrency=settings.GUVI_CALLBACK_WORKERS)
@@ -1,7 +1,8 @@
 import json
+import time
 import logging
-import httpx
-from typing import Dict, TypedDict, Any, List, Optional
+import functools
+from typing import Annotated, Dict, TypedDict, Any, List, Optional
 from pydantic import BaseModel, Field
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
@@ -14,6 +15,7 @@ from tenacity import (
 
 from app.core.config import settings
 from app.db.repository import db
+from app.db.job_queue import forensics_queue
 from app.db.vector_store import vector_db
 from app.engine.prompts import (
     RAJESH_SYSTEM_PROMPT, 
@@ -22,7 +24,12 @@ from app.engine.prompts import (
     SCAM_DETECTOR_PROMPT,
     INTEL_EXTRACTOR_PROMPT
 )
-from app.engine.tools import generate_scam_report
+from app.engine.reports import render_report
+from app.engine.extractor import pre_extract
+from app.engine.enrichment import enrich
+from app.engine.blacklist import submit
+from app.engine.response_cache import detector_cache
+from app.db.identifiers import canonicalize
 from app.models.schemas import ExtractedIntel
 
 # Setup structured logging
@@ -51,6 +58,24 @@ class IntelResult(BaseModel):
     suspicious_keywords: List[str] = []
     agent_notes: Optional[str] = None
 
+# Single-call schema for COMBINED_LLM_MODE: reply and forensics in one round trip
+class CombinedResult(DetectionResult, IntelResult):
+    pass
+
+def _intel_reducer(left: Optional[ExtractedIntel], right: Optional[ExtractedIntel]) -> ExtractedIntel:
+    """
+    Reducer for `intel`: parallel forensics branches may each write it in the
+    same step. Union-merge is idempotent, so full-state returns are harmless.
+    """
+    if right is None:
+        return left or ExtractedIntel()
+    if left is None or left is right:
+        return right
+    return _merge_intel(left, right)
+
+def _merge_dicts(left: Optional[Dict], right: Optional[Dict]) -> Dict:
+    return {**(left or {}), **(right or {})}
+
 class AgentState(TypedDict):
     session_id: str
     user_message: str
@@ -60,13 +85,15 @@ class AgentState(TypedDict):
     scammer_sentiment: int
     selected_persona: str
     agent_response: str
-    intel: ExtractedIntel
+    intel: Annotated[ExtractedIntel, _intel_reducer]
     is_returning_scammer: bool
     syndicate_match_score: float
     generate_report: bool
     report_url: Optional[str]
     turn_count: int
     human_intervention: bool = False # Flag for manual hand-off
+    combined_intel: Optional[Dict[str, Any]] # IntelResult from detect_scam_combined, this turn only
+    forensics_timings: Annotated[Dict[str, float], _merge_dicts] # latest latency (ms) per forensics branch
 
 # Initialize LLMs
 llm = ChatGoogleGenerativeAI(
@@ -78,6 +105,7 @@ llm = ChatGoogleGenerativeAI(
 
 structured_detector = llm.with_structured_output(DetectionResult)
 structured_extractor = llm.with_structured_output(IntelResult)
+structured_combined = llm.with_structured_output(CombinedResult)
 
 @retry(
     stop=stop_after_attempt(5),
@@ -97,6 +125,29 @@ async def _call_detector(messages):
 async def _call_extractor(messages):
     return await structured_extractor.ainvoke(messages)
 
+@retry(
+    stop=stop_after_attempt(5),
+    wait=wait_exponential(multiplier=1, min=2, max=10),
+    retry=retry_if_exception_type(Exception),
+    reraise=True
+)
+async def _call_combined(messages):
+    return await structured_combined.ainvoke(messages)
+
+def forensics_branch(func):
+    """
+    Marks a node that runs in the parallel forensics fan-out. Branch nodes
+    return only the keys they own (parallel writes to one key need a reducer),
+    and their latency is recorded in `forensics_timings`.
+    """
+    @functools.wraps(func)
+    async def wrapper(state: AgentState) -> Dict[str, Any]:
+        started = time.perf_counter()
+        update = await func(state) or {}
+        update["forensics_timings"] = {func.__name__: round((time.perf_counter() - started) * 1000, 1)}
+        return update
+    return wrapper
+
 async def load_history(state: AgentState) -> AgentState:
     try:
         # Await async DB calls
@@ -111,27 +162,26 @@ async def load_history(state: AgentState) -> AgentState:
         state["scam_detected"] = False
     return state
 
-async def finalize_report(state: AgentState) -> AgentState:
+@forensics_branch
+async def finalize_report(state: AgentState) -> Dict[str, Any]:
     """
     Generates the PDF report if the user requested it and intel exists.
     """
+    report_url = None
     if state.get("generate_report") and state.get("scam_detected"):
         try:
-            # Report generation is sync (file IO), we could run in threadpool if needed
-            filename = generate_scam_report(
+            # Rendered in the report process pool; an unchanged session reuses its file
+            filename = await render_report(
                 state["session_id"], 
                 state["intel"], 
                 state.get("selected_persona", "RAJESH")
             )
-            state["report_url"] = f"/reports/{filename}"
-            logger.info(f"Report generated: {filename}")
+            report_url = f"/reports/{filename}"
+            logger.info(f"Report ready: {filename}")
         except Exception as e:
             logger.error(f"Report Generation Error: {e}")
-            state["report_url"] = None
-    else:
-        state["report_url"] = None
         
-    return state
+    return {"report_url": report_url}
 
 async def detect_scam(state: AgentState) -> AgentState:
     """
@@ -141,6 +191,29 @@ async def detect_scam(state: AgentState) -> AgentState:
     3. Handles human hand-off (Panic Button)
     4. Generates response based on persona
     """
+    return await _detect(state, combined=False)
+
+async def detect_scam_combined(state: AgentState) -> AgentState:
+    """
+    Combined-mode Core Node: same as detect_scam, but a single structured call
+    also returns this message's forensics. extract_intel consumes the stashed
+    `combined_intel` instead of making its own LLM call.
+    """
+    return await _detect(state, combined=True)
+
+def _detector_cacheable(state: AgentState) -> bool:
+    """
+    Only generic script lines are cached: never under human intervention, and
+    never when the message carries identifiers the reply might need to address.
+    """
+    if not settings.DETECTOR_CACHE_ENABLED or state.get("human_intervention"):
+        return False
+    return not pre_extract(state["user_message"]).has_candidates
+
+async def _detect(state: AgentState, combined: bool) -> AgentState:
+    # Never carry a previous turn's combined extraction forward
+    state["combined_intel"] = None
+
     # 0. HUMAN HAND-OFF LOGIC (The Panic Button)
     intervention = await db.get_intervention_state(state["session_id"])
     if intervention.get("human_intervention"):
@@ -196,6 +269,14 @@ async def detect_scam(state: AgentState) -> AgentState:
         system_instructions += f"\nSTAY IN PERSONA: {current_persona}. DO NOT SWITCH."
     else:
         system_instructions += "\nSELECT THE BEST PERSONA to start with based on the scammer's first message."
+
+    if combined:
+        system_instructions += f"""
+
+    --- FORENSICS (same response) ---
+    Also fill the extraction fields from the scammer's LATEST message only.
+    {INTEL_EXTRACTOR_PROMPT}
+    """
     
     messages = [SystemMessage(content=system_instructions)]
     for msg in state["history"][-5:]:
@@ -204,7 +285,25 @@ async def detect_scam(state: AgentState) -> AgentState:
     messages.append(HumanMessage(content=state["user_message"]))
     
     try:
-        result = await _call_detector(messages)
+        if combined:
+            result = await _call_combined(messages)
+            state["combined_intel"] = result.model_dump(include=set(IntelResult.model_fields))
+        else:
+            cache_key = None
+            if _detector_cacheable(state):
+                cache_key = detector_cache.key_for(
+                    state["user_message"],
+                    state.get("selected_persona", "RAJESH"),
+                    state.get("scammer_sentiment", 5),
+                    state["history"]
+                )
+            result = detector_cache.get(cache_key) if cache_key else None
+            if result is None:
+                result = await _call_detector(messages)
+                if cache_key:
+                    detector_cache.put(cache_key, result)
+            else:
+                logger.info("Detector cache hit, skipping LLM detector")
         if not state.get("scam_detected"):
             state["scam_detected"] = result.scam_detected
             
@@ -230,90 +329,131 @@ async def detect_scam(state: AgentState) -> AgentState:
         
     return state
 
+def _merge_intel(current_intel: ExtractedIntel, *results) -> ExtractedIntel:
+    """Cumulative merge of one or more extraction results into the session intel."""
+    def merge_unique(intel_type, old_list, *new_lists):
+        merged, seen = [], set()
+        for item in (old_list or []) + [v for new in new_lists for v in (new or [])]:
+            key = canonicalize(intel_type, item) if intel_type else item.lower()
+            if key not in seen:
+                seen.add(key)
+                merged.append(item)
+        return merged
+
+    return ExtractedIntel(
+        upi_ids=merge_unique("upi", current_intel.upi_ids, *[r.upi_ids for r in results]),
+        bank_details=merge_unique("bank", current_intel.bank_details, *[r.bank_details for r in results]),
+        phishing_links=merge_unique("link", current_intel.phishing_links, *[r.phishing_links for r in results]),
+        phone_numbers=merge_unique("phone", current_intel.phone_numbers, *[r.phone_numbers for r in results]),
+        suspicious_keywords=merge_unique(None, current_intel.suspicious_keywords, *[r.suspicious_keywords for r in results]),
+        agent_notes=next((r.agent_notes for r in results if r.agent_notes), None) or current_intel.agent_notes,
+        verdicts=_merge_verdicts(current_intel.verdicts, *[getattr(r, "verdicts", None) for r in results])
+    )
+
+def _merge_verdicts(*verdict_maps) -> Dict[str, Dict[str, Dict]]:
+    """Per identifier, per source: the later verdict wins."""
+    merged: Dict[str, Dict[str, Dict]] = {}
+    for verdicts in verdict_maps:
+        for node_id, by_source in (verdicts or {}).items():
+            merged.setdefault(node_id, {}).update(by_source)
+    return merged
+
+def _queue_intel_rows(session_id: str, *results):
+    """Queue this turn's identifiers once each (write-behind, see HoneyDB.queue_intel)."""
+    seen = set()
+    for result in results:
+        for intel_type, values in (
+            ("upi", result.upi_ids),
+            ("bank", result.bank_details),
+            ("link", result.phishing_links),
+            ("phone", result.phone_numbers),
+        ):
+            for value in values:
+                key = (intel_type, canonicalize(intel_type, value))
+                if key not in seen:
+                    seen.add(key)
+                    db.queue_intel(session_id, intel_type, value)
+
 async def extract_intel(state: AgentState) -> AgentState:
     """
-    Upgraded LLM-based extraction to catch obfuscated details.
+    Two-stage extraction: deterministic patterns first, the LLM only when the
+    message has identifier-like fragments the patterns could not resolve.
     Merges with existing intelligence to maintain cumulative state.
     """
     if not state["scam_detected"]:
         return state
 
     try:
-        # Use LLM for deeper forensics
-        messages = [
-            SystemMessage(content=INTEL_EXTRACTOR_PROMPT),
-            HumanMessage(content=f"EXTRACT FROM THIS MESSAGE: {state['user_message']}")
-        ]
-        llm_result = await _call_extractor(messages)
-        
+        results = []
+        local_result = pre_extract(state["user_message"])
+        results.append(local_result)
+
+        if state.get("combined_intel") is not None:
+            # COMBINED_LLM_MODE: the detector call already extracted this message
+            results.append(IntelResult(**state["combined_intel"]))
+            state["combined_intel"] = None
+        elif not settings.LOCAL_EXTRACTION_GATE or (local_result.has_candidates and not local_result.confident):
+            # Use LLM for deeper forensics
+            messages = [
+                SystemMessage(content=INTEL_EXTRACTOR_PROMPT),
+                HumanMessage(content=f"EXTRACT FROM THIS MESSAGE: {state['user_message']}")
+            ]
+            results.append(await _call_extractor(messages))
+        else:
+            logger.info("Local extraction sufficient, skipping LLM extractor", extra={
+                "has_candidates": local_result.has_candidates
+            })
+            # No LLM notes this turn: keep the GUVI agentNotes populated from the detector output
+            if not (state.get("intel") and state["intel"].agent_notes):
+                local_result.agent_notes = _detector_notes(state, local_result.suspicious_keywords)
+
         # Merge logic to ensure cumulative intelligence (MANDATORY for high score)
-        current_intel = state.get("intel", ExtractedIntel())
-        
-        # Helper to merge unique items
-        def merge_unique(old_list, new_list):
-            return list(set((old_list or []) + (new_list or [])))
-
-        merged_intel = ExtractedIntel(
-            upi_ids=merge_unique(current_intel.upi_ids, llm_result.upi_ids),
-            bank_details=merge_unique(current_intel.bank_details, llm_result.bank_details),
-            phishing_links=merge_unique(current_intel.phishing_links, llm_result.phishing_links),
-            phone_numbers=merge_unique(current_intel.phone_numbers, llm_result.phone_numbers),
-            suspicious_keywords=merge_unique(current_intel.suspicious_keywords, llm_result.suspicious_keywords),
-            agent_notes=llm_result.agent_notes or current_intel.agent_notes
-        )
-        
-        state["intel"] = merged_intel
+        state["intel"] = _merge_intel(state.get("intel") or ExtractedIntel(), *results)
         
         # Save to DB for syndicate analysis (MANDATORY FOR GRAPH)
-        for upi in llm_result.upi_ids:
-            await db.save_intel(state["session_id"], "upi", upi)
-        for bank in llm_result.bank_details:
-            await db.save_intel(state["session_id"], "bank", bank)
-        for link in llm_result.phishing_links:
-            await db.save_intel(state["session_id"], "link", link)
-        for phone in llm_result.phone_numbers:
-            await db.save_intel(state["session_id"], "phone", phone)
+        # Queued write-behind: flushed with save_state's rows in one transaction
+        _queue_intel_rows(state["session_id"], *results)
         
     except Exception as e:
         logger.error(f"Extraction Error: {e}")
     return state
 
-async def enrich_intel(state: AgentState) -> AgentState:
+def _detector_notes(state: AgentState, keywords: List[str]) -> str:
+    """Deterministic agent notes for turns the LLM extractor skipped."""
+    notes = (f"Scam engagement via {state.get('selected_persona') or 'default'} persona; "
+             f"scammer frustration {state.get('scammer_sentiment') or 5}/10.")
+    if state.get("high_priority"):
+        notes += " Message flagged high-priority (bank details, OTP or password involved)."
+    if keywords:
+        notes += f" Red-flag terms: {', '.join(keywords)}."
+    return notes
+
+@forensics_branch
+async def enrich_intel(state: AgentState) -> Dict[str, Any]:
     """
-    Enriches extracted intel with metadata using ASYNC calls in parallel.
+    Enriches extracted intel with verdicts from external sources, in parallel.
+    Verdicts are cached per identifier, so only newly extracted ones cost a call.
     """
     if not state["scam_detected"] or not state["intel"]:
-        return state
+        return {}
 
-    intel = state["intel"]
-    tasks = []
+    try:
+        verdicts = await enrich(state["intel"])
+    except Exception as e:
+        logger.warning(f"Enrichment pass failed: {e}")
+        return {}
 
-    async with httpx.AsyncClient() as client:
-        # 1. Verify UPIs in parallel
-        if intel.upi_ids:
-            for upi in intel.upi_ids:
-                tasks.append(client.get(f"https://api.shrtm.nu/upi/verify?id={upi}", timeout=3.0))
-        
-        # 2. Check Phishing Links in parallel
-        if intel.phishing_links:
-            for link in intel.phishing_links:
-                tasks.append(client.get(f"https://ipapi.co/json/", timeout=3.0))
-
-        if tasks:
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-            for res in results:
-                if isinstance(res, httpx.Response):
-                    if res.status_code == 200:
-                        logger.info(f"Enrichment success: {res.url}")
-                elif isinstance(res, Exception):
-                    logger.warning(f"Enrichment task failed: {res}")
-        
-    return state
+    if all(state["intel"].verdicts.get(k) == v for k, v in verdicts.items()):
+        return {}
+    # Merged into the session intel by _intel_reducer
+    return {"intel": ExtractedIntel(verdicts=verdicts)}
 
-async def fingerprint_scammer(state: AgentState) -> AgentState:
+@forensics_branch
+async def fingerprint_scammer(state: AgentState) -> Dict[str, Any]:
     """
     Uses ChromaDB to fingerprint scammers based on BEHAVIORAL patterns.
     """
+    update = {}
     try:
         behavioral_profile = f"""
         INTENT: {state.get('scam_detected', False)}
@@ -322,8 +462,8 @@ async def fingerprint_scammer(state: AgentState) -> AgentState:
         IDENTIFIERS: {','.join(state['intel'].upi_ids + state['intel'].phone_numbers)}
         """
         
-        # Vector DB search is sync, but we call it from async node
-        search_results = vector_db.search_similar(behavioral_profile)
+        # Runs on the vector store's executor, never on the event loop
+        search_results = await vector_db.search_similar_async(behavioral_profile, exclude_session=state["session_id"])
         
         if search_results["distances"] and search_results["distances"][0]:
             distance = search_results["distances"][0][0]
@@ -337,16 +477,17 @@ async def fingerprint_scammer(state: AgentState) -> AgentState:
             elif match_score > 0.7:
                 syndicate_score = 0.8 # Suspected syndicate hub
             
-            state["syndicate_match_score"] = syndicate_score
+            update["syndicate_match_score"] = syndicate_score
             
             if match_score > 0.85:
-                state["is_returning_scammer"] = True
+                update["is_returning_scammer"] = True
                 logger.info("🕵️ SYNDICATE PATTERN MATCHED", extra={
                     "match_score": match_score,
                     "profile": behavioral_profile
                 })
         
-        vector_db.add_fingerprint(
+        # Batched upsert on a short timer (one fingerprint per session)
+        vector_db.queue_fingerprint(
             state["session_id"], 
             behavioral_profile, 
             {"original_message": state["user_message"][:100]}
@@ -354,54 +495,65 @@ async def fingerprint_scammer(state: AgentState) -> AgentState:
     except Exception as e:
         logger.error(f"Fingerprinting Error: {e}")
     
-    return state
+    return update
 
 async def save_state(state: AgentState) -> AgentState:
     try:
-        await db.add_message(state["session_id"], "user", state["user_message"])
+        db.queue_message(state["session_id"], "user", state["user_message"])
         if state["agent_response"]:
-            await db.add_message(state["session_id"], "assistant", state["agent_response"])
+            db.queue_message(state["session_id"], "assistant", state["agent_response"])
         
         if state.get("scam_detected"):
-            await db.set_scam_flag(state["session_id"], True)
+            db.queue_scam_flag(state["session_id"], True)
             logger.info(f"Session {state['session_id']} Sentiment: {state['scammer_sentiment']}")
             
+        # Only read-back of the turn: waits for this session's queued rows
         state["turn_count"] = await db.get_turn_count(state["session_id"])
     except Exception as e:
         logger.error(f"Error saving state: {e}")
     return state
 
-async def submit_to_blacklist(state: AgentState) -> AgentState:
+@forensics_branch
+async def submit_to_blacklist(state: AgentState) -> Dict[str, Any]:
     """
     Simulates a 'One-Click Takedown' by verifying and reporting malicious intel in parallel.
     Instead of just logging, it simulates a real security API interaction.
     """
     if not state["scam_detected"] or not state["intel"]:
-        return state
+        return {}
 
     # REALISTIC TAKEDOWN SIMULATION
-    intel = state["intel"]
-    targets = []
-    if intel.upi_ids: targets.extend([("UPI", u) for u in intel.upi_ids])
-    if intel.phishing_links: targets.extend([("URL", l) for l in intel.phishing_links])
-    if intel.phone_numbers: targets.extend([("PHONE", p) for p in intel.phone_numbers])
+    # The ledger drops identifiers already reported from any session, so
+    # repeat turns cost nothing and new ones go out in batched POSTs.
+    try:
+        accepted = await submit(state["session_id"], state["intel"])
+        if accepted:
+            logger.info("Takedown submissions", extra={"accepted": accepted})
+    except Exception as e:
+        logger.warning(f"🛡️ Takedown submission failed: {e}")
+        
+    return {}
 
-    if not targets:
-        return state
+# State a forensics job needs to replay the post-detection stages (REPLY_FIRST_MODE)
+FORENSICS_JOB_KEYS = [
+    "session_id", "user_message", "agent_response", "scam_detected", "high_priority",
+    "scammer_sentiment", "selected_persona", "generate_report", "turn_count", "combined_intel",
+]
 
-    async with httpx.AsyncClient() as client:
-        tasks = [
-            client.post("https://httpbin.org/post", json={"threat": val, "type": t}, timeout=3.0)
-            for t, val in targets
-        ]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        for res in results:
-            if isinstance(res, httpx.Response):
-                logger.info(f"🛡️ Takedown request successful for {res.url}")
-            elif isinstance(res, Exception):
-                logger.warning(f"🛡️ Takedown request failed: {res}")
-        
-    return state
+async def enqueue_forensics(state: AgentState) -> Dict[str, Any]:
+    """
+    Reply-first mode: the reply is already persisted, so hand this turn's
+    forensics to the durable job queue instead of running them inline.
+    """
+    if not state.get("scam_detected"):
+        return {}
+    payload = {key: state.get(key) for key in FORENSICS_JOB_KEYS}
+    payload["intel"] = (state.get("intel") or ExtractedIntel()).model_dump()
+    try:
+        await forensics_queue.enqueue(state["session_id"], payload)
+    except Exception as e:
+        logger.error(f"Failed to enqueue forensics job: {e}")
+    return {}
 
 async def guvi_reporting(state: AgentState) -> AgentState:
     """
@@ -409,19 +561,21 @@ async def guvi_reporting(state: AgentState) -> AgentState:
     This is hard-linked into the graph to ensure every session is scored.
     Strictly follows rules.txt requirements.
     """
-    from app.engine.tools import send_guvi_callback
+    from app.engine.guvi_jobs import stage_guvi_callback
     
     # Report as soon as scam is detected to ensure we are scored.
     # The platform will track 'totalMessagesExchanged' to measure depth.
+    # Staged in the outbox, not sent inline: a background worker delivers it
+    # after the debounce window, and only if intel or the turn milestone changed.
     if state.get("scam_detected"):
         try:
-            logger.info(f"📊 MANDATORY CALLBACK: reporting session {state['session_id']} (Total turns: {state.get('turn_count')})")
-            await send_guvi_callback(
+            staged = await stage_guvi_callback(
                 state["session_id"],
-                True, # scamDetected = true
                 state.get("turn_count", 1), # totalMessagesExchanged
                 state.get("intel", ExtractedIntel()) # extractedIntelligence
             )
+            if staged:
+                logger.info(f"📊 MANDATORY CALLBACK: staged for session {state['session_id']} (Total turns: {state.get('turn_count')})")
         except Exception as e:
             logger.error(f"❌ GUVI Reporting Failed: {e}")
     
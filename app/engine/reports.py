@@ -0,0 +1,127 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.engine.tools import generate_scam_report
+from app.models.schemas import ExtractedIntel
+
+logger = logging.getLogger(__name__)
+
+_pool: Optional[ProcessPoolExecutor] = None
+_inflight: Dict[str, asyncio.Future] = {}
+_last_prune = 0.0
+
+
+def report_key(session_id: str, intel: ExtractedIntel, persona_name: str) -> str:
+    """
+    Content address of a report: everything the PDF renders. Verdicts count
+    by status only, so a re-check that changes nothing reuses the file.
+    """
+    content = intel.model_dump(exclude={"verdicts"})
+    content["verdicts"] = {
+        node_id: {source: v.get("status") for source, v in by_source.items()}
+        for node_id, by_source in intel.verdicts.items()
+    }
+    blob = json.dumps([session_id, persona_name, content], sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+
+def report_filename(session_id: str, key: str) -> str:
+    return f"report_{session_id}_{key[:16]}.pdf"
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn: never fork a process that holds SQLite connections and running threads
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.REPORT_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pool
+
+
+def shutdown_report_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True)
+        _pool = None
+
+
+def _render(session_id: str, intel: ExtractedIntel, persona_name: str, filename: str) -> str:
+    """Runs in a report worker process: render under a temp name, then publish atomically."""
+    tmp_name = f".{filename}.{os.getpid()}.tmp"
+    generate_scam_report(session_id, intel, persona_name, filename=tmp_name)
+    os.replace(os.path.join(settings.REPORTS_DIR, tmp_name), os.path.join(settings.REPORTS_DIR, filename))
+    return filename
+
+
+async def render_report(session_id: str, intel: ExtractedIntel, persona_name: str) -> str:
+    """
+    Returns the report filename for this (session, intel, persona). An existing
+    file is reused as-is; otherwise it is rendered in the process pool, and
+    concurrent requests for the same content share one render.
+    """
+    key = report_key(session_id, intel, persona_name)
+    filename = report_filename(session_id, key)
+    path = os.path.join(settings.REPORTS_DIR, filename)
+    if os.path.exists(path):
+        # Retention is by last use
+        os.utime(path)
+        return filename
+
+    future = _inflight.get(key)
+    if future is None:
+        loop = asyncio.get_event_loop()
+        future = loop.run_in_executor(_get_pool(), _render, session_id, intel, persona_name, filename)
+        _inflight[key] = future
+        future.add_done_callback(lambda _: _inflight.pop(key, None))
+        future.add_done_callback(lambda _: maybe_prune())
+    return await asyncio.shield(future)
+
+
+def prune_reports() -> Dict[str, int]:
+    """
+    Retention policy for REPORTS_DIR: drop reports unused for
+    REPORT_RETENTION_DAYS, then the least recently used beyond REPORT_MAX_FILES.
+    """
+    reports_dir = settings.REPORTS_DIR
+    cutoff = time.time() - settings.REPORT_RETENTION_DAYS * 86400
+    entries = []
+    for entry in os.scandir(reports_dir):
+        if entry.is_file() and entry.name.endswith((".pdf", ".tmp")):
+            entries.append((entry.stat().st_mtime, entry.stat().st_size, entry.path))
+    entries.sort()
+    keep_from = max(0, len(entries) - settings.REPORT_MAX_FILES)
+    removed = freed = 0
+    for i, (mtime, size, path) in enumerate(entries):
+        if i < keep_from or mtime < cutoff:
+            try:
+                os.remove(path)
+                removed += 1
+                freed += size
+            except FileNotFoundError:
+                pass
+    if removed:
+        logger.info(f"Pruned {removed} reports ({freed} bytes)")
+    return {"removed": removed, "bytes_freed": freed, "kept": len(entries) - removed}
+
+
+def maybe_prune():
+    """Schedules prune_reports off-loop at most once per REPORT_PRUNE_INTERVAL_S."""
+    global _last_prune
+    if time.monotonic() - _last_prune < settings.REPORT_PRUNE_INTERVAL_S:
+        return
+    _last_prune = time.monotonic()
+    asyncio.get_event_loop().run_in_executor(None, prune_reports)
+
+
+def report_etag(filename: str, size: int) -> str:
+    # Report files are immutable once published (content-addressed or timestamped)
+    return '"' + hashlib.sha1(f"{filename}:{size}".encode()).hexdigest()[:20] + '"'
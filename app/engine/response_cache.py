@@ -0,0 +1,183 @@
+import re
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Set, Tuple
+
+from app.core.config import settings
+
+_NON_WORD = re.compile(r"[^a-z0-9#\s]")
+_DIGITS = re.compile(r"\d+")
+_SPACES = re.compile(r"\s+")
+
+# MinHash LSH: 16 bands x 2 rows. Pairs above ~0.6 Jaccard almost always share a band.
+MINHASH_BANDS = 16
+MINHASH_ROWS = 2
+_MERSENNE = (1 << 61) - 1
+_PERMUTATIONS = [
+    (int.from_bytes(hashlib.blake2b(f"a{i}".encode(), digest_size=8).digest(), "big") % _MERSENNE | 1,
+     int.from_bytes(hashlib.blake2b(f"b{i}".encode(), digest_size=8).digest(), "big") % _MERSENNE)
+    for i in range(MINHASH_BANDS * MINHASH_ROWS)
+]
+
+
+def normalize_message(text: str, fold_digits: bool = True) -> str:
+    """Case and punctuation (and, by default, numbers) stripped so script variants hash together."""
+    text = (text or "").lower()
+    if fold_digits:
+        text = _DIGITS.sub("#", text)
+    text = _NON_WORD.sub(" ", text)
+    return _SPACES.sub(" ", text).strip()
+
+
+def sentiment_bucket(sentiment: int) -> str:
+    if sentiment >= 8:
+        return "angry"
+    if sentiment >= 5:
+        return "irritated"
+    return "calm"
+
+
+def _hash64(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), "big")
+
+
+def minhash_bands(tokens: FrozenSet[str]) -> Tuple[int, ...]:
+    """One LSH bucket id per band of the token set's MinHash signature."""
+    if not tokens:
+        return ()
+    hashes = [_hash64(t) for t in tokens]
+    signature = [min((a * h + b) % _MERSENNE for h in hashes) for a, b in _PERMUTATIONS]
+    return tuple(
+        hash(tuple(signature[i * MINHASH_ROWS:(i + 1) * MINHASH_ROWS]))
+        for i in range(MINHASH_BANDS)
+    )
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+@dataclass(frozen=True)
+class CacheKey:
+    exact: str      # hash of normalized message (numbers kept) + context
+    context: str    # persona + sentiment bucket + history fingerprint
+    tokens: FrozenSet[str]   # word set of the normalized message, numbers folded
+    numbers: Tuple[str, ...]  # the message's numbers: a near hit must quote the same figures
+    bands: Tuple[int, ...]   # MinHash LSH buckets of `tokens`
+
+
+@dataclass
+class _Entry:
+    key: CacheKey
+    value: object
+    expires_at: float
+
+
+class DetectorCache:
+    """
+    LRU + TTL cache in front of the scam detector.
+
+    Exact hits match the normalized message (numbers included) and context
+    hash. Near-duplicate hits need the same context, the same numbers and a
+    word-set Jaccard of at least `min_similarity`; candidates come from
+    MinHash LSH buckets, not a scan. A cached reply may repeat the scammer's
+    amounts, OTPs or phone numbers, so it is never served for other figures.
+    """
+
+    def __init__(self, max_entries: int, ttl: float, min_similarity: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.min_similarity = min_similarity
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._bands: Dict[Tuple[str, int, int], Set[str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key_for(message: str, persona: str, sentiment: int, history: List[Dict[str, str]]) -> CacheKey:
+        normalized = normalize_message(message)
+        # Last two scammer lines: enough to tell script stages apart
+        recent = [normalize_message(m["content"]) for m in history if m.get("role") == "user"][-2:]
+        context = hashlib.sha1(
+            "|".join([persona or "", sentiment_bucket(sentiment or 5)] + recent).encode()
+        ).hexdigest()
+        exact = hashlib.sha1(f"{context}|{normalize_message(message, fold_digits=False)}".encode()).hexdigest()
+        tokens = frozenset(normalized.split())
+        return CacheKey(exact=exact, context=context, tokens=tokens,
+                        numbers=tuple(_DIGITS.findall(message or "")), bands=minhash_bands(tokens))
+
+    def get(self, key: CacheKey):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key.exact)
+            if entry is not None and entry.expires_at > now:
+                self._entries.move_to_end(key.exact)
+                self.hits += 1
+                return entry.value
+            if entry is not None:
+                self._drop(key.exact)
+
+            for i, band in enumerate(key.bands):
+                for candidate in list(self._bands.get((key.context, i, band), ())):
+                    entry = self._entries.get(candidate)
+                    if entry is None or entry.expires_at <= now:
+                        self._drop(candidate)
+                        continue
+                    if entry.key.numbers != key.numbers:
+                        continue
+                    if jaccard(entry.key.tokens, key.tokens) >= self.min_similarity:
+                        self._entries.move_to_end(candidate)
+                        self.near_hits += 1
+                        return entry.value
+            self.misses += 1
+            return None
+
+    def put(self, key: CacheKey, value):
+        with self._lock:
+            if key.exact in self._entries:
+                self._drop(key.exact)
+            self._entries[key.exact] = _Entry(key, value, time.monotonic() + self.ttl)
+            for i, band in enumerate(key.bands):
+                self._bands.setdefault((key.context, i, band), set()).add(key.exact)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+
+    def _drop(self, exact: str):
+        entry = self._entries.pop(exact, None)
+        if entry is None:
+            return
+        for i, band in enumerate(entry.key.bands):
+            bucket = self._bands.get((entry.key.context, i, band))
+            if bucket is not None:
+                bucket.discard(exact)
+                if not bucket:
+                    del self._bands[(entry.key.context, i, band)]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.near_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "near_hits": self.near_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round((self.hits + self.near_hits) / lookups, 4) if lookups else 0.0,
+            }
+
+
+detector_cache = DetectorCache(
+    max_entries=settings.DETECTOR_CACHE_SIZE,
+    ttl=settings.DETECTOR_CACHE_TTL_S,
+    min_similarity=settings.DETECTOR_CACHE_NEAR_JACCARD,
+)
@@ -5,19 +5,17 @@ from fpdf import FPDF
 from app.models.schemas import ExtractedIntel
 from app.core.config import settings
 
-import httpx
 import logging
+from app.core.http import http_client
+from app.db.identifiers import canonicalize
+from app.db.syndicate_graph import identifier_node_id
 
 logger = logging.getLogger(__name__)
 
-async def send_guvi_callback(session_id: str, scam_detected: bool, turn_count: int, intel: ExtractedIntel):
-    """
-    Sends the mandatory final result callback to the GUVI evaluation endpoint.
-    Async version for integration into LangGraph.
-    """
-    url = "https://hackathon.guvi.in/api/updateHoneyPotFinalResult"
-    
-    payload = {
+GUVI_CALLBACK_URL = "https://hackathon.guvi.in/api/updateHoneyPotFinalResult"
+
+def build_guvi_payload(session_id: str, scam_detected: bool, turn_count: int, intel: ExtractedIntel) -> dict:
+    return {
         "sessionId": session_id,
         "scamDetected": scam_detected,
         "totalMessagesExchanged": turn_count,
@@ -30,21 +28,25 @@ async def send_guvi_callback(session_id: str, scam_detected: bool, turn_count: i
         },
         "agentNotes": intel.agent_notes or "Scam engagement in progress."
     }
-    
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, json=payload, timeout=10.0)
-            if response.status_code == 200:
-                logger.info(f" Mandatory GUVI callback successful for session {session_id}")
-            else:
-                logger.error(f" GUVI callback failed: {response.status_code} - {response.text}")
-    except Exception as e:
-        logger.error(f" Critical error during GUVI callback: {e}")
 
-def generate_scam_report(session_id: str, intel: ExtractedIntel, persona_name: str) -> str:
+async def post_guvi_payload(payload: dict):
+    """POSTs a prepared callback payload; raises on transport errors and non-200 replies."""
+    response = await http_client.post(GUVI_CALLBACK_URL, json=payload, timeout=10.0)
+    if response.status_code != 200:
+        raise RuntimeError(f"GUVI callback failed: {response.status_code} - {response.text[:200]}")
+    logger.info(f" Mandatory GUVI callback successful for session {payload['sessionId']}")
+
+def _verdict_note(intel: ExtractedIntel, intel_type: str, value: str) -> str:
+    """ ' [upi_verify: ok]' style suffix from cached enrichment verdicts, if any."""
+    by_source = intel.verdicts.get(identifier_node_id(intel_type, canonicalize(intel_type, value)))
+    if not by_source:
+        return ""
+    return " [" + ", ".join(f"{source}: {v.get('status')}" for source, v in sorted(by_source.items())) + "]"
+
+def generate_scam_report(session_id: str, intel: ExtractedIntel, persona_name: str, filename: str = None) -> str:
     """
     Generates a PDF report for the National Cyber Crime Reporting Portal.
-    Returns the path to the generated PDF.
+    Returns the path to the generated PDF. `filename` defaults to a timestamped name.
     """
     pdf = FPDF()
     pdf.add_page()
@@ -73,7 +75,7 @@ def generate_scam_report(session_id: str, intel: ExtractedIntel, persona_name: s
         pdf.cell(0, 8, "UPI IDs Identified:", ln=True)
         pdf.set_font("Arial", "", 10)
         for upi in intel.upi_ids:
-            pdf.cell(0, 8, f"- {upi}", ln=True)
+            pdf.cell(0, 8, f"- {upi}{_verdict_note(intel, 'upi', upi)}", ln=True)
     
     if intel.bank_details:
         pdf.set_font("Arial", "B", 10)
@@ -87,7 +89,7 @@ def generate_scam_report(session_id: str, intel: ExtractedIntel, persona_name: s
         pdf.cell(0, 8, "Suspicious/Phishing Links:", ln=True)
         pdf.set_font("Arial", "", 10)
         for link in intel.phishing_links:
-            pdf.cell(0, 8, f"- {link}", ln=True)
+            pdf.cell(0, 8, f"- {link}{_verdict_note(intel, 'link', link)}", ln=True)
             
     if not any([intel.upi_ids, intel.bank_details, intel.phishing_links]):
         pdf.cell(0, 8, "No financial or malicious markers identified in this session yet.", ln=True)
@@ -101,7 +103,7 @@ def generate_scam_report(session_id: str, intel: ExtractedIntel, persona_name: s
     # Save PDF
     reports_dir = settings.REPORTS_DIR
     
-    filename = f"report_{session_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+    filename = filename or f"report_{session_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
     file_path = os.path.join(reports_dir, filename)
     pdf.output(file_path)
     
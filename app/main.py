@@ -2,17 +2,36 @@ import logging
 import asyncio
 import os
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, Request, HTTPException, BackgroundTasks, Depends
+from fastapi import FastAPI, Request, HTTPException, BackgroundTasks, Depends, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse, Response
 from fastapi.staticfiles import StaticFiles
+import io
+import csv
 import json
+from datetime import datetime
+from typing import List, Optional
 
-from app.models.schemas import ScammerInput, ExtractedIntel
+from app.models.schemas import ScammerInput, ExtractedIntel, EvidenceExportRequest
 from app.engine.graph import build_workflow
+from app.engine.checkpointing import configure_checkpointer, GRAPH_DURABILITY
 from app.core.config import settings
+from app.core.http import http_client
 from app.db.repository import db
-from app.engine.tools import generate_scam_report, send_guvi_callback
+from app.db.vector_store import vector_db
+from app.db.enrichment_cache import enrichment_cache
+from app.db.blacklist_ledger import blacklist_ledger
+from app.db.callback_outbox import guvi_outbox
+from app.engine.response_cache import detector_cache
+from app.engine.forensics_jobs import build_forensics_worker_pool
+from app.engine.guvi_jobs import build_guvi_worker_pool
+from app.engine.reports import report_etag, prune_reports, shutdown_report_pool
+from app.engine.evidence_export import create_export, build_export_worker_pool, prune_exports
+from app.db.evidence_exports import export_store
+from app.db.checkpoint_retention import checkpoint_retention
+from app.db.session_lock import session_locks
+from app.engine.coalescer import coalescer
+from app.db.job_queue import forensics_queue
 from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
 
 # Setup Logging
@@ -26,15 +45,56 @@ graph = None
 async def lifespan(app: FastAPI):
     global graph
     # Using AsyncSqliteSaver for startup-grade persistence
-    async with AsyncSqliteSaver.from_conn_string("db/checkpoints.sqlite") as saver:
+    # One pooled outbound client for enrichment, blacklist and GUVI calls
+    await http_client.start()
+    async with AsyncSqliteSaver.from_conn_string(settings.CHECKPOINT_DB_PATH) as saver:
+        configure_checkpointer(saver)
         # Build and compile graph
         workflow = build_workflow()
         graph = workflow.compile(checkpointer=saver)
+        await db.load_syndicate_graph()
+        # Load the fingerprint embedder now, not on the first scam turn
+        try:
+            await vector_db.warmup()
+        except Exception as e:
+            logger.error(f"Embedding model warmup failed, fingerprinting disabled until fixed: {e}")
+        # Apply the reports/ retention policy once at boot (later runs follow renders)
+        asyncio.get_event_loop().run_in_executor(None, prune_reports)
+
+        # GUVI callbacks are delivered from the outbox in the background
+        guvi_workers = build_guvi_worker_pool()
+        guvi_workers.start()
+        export_workers = build_export_worker_pool()
+        export_workers.start()
+        # Same for exports/ (later runs follow each finished export)
+        asyncio.create_task(prune_exports())
+        # Trims/expires checkpoints and compacts the saver DB between turns
+        checkpoint_retention.start()
+
+        # Reply-first mode: forensics run from the durable job queue
+        forensics_workers = None
+        if settings.REPLY_FIRST_MODE:
+            forensics_workers = build_forensics_worker_pool(graph)
+            forensics_workers.start()
         
         logger.info("🚀 Forensic Intelligence Platform active with AsyncSqliteSaver")
         
         yield
 
+        if forensics_workers:
+            await forensics_workers.stop()
+        await guvi_workers.stop()
+        await export_workers.stop()
+        await checkpoint_retention.stop()
+        shutdown_report_pool()
+
+    await http_client.close()
+    await vector_db.drain()
+    # Drain the write-behind queue, then release pooled SQLite connections
+    await db.drain()
+    db.close()
+    session_locks.close()
+
 app = FastAPI(
     title="Helware Honey-Pot: Forensic Intelligence Platform",
     description="Advanced scam syndicate detection and evidence gathering engine.",
@@ -67,10 +127,92 @@ async def health_check():
 async def get_syndicate_graph():
     return await db.get_syndicate_links()
 
+@app.get("/syndicate/neighborhood", dependencies=[Depends(verify_api_key)])
+async def get_syndicate_neighborhood(
+    node_id: str,
+    hops: int = Query(2, ge=1, le=4),
+    max_nodes: int = Query(500, ge=1, le=5000)
+):
+    """k-hop ego network around a session ID or identifier node (e.g. `upi_fraud@ybl`)."""
+    result = await db.get_syndicate_neighborhood(node_id, hops, max_nodes)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Node not found in syndicate graph")
+    return result
+
+@app.get("/syndicate/components", dependencies=[Depends(verify_api_key)])
+async def get_syndicate_components(
+    limit: int = Query(10, ge=1, le=100),
+    max_members: int = Query(50, ge=0, le=1000)
+):
+    """Largest connected syndicates, biggest first."""
+    return {"components": await db.get_syndicate_components(limit, max_members)}
+
+@app.get("/syndicate/nodes", dependencies=[Depends(verify_api_key)])
+async def list_syndicate_nodes(cursor: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=1000)):
+    return await db.list_syndicate_nodes(cursor, limit)
+
+@app.get("/syndicate/edges", dependencies=[Depends(verify_api_key)])
+async def list_syndicate_edges(cursor: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=1000)):
+    return await db.list_syndicate_edges(cursor, limit)
+
+FORENSICS_CSV_COLUMNS = ["id", "session_id", "type", "value", "timestamp", "first_seen", "sighting_count"]
+
+def _forensics_filters(type: Optional[str], session_id: Optional[str],
+                       since: Optional[datetime], until: Optional[datetime]) -> dict:
+    return {"intel_type": type, "session_id": session_id, "since": since, "until": until}
+
 @app.get("/admin/forensics", dependencies=[Depends(verify_api_key)])
-async def get_all_forensics():
-    """Returns all extracted intelligence across all sessions for the dashboard."""
-    return await db.get_all_intel()
+async def get_all_forensics(
+    cursor: Optional[str] = None,
+    limit: int = Query(500, ge=1, le=5000),
+    type: Optional[str] = None,
+    session_id: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+):
+    """Extracted intelligence across all sessions for the dashboard, newest first, one keyset page at a time."""
+    try:
+        return await db.get_intel_page(cursor, limit, **_forensics_filters(type, session_id, since, until))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+@app.get("/admin/forensics/export", dependencies=[Depends(verify_api_key)])
+async def export_forensics(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    type: Optional[str] = None,
+    session_id: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+):
+    """Streams every matching row as NDJSON or CSV; rows are read in keyset pages, never all at once."""
+    rows = db.iter_intel(**_forensics_filters(type, session_id, since, until))
+
+    async def ndjson():
+        chunk = []
+        async for row in rows:
+            chunk.append(json.dumps(row, default=str))
+            if len(chunk) >= 500:
+                yield "\n".join(chunk) + "\n"
+                chunk = []
+        if chunk:
+            yield "\n".join(chunk) + "\n"
+
+    async def csv_lines():
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=FORENSICS_CSV_COLUMNS)
+        writer.writeheader()
+        async for row in rows:
+            writer.writerow(row)
+            if buffer.tell() > 65536:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    if format == "csv":
+        return StreamingResponse(csv_lines(), media_type="text/csv",
+                                 headers={"Content-Disposition": "attachment; filename=forensics.csv"})
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
 
 @app.post("/admin/intervention/{session_id}", dependencies=[Depends(verify_api_key)])
 async def toggle_intervention(session_id: str, enabled: bool = True, manual_response: str = None):
@@ -124,20 +266,23 @@ async def chat_webhook_stream(payload: ScammerInput, request: Request):
 
             config = {"configurable": {"thread_id": payload.session_id}}
             
-            async for chunk in graph.astream(initial_state, config=config, stream_mode="updates"):
-                for node_name, node_state in chunk.items():
-                    yield f"data: {json.dumps({'node': node_name, 'status': 'processing'})}\n\n"
-                    
-                    if node_name == "process_interaction" and node_state.get("agent_response"):
-                        final_data = {
-                            "status": "success",
-                            "reply": node_state["agent_response"],
-                            "metadata": {
-                                "scam_detected": node_state.get("scam_detected", False),
-                                "priority": "HIGH" if node_state.get("high_priority") else "NORMAL"
+            # Turns of one session run in order, across workers
+            async with session_locks.hold(payload.session_id):
+                async for chunk in graph.astream(initial_state, config=config, stream_mode="updates",
+                                                 durability=GRAPH_DURABILITY):
+                    for node_name, node_state in chunk.items():
+                        yield f"data: {json.dumps({'node': node_name, 'status': 'processing'})}\n\n"
+                        
+                        if node_name == "process_interaction" and node_state.get("agent_response"):
+                            final_data = {
+                                "status": "success",
+                                "reply": node_state["agent_response"],
+                                "metadata": {
+                                    "scam_detected": node_state.get("scam_detected", False),
+                                    "priority": "HIGH" if node_state.get("high_priority") else "NORMAL"
+                                }
                             }
-                        }
-                        yield f"data: {json.dumps(final_data)}\n\n"
+                            yield f"data: {json.dumps(final_data)}\n\n"
 
         except Exception as e:
             logger.error(f"Streaming Error: {e}")
@@ -156,27 +301,33 @@ async def chat_webhook(payload: ScammerInput, request: Request):
     if graph is None:
         raise HTTPException(status_code=503, detail="Graph engine not initialized")
 
-    try:
+    async def run_turn(payloads: List[ScammerInput]):
         # 1. Prepare State (Only provide updates to avoid overwriting checkpoint)
+        latest = payloads[-1]
         history = []
-        for msg in payload.conversation_history:
+        for msg in latest.conversation_history:
             role = "user" if msg.sender == "scammer" else "assistant"
             history.append({"role": role, "content": msg.text})
 
         # We only pass session_id, user_message, and history. 
         # Forensic flags (scam_detected, intel) are recovered from the checkpointer.
+        # A coalesced burst is one user_message, in arrival order.
         initial_state = {
-            "session_id": payload.session_id,
-            "user_message": payload.message.text,
+            "session_id": latest.session_id,
+            "user_message": "\n".join(p.message.text for p in payloads),
             "history": history,
             "turn_count": len(history),
-            "generate_report": payload.generate_report,
-            "human_intervention": payload.human_intervention
+            "generate_report": any(p.generate_report for p in payloads),
+            "human_intervention": any(p.human_intervention for p in payloads)
         }
 
         # 2. Invoke Graph with persistent thread_id
-        config = {"configurable": {"thread_id": payload.session_id}}
-        result_state = await graph.ainvoke(initial_state, config=config)
+        config = {"configurable": {"thread_id": latest.session_id}}
+        return await graph.ainvoke(initial_state, config=config, durability=GRAPH_DURABILITY)
+
+    try:
+        # Rapid-fire messages share one turn; turns of a session run in order across workers
+        result_state = await coalescer.submit(payload.session_id, payload, run_turn)
 
         # 3. RESTful Response (STRICTLY matching rules.txt Section 8)
         return {
@@ -196,12 +347,83 @@ async def get_summary_report():
     stats = await db.get_stats()
     return {**stats, "status": "Ready for Law Enforcement Export"}
 
+@app.post("/admin/exports", dependencies=[Depends(verify_api_key)])
+async def start_evidence_export(request: EvidenceExportRequest):
+    """Queues a bulk evidence export (per-session PDFs + manifest.json in one zip)."""
+    export_id = await create_export(request)
+    return {"export_id": export_id, "status_url": f"/admin/exports/{export_id}"}
+
+@app.get("/admin/exports/{export_id}", dependencies=[Depends(verify_api_key)])
+async def get_evidence_export(export_id: int):
+    export = await export_store.get(export_id)
+    if export is None:
+        raise HTTPException(status_code=404, detail="Export not found")
+    export["progress"] = round(export["done"] / export["total"], 4) if export["total"] else 0.0
+    if export["status"] == "done":
+        export["download_url"] = f"/admin/exports/{export_id}/download"
+    return export
+
+@app.get("/admin/exports/{export_id}/download", dependencies=[Depends(verify_api_key)])
+async def download_evidence_export(export_id: int):
+    export = await export_store.get(export_id)
+    if export is None:
+        raise HTTPException(status_code=404, detail="Export not found")
+    if export["status"] != "done":
+        raise HTTPException(status_code=409, detail=f"Export is {export['status']}")
+    return FileResponse(
+        os.path.join(settings.EXPORTS_DIR, export["archive"]),
+        media_type="application/zip",
+        filename=export["archive"]
+    )
+
+@app.get("/admin/jobs/stats", dependencies=[Depends(verify_api_key)])
+async def get_job_stats():
+    return {"forensics": await forensics_queue.stats(), "guvi_callbacks": await guvi_outbox.stats()}
+
+@app.get("/admin/blacklist/stats", dependencies=[Depends(verify_api_key)])
+async def get_blacklist_stats():
+    return await blacklist_ledger.stats()
+
+@app.get("/admin/checkpoints/stats", dependencies=[Depends(verify_api_key)])
+async def get_checkpoint_stats():
+    return await checkpoint_retention.stats()
+
+@app.post("/admin/checkpoints/compact", dependencies=[Depends(verify_api_key)])
+async def compact_checkpoints():
+    """Runs a retention + incremental VACUUM pass now and reports what it reclaimed."""
+    report = await checkpoint_retention.run_once()
+    if report is None:
+        raise HTTPException(status_code=409, detail="A retention pass is already running")
+    return report
+
+@app.get("/admin/sessions/locks", dependencies=[Depends(verify_api_key)])
+async def get_session_lock_stats():
+    return {**session_locks.stats(), "coalescing": coalescer.stats()}
+
+@app.get("/admin/http/stats", dependencies=[Depends(verify_api_key)])
+async def get_http_stats():
+    return http_client.stats()
+
+@app.get("/admin/cache/stats", dependencies=[Depends(verify_api_key)])
+async def get_cache_stats():
+    return {
+        "detector_cache": detector_cache.stats(),
+        "enrichment_cache": enrichment_cache.stats(),
+        "embedding_cache": vector_db.embedder.stats(),
+        "session_cache": db.sessions.stats(),
+    }
+
 @app.get("/reports/{filename}")
-async def serve_report(filename: str):
-    file_path = os.path.join(settings.REPORTS_DIR, filename)
-    if not os.path.exists(file_path):
+async def serve_report(filename: str, request: Request):
+    file_path = os.path.join(settings.REPORTS_DIR, os.path.basename(filename))
+    if not filename.endswith(".pdf") or not os.path.isfile(file_path):
         raise HTTPException(status_code=404, detail="Report not found")
-    return FileResponse(file_path)
+    etag = report_etag(filename, os.path.getsize(file_path))
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=86400"}
+    # Conditional GET: reports never change under the same name
+    if etag in [t.strip() for t in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+    return FileResponse(file_path, media_type="application/pdf", headers=headers)
 
 if __name__ == "__main__":
     import uvicorn
@@ -1,5 +1,6 @@
-from pydantic import BaseModel, Field, ConfigDict, AliasChoices
-from typing import List, Dict, Optional
+from datetime import datetime
+from pydantic import BaseModel, Field, ConfigDict, AliasChoices, model_validator
+from typing import List, Dict, Literal, Optional
 
 class Message(BaseModel):
     sender: str
@@ -31,6 +32,8 @@ class ExtractedIntel(BaseModel):
     phone_numbers: List[str] = []
     suspicious_keywords: List[str] = [] 
     agent_notes: Optional[str] = None 
+    # Enrichment verdicts: "<type>_<canonical value>" -> {source: {status, source, reason}}
+    verdicts: Dict[str, Dict[str, Dict]] = {}
 
 class AgentResponse(BaseModel):
     status: str = "success"
@@ -42,4 +45,19 @@ class CallbackPayload(BaseModel):
     scamDetected: bool
     totalMessagesExchanged: int
     extractedIntelligence: Dict[str, List[str]]
-    agentNotes: str
\ No newline at end of file
+    agentNotes: str
+
+class EvidenceExportRequest(BaseModel):
+    """Session filter for a bulk evidence export; all given filters must match."""
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+    identifier_type: Optional[Literal["upi", "bank", "link", "phone"]] = None
+    identifier_value: Optional[str] = None
+    component_node_id: Optional[str] = None  # any session/identifier node in a syndicate component
+
+    @model_validator(mode="after")
+    def _identifier_filter_complete(self):
+        # One without the other would silently widen the export to every scam session
+        if bool(self.identifier_type) != bool(self.identifier_value):
+            raise ValueError("identifier_type and identifier_value must be given together")
+        return self
@@ -0,0 +1,192 @@
+"""
+Bytes written and latency per turn: per-node checkpointing (CHECKPOINT_MODE=node)
+vs end-of-turn slim checkpoints (CHECKPOINT_MODE=turn).
+
+The graph mirrors build_workflow()'s 9-node scam-turn path with LLM and I/O
+stubbed out; like the real nodes, each returns the full state, history grows
+by two messages a turn and intel gains identifiers as the scam goes on.
+
+    python benchmark_checkpointing.py --sessions 20 --turns 30
+"""
+import os
+import time
+import asyncio
+import sqlite3
+import argparse
+import tempfile
+import statistics
+from typing import Annotated, Any, Dict, List, Optional, Tuple, TypedDict
+
+from langgraph.graph import StateGraph, START, END
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from app.engine.checkpointing import SlimStateSerializer
+from app.models.schemas import ExtractedIntel
+
+BRANCHES = ["enrich_intelligence", "fingerprint_scammer", "submit_to_blacklist", "generate_takedown_report"]
+MESSAGE = "Sir your SBI account is blocked, pay Rs 4999 to {upi} and share the OTP sent to {phone} or visit {link} now"
+
+
+def _merge(left: Optional[ExtractedIntel], right: Optional[ExtractedIntel]) -> ExtractedIntel:
+    if right is None or left is right:
+        return left or right or ExtractedIntel()
+    if left is None:
+        return right
+    return ExtractedIntel(**{
+        field: sorted(set(getattr(left, field)) | set(getattr(right, field)))
+        for field in ("upi_ids", "bank_details", "phishing_links", "phone_numbers", "suspicious_keywords")
+    }, agent_notes=right.agent_notes or left.agent_notes, verdicts={**left.verdicts, **right.verdicts})
+
+
+def _timings(left: Optional[Dict], right: Optional[Dict]) -> Dict:
+    return {**(left or {}), **(right or {})}
+
+
+class State(TypedDict):
+    session_id: str
+    user_message: str
+    history: List[Dict[str, str]]
+    scam_detected: bool
+    high_priority: bool
+    scammer_sentiment: int
+    selected_persona: str
+    agent_response: str
+    intel: Annotated[ExtractedIntel, _merge]
+    is_returning_scammer: bool
+    syndicate_match_score: float
+    generate_report: bool
+    report_url: Optional[str]
+    turn_count: int
+    human_intervention: bool
+    combined_intel: Optional[Dict[str, Any]]
+    forensics_timings: Annotated[Dict[str, float], _timings]
+
+
+TRANSCRIPTS: Dict[str, List[Dict[str, str]]] = {}
+
+
+def build_graph():
+    async def load_history(state):
+        state["history"] = list(TRANSCRIPTS.setdefault(state["session_id"], []))
+        state["turn_count"] = len(state["history"])
+        return state
+
+    async def process_interaction(state):
+        state["scam_detected"] = True
+        state["selected_persona"] = "RAJESH"
+        state["agent_response"] = "Arre beta, which button do I press? My grandson set up this phone. " * 2
+        state["combined_intel"] = {"upi_ids": [], "agent_notes": "Impersonates bank support, urgency + OTP ask."}
+        return state
+
+    async def extract_forensics(state):
+        n = state["turn_count"] // 2
+        state["intel"] = ExtractedIntel(
+            upi_ids=[f"refund{n}@ybl"], phone_numbers=[f"+91 98{n:08d}"],
+            phishing_links=[f"http://sbi-kyc-{n}.example/verify"], suspicious_keywords=["otp", "blocked", "kyc"],
+            agent_notes="Impersonates bank support, urgency + OTP ask.",
+        )
+        return state
+
+    def branch(name):
+        async def run(state):
+            if name == "enrich_intelligence":
+                n = state["turn_count"] // 2
+                return {"intel": ExtractedIntel(verdicts={f"upi_refund{n}@ybl": {"upi_verify": {"status": "flagged"}}}),
+                        "forensics_timings": {name: 1.0}}
+            return {"forensics_timings": {name: 1.0}}
+        return run
+
+    async def persist_state(state):
+        transcript = TRANSCRIPTS[state["session_id"]]
+        transcript.append({"role": "user", "content": state["user_message"]})
+        transcript.append({"role": "assistant", "content": state["agent_response"]})
+        state["turn_count"] = len(transcript)
+        return state
+
+    async def guvi_reporting(state):
+        return state
+
+    workflow = StateGraph(State)
+    workflow.add_node("load_history", load_history)
+    workflow.add_node("process_interaction", process_interaction)
+    workflow.add_node("extract_forensics", extract_forensics)
+    for name in BRANCHES:
+        workflow.add_node(name, branch(name))
+    workflow.add_node("persist_state", persist_state)
+    workflow.add_node("guvi_reporting", guvi_reporting)
+    workflow.add_edge(START, "load_history")
+    workflow.add_edge("load_history", "process_interaction")
+    workflow.add_edge("process_interaction", "extract_forensics")
+    for name in BRANCHES:
+        workflow.add_edge("extract_forensics", name)
+    workflow.add_edge(BRANCHES, "persist_state")
+    workflow.add_edge("persist_state", "guvi_reporting")
+    workflow.add_edge("guvi_reporting", END)
+    return workflow
+
+
+def stored_bytes(path: str) -> Tuple[int, int]:
+    conn = sqlite3.connect(path)
+    try:
+        checkpoints = conn.execute(
+            "SELECT COALESCE(SUM(LENGTH(checkpoint) + LENGTH(metadata)), 0) FROM checkpoints"
+        ).fetchone()[0]
+        writes = conn.execute("SELECT COALESCE(SUM(LENGTH(value)), 0) FROM writes").fetchone()[0]
+        rows = conn.execute("SELECT (SELECT COUNT(*) FROM checkpoints) + (SELECT COUNT(*) FROM writes)").fetchone()[0]
+        return checkpoints + writes, rows
+    finally:
+        conn.close()
+
+
+async def run_mode(mode: str, sessions: int, turns: int) -> Dict[str, Any]:
+    TRANSCRIPTS.clear()
+    path = os.path.join(tempfile.mkdtemp(prefix=f"cpbench_{mode}_"), "checkpoints.sqlite")
+    durability = "exit" if mode == "turn" else "async"
+    async with AsyncSqliteSaver.from_conn_string(path) as saver:
+        saver.serde = SlimStateSerializer(slim=True) if mode == "turn" else JsonPlusSerializer()
+        graph = build_graph().compile(checkpointer=saver)
+        latencies = []
+        for turn in range(turns):
+            for s in range(sessions):
+                text = MESSAGE.format(upi=f"refund{turn}@ybl", phone=f"+91 98{turn:08d}", link=f"http://sbi-kyc-{turn}.example")
+                config = {"configurable": {"thread_id": f"session-{s}"}}
+                started = time.perf_counter()
+                await graph.ainvoke(
+                    {"session_id": f"session-{s}", "user_message": text, "history": [], "generate_report": False,
+                     "human_intervention": False},
+                    config=config, durability=durability,
+                )
+                latencies.append((time.perf_counter() - started) * 1000)
+        last = await saver.aget_tuple({"configurable": {"thread_id": "session-0"}})
+    payload, rows = stored_bytes(path)
+    file_bytes = sum(os.path.getsize(p) for p in (path, path + "-wal") if os.path.exists(p))
+    total_turns = sessions * turns
+    return {
+        "mode": mode,
+        "rows_per_turn": round(rows / total_turns, 1),
+        "payload_kb_per_turn": round(payload / total_turns / 1024, 1),
+        "last_checkpoint_kb": round(len(saver.serde.dumps_typed(last.checkpoint)[1]) / 1024, 1),
+        "file_mb": round(file_bytes / 2**20, 2),
+        "mean_ms": round(statistics.mean(latencies), 2),
+        "p95_ms": round(sorted(latencies)[int(len(latencies) * 0.95) - 1], 2),
+        "intel_upis": len(last.checkpoint["channel_values"]["intel"].upi_ids),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=30)
+    args = parser.parse_args()
+
+    results = [await run_mode(mode, args.sessions, args.turns) for mode in ("node", "turn")]
+    print(f"\n{args.sessions} sessions x {args.turns} turns (payload = checkpoint + metadata + pending-write blobs)\n")
+    columns = list(results[0])
+    print("  ".join(f"{c:>19}" for c in columns))
+    for row in results:
+        print("  ".join(f"{row[c]!s:>19}" for c in columns))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,119 @@
+"""
+Compare the fingerprint vector backends (app/db/vector_backends.py).
+
+Synthetic clustered unit vectors stand in for MiniLM embeddings, so the run
+needs no model files. Every backend sees the same corpus and queries; each
+runs in its own process so peak RSS is per backend.
+
+    python benchmark_vector_backends.py --rows 50000 --queries 200
+"""
+import os
+import time
+import argparse
+import resource
+import tempfile
+import multiprocessing as mp
+
+import numpy as np
+
+
+def make_data(rows: int, queries: int, dim: int, clusters: int, seed: int = 7):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    corpus = centers[rng.integers(0, clusters, rows)] + 0.5 * rng.standard_normal((rows, dim)).astype(np.float32)
+    probes = centers[rng.integers(0, clusters, queries)] + 0.5 * rng.standard_normal((queries, dim)).astype(np.float32)
+    corpus /= np.linalg.norm(corpus, axis=1, keepdims=True)
+    probes /= np.linalg.norm(probes, axis=1, keepdims=True)
+    return corpus, probes
+
+
+def make_embedder(corpus: np.ndarray, probes: np.ndarray):
+    """Documents are "c<i>" / "q<i>"; the embedding is a table lookup."""
+    from chromadb import Documents, EmbeddingFunction, Embeddings
+
+    class TableEmbedder(EmbeddingFunction[Documents]):
+        def __init__(self):
+            pass
+
+        def __call__(self, input: Documents) -> Embeddings:
+            return [(corpus if d[0] == "c" else probes)[int(d[1:])] for d in input]
+
+    return TableEmbedder()
+
+
+def run_backend(name: str, args, out):
+    from app.db.vector_backends import ChromaBackend, NumpyBackend
+
+    corpus, probes = make_data(args.rows, args.queries, args.dim, args.clusters)
+    embedder = make_embedder(corpus, probes)
+    directory = tempfile.mkdtemp(prefix=f"vecbench_{name}_")
+    if name == "chroma":
+        backend = ChromaBackend(directory, embedder)
+    else:
+        backend = NumpyBackend(directory, embedder, ann_min_rows=0 if name == "numpy-exact" else 1, nprobe=args.nprobe)
+
+    started = time.perf_counter()
+    ids = [f"c{i}" for i in range(args.rows)]
+    for start in range(0, args.rows, args.batch):
+        chunk = ids[start:start + args.batch]
+        backend.upsert(chunk, chunk, [{"row": start + i} for i in range(len(chunk))])
+    ingest_s = time.perf_counter() - started
+
+    # The first query pays for index build / HNSW load; keep it out of the latencies
+    backend.query("q0", args.k)
+    latencies, hits = [], []
+    for i in range(args.queries):
+        t = time.perf_counter()
+        result = backend.query(f"q{i}", args.k)
+        latencies.append((time.perf_counter() - t) * 1000)
+        hits.append([int(x[1:]) for x in result["ids"][0]])
+
+    truth = np.argsort(-(corpus @ probes.T), axis=0)[:args.k].T
+    recall = np.mean([len(set(h) & set(t)) / args.k for h, t in zip(hits, truth)])
+    out.put({
+        "backend": name,
+        "ingest_s": round(ingest_s, 2),
+        "recall": round(float(recall), 4),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 2),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 2),
+        # ru_maxrss is KiB on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "disk_mb": round(sum(
+            os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(directory) for f in files
+        ) / 2**20, 1),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=384, help="all-MiniLM-L6-v2 is 384-d")
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--k", type=int, default=3, help="fingerprint_scammer asks for 3")
+    parser.add_argument("--batch", type=int, default=32, help="VECTOR_MAX_BATCH")
+    parser.add_argument("--nprobe", type=int, default=8)
+    parser.add_argument("--backends", default="chroma,numpy-exact,numpy-ivf")
+    args = parser.parse_args()
+
+    ctx = mp.get_context("spawn")
+    results = []
+    for name in args.backends.split(","):
+        out = ctx.Queue()
+        proc = ctx.Process(target=run_backend, args=(name, args, out))
+        proc.start()
+        proc.join()
+        if proc.exitcode != 0:
+            print(f"{name}: failed (exit {proc.exitcode})")
+            continue
+        results.append(out.get())
+
+    print(f"\n{args.rows} rows x {args.dim}-d, {args.queries} queries, recall@{args.k} vs exact search\n")
+    columns = ["backend", "ingest_s", "recall", "p50_ms", "p95_ms", "peak_rss_mb", "disk_mb"]
+    print("  ".join(f"{c:>12}" for c in columns))
+    for row in results:
+        print("  ".join(f"{row[c]!s:>12}" for c in columns))
+
+
+if __name__ == "__main__":
+    main()